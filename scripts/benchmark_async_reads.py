@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark the handlers' multi-object reads: sequential against bounded fan-out.
+
+Starts the local S3 stand-in from ``tests/s3_stub.py`` with ``--delay-ms``
+of latency per request, stores ``--projects`` contribution projects, and
+lists them ``--requests`` times in each mode:
+
+1. Sequential: one ``s3`` pool job per request that lists and reads every
+   project one after another, as the handler did before.
+2. Fan-out: ``list_all_projects_async``. The per-project lists and reads
+   go out concurrently as separate ``s3`` pool jobs, at most
+   ``STORAGE_READ_CONCURRENCY`` per call.
+
+The requests run concurrently, as they would from several browsers. The
+table shows the wall time per mode and the mean latency of one request.
+
+Usage:
+    python benchmark_async_reads.py --projects 40 --requests 8 --delay-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from aind_metadata_viz import async_storage, s3, storage  # noqa: E402
+from aind_metadata_viz.contributions import store as contributions_store  # noqa: E402
+from aind_metadata_viz.contributions.models import ProjectContributions  # noqa: E402
+from aind_metadata_viz.executors import run_in  # noqa: E402
+from tests.s3_stub import S3Stub  # noqa: E402
+
+
+def list_sequentially():
+    store = storage.backend()
+    names = set()
+    for prefix in store.list(f"{contributions_store._S3_PREFIX}/", delimiter="/").prefixes:
+        keys = store.list(prefix).keys
+        obj = store.get(keys[-1]) if keys else None
+        if obj is not None:
+            names.add(json.loads(obj.body.decode()).get("project_id"))
+    return sorted(name for name in names if name)
+
+
+async def run(list_projects, requests):
+    async def one():
+        started = time.perf_counter()
+        names = await list_projects()
+        return time.perf_counter() - started, names
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(requests)))
+    return time.perf_counter() - started, sum(latency for latency, _ in results) / requests, results[0][1]
+
+
+async def main_async(opts):
+    modes = (
+        ("sequential", lambda: run_in("s3", list_sequentially)),
+        ("fan-out", contributions_store.list_all_projects_async),
+    )
+    for mode, list_projects in modes:
+        elapsed, mean_latency, names = await run(list_projects, opts.requests)
+        assert len(names) == opts.projects, names
+        print(
+            f"{mode:>10}: {elapsed * 1000:8.1f} ms total, {mean_latency * 1000:8.1f} ms per request, "
+            f"{opts.requests / elapsed:6.1f} requests/s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sequential against fanned-out multi-object reads")
+    parser.add_argument("--projects", type=int, default=40, help="Projects to store and list")
+    parser.add_argument("--requests", type=int, default=8, help="Concurrent list requests per mode")
+    parser.add_argument("--delay-ms", type=float, default=20.0, help="Stand-in latency per request")
+    opts = parser.parse_args()
+
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        os.environ.setdefault(name, "benchmark")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-west-2")
+
+    stub = S3Stub().start()
+    s3.S3_ENDPOINT_URL = stub.url
+    s3.reset()
+    storage.STORAGE_BACKEND = "s3"
+    storage.reset()
+    for i in range(opts.projects):
+        name = f"project-{i:03d}"
+        contributions_store.store_contributions(name, ProjectContributions(project_name=name))
+    stub.delay_s = opts.delay_ms / 1000
+
+    print(
+        f"S3 stand-in at {stub.url}: {opts.projects} projects, {opts.requests} concurrent requests, "
+        f"{opts.delay_ms:.0f} ms per S3 request, read concurrency {async_storage.STORAGE_READ_CONCURRENCY}"
+    )
+    print("=" * 80)
+    asyncio.run(main_async(opts))
+    print("=" * 80)
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
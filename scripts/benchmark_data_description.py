@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark the per-request CPU cost of building the /gather data_description.
+
+Compares the current ``_build_data_description`` (one validation, dumped
+straight to a JSON-ready dict, table lookups for modality and group) with
+the previous path, reproduced below as ``legacy_build``: construct, dump to
+a JSON string, parse it back, validate the dict a second time, and scan the
+``Group`` enum on every call.
+
+Usage:
+    python benchmark_data_description.py --iterations 500
+"""
+
+import argparse
+import json
+import os
+import timeit
+import warnings
+from datetime import datetime, timezone
+
+from aind_data_schema.core.data_description import DataDescription
+from aind_data_schema_models.data_name_patterns import DataLevel, Group
+from aind_data_schema_models.modalities import Modality
+from aind_data_schema_models.organizations import Organization
+
+from aind_metadata_viz.endpoints import _build_data_description
+
+FUNDING_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "tests",
+    "resources",
+    "metadata_service",
+    "funding_response.json",
+)
+
+
+def legacy_build(
+    project_name,
+    subject_id,
+    funding_source,
+    investigators,
+    modalities,
+    tags,
+    group,
+    restrictions,
+    data_summary,
+    acquisition_start_time,
+):
+    """The pre-optimisation build + revalidate path, kept for comparison."""
+    creation_time = datetime.fromisoformat(acquisition_start_time.replace("Z", "+00:00"))
+    parsed_modalities = []
+    for modality in modalities:
+        try:
+            parsed_modalities.append(Modality.from_abbreviation(modality.lower()))
+        except (AttributeError, ValueError):
+            parsed_modalities.append(modality)
+    parsed_group = None
+    for group_option in Group:
+        if group_option.name.upper() == group.upper() or group_option.value.upper() == group.upper():
+            parsed_group = group_option
+            break
+    data_description = DataDescription(
+        creation_time=creation_time,
+        institution=Organization.AIND,
+        project_name=project_name,
+        modalities=parsed_modalities,
+        funding_source=funding_source,
+        investigators=investigators,
+        data_level=DataLevel.RAW,
+        subject_id=subject_id,
+        tags=tags,
+        group=parsed_group,
+        restrictions=restrictions,
+        data_summary=data_summary,
+    )
+    data_description.creation_time = datetime.now(tz=timezone.utc)
+    result = json.loads(data_description.model_dump_json())
+    DataDescription.model_validate(result)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark data_description construction")
+    parser.add_argument("--iterations", type=int, default=500, help="Builds per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements per path (best is reported)")
+    opts = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    with open(FUNDING_PATH) as f:
+        funding = json.load(f)
+    params = {
+        "project_name": "benchmark-project",
+        "subject_id": "804670",
+        "funding_source": [{k: v for k, v in f.items() if k != "investigators"} for f in funding],
+        "investigators": [i for f in funding for i in f.get("investigators", [])],
+        "modalities": ["ecephys", "behavior", "behavior-videos"],
+        "tags": ["benchmark"],
+        "group": "ephys",
+        "restrictions": None,
+        "data_summary": "Benchmark",
+        "acquisition_start_time": "2024-01-01T12:00:00Z",
+    }
+
+    results = {}
+    for label, fn in (("legacy", legacy_build), ("current", _build_data_description)):
+        timings = timeit.repeat(lambda: fn(**params), number=opts.iterations, repeat=opts.repeat)
+        results[label] = min(timings) / opts.iterations
+        print(f"{label:>8}: {results[label] * 1e6:8.1f} us per request")
+
+    print("=" * 80)
+    print(f"Saved {(results['legacy'] - results['current']) * 1e6:.1f} us per request "
+          f"({results['legacy'] / results['current']:.2f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark the /gather validation stage with real-sized procedures payloads.
+
+Builds a procedures document by repeating the surgeries of the
+``tests/resources/metadata_service/procedures_response.json`` fixture until
+it has ``--surgeries`` entries (production records for heavily injected
+mice carry dozens to hundreds), then compares:
+
+1. Inline: the old behaviour, validating on the event loop.
+2. Pool: ``_validate_gathered`` on the validation pool (thread or process,
+   see ``GATHER_VALIDATION_POOL``).
+
+For each mode it reports total wall-clock time for ``--requests`` concurrent
+validations and the worst event-loop stall seen by a 10 ms heartbeat task —
+the latency every other request on the worker would have suffered.
+
+Usage:
+    python benchmark_gather_validation.py --surgeries 200 --requests 8
+    GATHER_VALIDATION_POOL=process python benchmark_gather_validation.py
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import time
+import warnings
+
+from aind_metadata_viz import endpoints, executors
+
+RESOURCES = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "tests", "resources", "metadata_service"
+)
+
+
+def _load(filename):
+    with open(os.path.join(RESOURCES, filename)) as f:
+        return json.load(f)
+
+
+def build_procedures(surgeries):
+    procedures = _load("procedures_response.json")
+    template = procedures["subject_procedures"][0]
+    procedures["subject_procedures"] = [copy.deepcopy(template) for _ in range(surgeries)]
+    return procedures
+
+
+def build_data_description_params(funding):
+    funding_source, investigators = [], []
+    for f in funding:
+        investigators.extend(f.get("investigators", []))
+        funding_source.append({k: v for k, v in f.items() if k != "investigators"})
+    return {
+        "project_name": "benchmark-project",
+        "subject_id": "804670",
+        "funding_source": funding_source,
+        "investigators": investigators,
+        "modalities": ["ecephys"],
+        "tags": None,
+        "group": None,
+        "restrictions": None,
+        "data_summary": None,
+        "acquisition_start_time": None,
+    }
+
+
+async def _heartbeat(stop, interval_s=0.01):
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval_s)
+        worst = max(worst, time.perf_counter() - started - interval_s)
+    return worst
+
+
+async def run(mode, requests, args):
+    async def inline():
+        return endpoints._validate_gathered(*args)
+
+    async def pooled():
+        return await asyncio.get_running_loop().run_in_executor(
+            executors.validation_executor(), endpoints._validate_gathered, *args
+        )
+
+    validate = inline if mode == "inline" else pooled
+    stop = asyncio.Event()
+    heartbeat = asyncio.ensure_future(_heartbeat(stop))
+    await asyncio.sleep(0.02)
+    started = time.perf_counter()
+    await asyncio.gather(*(validate() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    return elapsed, await heartbeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /gather validation")
+    parser.add_argument("--surgeries", type=int, default=200, help="Surgeries in the procedures payload")
+    parser.add_argument("--requests", type=int, default=8, help="Concurrent validations per mode")
+    opts = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    procedures = build_procedures(opts.surgeries)
+    args = (
+        "804670",
+        _load("subject_response.json"),
+        procedures,
+        build_data_description_params(_load("funding_response.json")),
+    )
+    print(f"Procedures payload: {opts.surgeries} surgeries, {len(json.dumps(procedures)) / 1024:.0f} KiB")
+    print(
+        f"Pool: {executors.GATHER_VALIDATION_POOL} "
+        f"({os.environ.get('GATHER_VALIDATION_WORKERS') or executors.available_cpus()} workers)"
+    )
+    print("=" * 80)
+
+    # Warm up imports, validators and the pool so the first mode isn't penalised.
+    asyncio.run(run("pool", 1, args))
+
+    for mode in ("inline", "pool"):
+        elapsed, worst_stall = asyncio.run(run(mode, opts.requests, args))
+        print(
+            f"{mode:>7}: {opts.requests} validations in {elapsed * 1000:8.1f} ms, "
+            f"worst event-loop stall {worst_stall * 1000:8.1f} ms"
+        )
+
+    executors.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark how long a uvicorn worker takes to import the app, against a budget.
+
+Imports ``aind_metadata_viz.main`` in a fresh interpreter under
+``python -X importtime`` ``--runs`` times and reports:
+
+1. The total import time (best of the runs, as for ``timeit``).
+2. The top-level packages that cost the most, from the best run.
+3. Any of ``lazy.HEAVY_MODULES`` (aind-data-schema core models, the
+   upgrader, biodata-query, the aind-data-mcp tool registry) that the import
+   pulled in. Those must load on first use or in the background warm-up,
+   never with ``main``.
+
+Exits with status 1 if the total is over ``--budget-ms`` or a heavy module
+was imported, so it can run as a CI check.
+
+Usage:
+    python benchmark_import_time.py
+    python benchmark_import_time.py --runs 5 --budget-ms 2000 --top 15
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from aind_metadata_viz.lazy import HEAVY_MODULES
+
+TARGET = "aind_metadata_viz.main"
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def import_times(module):
+    """Run ``-X importtime`` on ``module``; return ``[(name, self_us, cumulative_us)]``."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return rows
+
+
+def by_package(rows):
+    """Sum self time per top-level package, in microseconds."""
+    totals = defaultdict(int)
+    for name, self_us, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark importing the app")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to time; the best run counts")
+    parser.add_argument("--budget-ms", type=float, default=2500, help="Fail if the best run is slower")
+    parser.add_argument("--top", type=int, default=10, help="Packages to list")
+    opts = parser.parse_args()
+
+    runs = [import_times(TARGET) for _ in range(opts.runs)]
+    best = min(runs, key=lambda rows: sum(self_us for _, self_us, _ in rows))
+    total_ms = sum(self_us for _, self_us, _ in best) / 1000
+    imported = {name for name, _, _ in best}
+    heavy = [name for name in HEAVY_MODULES if name in imported]
+
+    print(f"import {TARGET}: best of {opts.runs} runs")
+    print("=" * 80)
+    print(f"{'package':<40} {'self ms':>10} {'share':>8}")
+    for package, self_us in by_package(best)[: opts.top]:
+        print(f"{package:<40} {self_us / 1000:>10.1f} {self_us / 1000 / total_ms:>8.1%}")
+    print("=" * 80)
+    print(f"total: {total_ms:.1f} ms (budget {opts.budget_ms:.0f} ms), {len(imported)} modules")
+
+    failed = False
+    if total_ms > opts.budget_ms:
+        print(f"FAIL: import took {total_ms - opts.budget_ms:.1f} ms over budget")
+        failed = True
+    for name in heavy:
+        print(f"FAIL: {name} is imported with {TARGET}; import it on first use instead (see lazy.py)")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
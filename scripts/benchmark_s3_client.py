@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared S3 client against building a client per call.
+
+Starts the local S3 stand-in from ``tests/s3_stub.py``, stores a small JSON
+object, and reads it back ``--calls`` times in each mode:
+
+1. Per call: the old ``_s3()``, a new ``boto3.client("s3")`` for every
+   ``GetObject``. Each one resolves credentials, loads the service model
+   and opens its own connection pool.
+2. Shared: ``aind_metadata_viz.s3.client()``, one client and one keep-alive
+   pool for the whole process.
+
+Each mode runs on ``--threads`` threads, as the ``s3`` worker pool does.
+The mean per-call time and the difference between the modes show the
+overhead the shared client removes. The stand-in answers instantly unless
+``--delay-ms`` is set, so what remains is client-side cost.
+
+Usage:
+    python benchmark_s3_client.py --calls 200 --threads 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from aind_metadata_viz import s3  # noqa: E402
+from aind_metadata_viz.metrics import instrument_boto3_client  # noqa: E402
+from tests.s3_stub import S3Stub  # noqa: E402
+
+BUCKET = "aind-scratch-data"
+KEY = "contributions-app/benchmark/2024-01-01T00:00:00+00:00_0.json"
+
+
+def per_call_client():
+    return instrument_boto3_client(boto3.client("s3", endpoint_url=s3.S3_ENDPOINT_URL), "s3")
+
+
+def run(make_client, calls, threads):
+    def get(_):
+        started = time.perf_counter()
+        make_client().get_object(Bucket=BUCKET, Key=KEY)["Body"].read()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        latencies = list(pool.map(get, range(calls)))
+    return time.perf_counter() - started, sum(latencies) / len(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared S3 client")
+    parser.add_argument("--calls", type=int, default=200, help="GetObject calls per mode")
+    parser.add_argument("--threads", type=int, default=8, help="Threads issuing calls")
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="Stand-in latency per request")
+    opts = parser.parse_args()
+
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        os.environ.setdefault(name, "benchmark")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-west-2")
+
+    stub = S3Stub(delay_s=opts.delay_ms / 1000).start()
+    stub.objects[(BUCKET, KEY)] = b'{"project_id": "benchmark", "data": {}}'
+    s3.S3_ENDPOINT_URL = stub.url
+    s3.reset()
+
+    print(f"S3 stand-in at {stub.url}: {opts.calls} GetObject calls on {opts.threads} threads per mode")
+    print("=" * 80)
+
+    # Warm imports and botocore's model caches so neither mode pays for them.
+    run(per_call_client, opts.threads, opts.threads)
+    s3.client()
+
+    results = {}
+    for mode, make_client in (("per call", per_call_client), ("shared", s3.client)):
+        elapsed, mean_latency = run(make_client, opts.calls, opts.threads)
+        results[mode] = mean_latency
+        print(
+            f"{mode:>9}: {elapsed * 1000:8.1f} ms total, {mean_latency * 1000:6.2f} ms per call, "
+            f"{opts.calls / elapsed:8.1f} calls/s"
+        )
+
+    print("=" * 80)
+    print(f"overhead removed: {(results['per call'] - results['shared']) * 1000:.2f} ms per call")
+    stats = s3.stats("GetObject")
+    print(f"shared client GetObject: {stats['calls']} calls, {stats['bytes_received']} bytes received")
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ from typing import List
 from fastapi import APIRouter, Query
 from fastapi.responses import JSONResponse
 
+from ..executors import run_in
 from .models import (
     AcquisitionTypeEntry,
     ScheduledAcquisition,
@@ -41,7 +42,7 @@ acquisitions_router = APIRouter(tags=["acquisitions"])
 )
 async def acquisition_types_post(body: AcquisitionTypeEntry):
     try:
-        entry = add_acquisition_type(body.platform, body.acquisition_type)
+        entry = await run_in("s3", add_acquisition_type, body.platform, body.acquisition_type)
     except ValueError as e:
         return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
@@ -61,7 +62,7 @@ async def acquisition_types_post(body: AcquisitionTypeEntry):
 )
 async def acquisition_types_get():
     try:
-        entries = get_allowed_types()
+        entries = await run_in("s3", get_allowed_types)
     except Exception as e:
         _logger.exception("GET /acquisition-types")
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -80,7 +81,9 @@ async def acquisition_types_get():
 )
 async def scheduled_acquisitions_post(body: ScheduledAcquisitionCreate):
     try:
-        acquisition_uuid = add_scheduled_acquisition(body.subject_id, body.date, body.acquisition_type)
+        acquisition_uuid = await run_in(
+            "s3", add_scheduled_acquisition, body.subject_id, body.date, body.acquisition_type
+        )
     except ValueError as e:
         return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
@@ -101,7 +104,7 @@ async def scheduled_acquisitions_get(
     include_past: bool = Query(default=False, description="Include acquisitions scheduled before today"),
 ):
     try:
-        records = get_scheduled_acquisitions(include_past=include_past)
+        records = await run_in("s3", get_scheduled_acquisitions, include_past=include_past)
     except Exception as e:
         _logger.exception("GET /scheduled-acquisitions include_past=%s", include_past)
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -117,7 +120,7 @@ async def scheduled_acquisitions_get(
 )
 async def scheduled_acquisition_get(acquisition_uuid: str):
     try:
-        record = get_scheduled_acquisition(acquisition_uuid)
+        record = await run_in("s3", get_scheduled_acquisition, acquisition_uuid)
     except Exception as e:
         _logger.exception("GET /scheduled-acquisitions/%s", acquisition_uuid)
         return JSONResponse(status_code=500, content={"error": str(e)})
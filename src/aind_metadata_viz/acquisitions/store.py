@@ -1,7 +1,8 @@
-"""S3-backed storage for allowed acquisition types and scheduled acquisitions.
+"""Object storage for allowed acquisition types and scheduled acquisitions.
 
-Data is stored as JSON objects in S3 (bucket: ``aind-scratch-data``, prefix:
-``aind-metadata-viz-data/``).
+Data is stored as JSON objects in the configured ``storage.backend()`` (S3 in
+production: bucket ``aind-scratch-data``), under the
+``aind-metadata-viz-data/`` prefix.
 
 Object layout::
 
@@ -15,46 +16,47 @@ Object layout::
 * ``get_scheduled_acquisitions`` returns all scheduled acquisitions, optionally
   filtered to future-or-today only.
 * ``get_scheduled_acquisition`` returns a single record by uuid.
+
+Both writers read, modify and rewrite a whole object. They go through
+``storage.update``, whose conditional put makes a writer that raced another
+one (in this process or on another replica) retry on the fresh object
+rather than overwrite it. Each also holds the object's ``key_lock``, so
+writers within one process queue up instead of retrying.
 """
 
 import json
 import uuid
 from datetime import date
-from typing import List, Optional
-
-import boto3
-from botocore.exceptions import ClientError
+from typing import Callable, List, Optional
 
+from .. import storage
+from ..executors import key_lock
 from .models import ALLOWED_PLATFORMS
 
-_S3_BUCKET = "aind-scratch-data"
 _S3_PREFIX = "aind-metadata-viz-data"
 
 _ALLOWED_TYPES_KEY = f"{_S3_PREFIX}/allowed_acquisition_types.json"
 _SCHEDULED_ACQUISITIONS_KEY = f"{_S3_PREFIX}/scheduled_acquisitions.json"
 
 
-def _s3():
-    return boto3.client("s3")
+def _get_json(key: str):
+    stored = storage.backend().get(key)
+    return None if stored is None else json.loads(stored.body.decode())
 
 
-def _put_json(key: str, obj) -> None:
-    _s3().put_object(
-        Bucket=_S3_BUCKET,
-        Key=key,
-        Body=json.dumps(obj).encode(),
-        ContentType="application/json",
-    )
+def _update_json(key: str, change: Callable) -> None:
+    """Apply ``change`` to the decoded object at ``key`` (None if absent) and store what it returns.
 
+    ``change`` returns None to leave the object untouched, and may run more
+    than once if another writer gets in first.
+    """
 
-def _get_json(key: str):
-    try:
-        response = _s3().get_object(Bucket=_S3_BUCKET, Key=key)
-        return json.loads(response["Body"].read().decode())
-    except ClientError as exc:
-        if exc.response["Error"]["Code"] in ("NoSuchKey", "404"):
-            return None
-        raise
+    def _change(body: Optional[bytes]) -> Optional[bytes]:
+        updated = change(None if body is None else json.loads(body.decode()))
+        return None if updated is None else json.dumps(updated).encode()
+
+    with key_lock(key):
+        storage.update(key, _change)
 
 
 def get_allowed_types() -> List[dict]:
@@ -72,11 +74,15 @@ def add_acquisition_type(platform: str, acquisition_type: str) -> dict:
     if ALLOWED_PLATFORMS and platform not in ALLOWED_PLATFORMS:
         raise ValueError(f"platform '{platform}' is not one of the allowed platforms: {ALLOWED_PLATFORMS}")
 
-    entries = get_allowed_types()
     entry = {"platform": platform, "acquisition_type": acquisition_type}
-    if entry not in entries:
-        entries.append(entry)
-        _put_json(_ALLOWED_TYPES_KEY, entries)
+
+    def _add(entries):
+        entries = entries or []
+        if entry in entries:
+            return None
+        return entries + [entry]
+
+    _update_json(_ALLOWED_TYPES_KEY, _add)
     return entry
 
 
@@ -99,14 +105,13 @@ def add_scheduled_acquisition(subject_id: str, acquisition_date: date, acquisiti
         raise ValueError(f"acquisition_type '{acquisition_type}' is not an allowed acquisition type")
 
     acquisition_uuid = str(uuid.uuid4())
-    records = _get_json(_SCHEDULED_ACQUISITIONS_KEY) or {}
-    records[acquisition_uuid] = {
+    record = {
         "subject_id": subject_id,
         "date": acquisition_date.isoformat() if isinstance(acquisition_date, date) else acquisition_date,
         "acquisition_type": acquisition_type,
         "platform": platform,
     }
-    _put_json(_SCHEDULED_ACQUISITIONS_KEY, records)
+    _update_json(_SCHEDULED_ACQUISITIONS_KEY, lambda records: {**(records or {}), acquisition_uuid: record})
     return acquisition_uuid
 
 
@@ -0,0 +1,115 @@
+"""Async reads from the object store, for request handlers.
+
+Reads that fan out over many objects go through this module: every
+project's latest version (``list_all_projects``,
+``get_contributions_by_doi``) and every Pinpoint blob of an account
+(``list_blobs``). ``session()`` yields an ``AsyncObjectStore`` with
+``get``, ``head`` and ``list`` coroutines, and ``gather_bounded`` runs them
+concurrently. At most ``STORAGE_READ_CONCURRENCY`` of them are in flight
+per call.
+
+The implementation depends on the ``storage.backend()`` in use:
+
+* ``S3Store``: the blocking store on the ``s3`` pool, so reads share the
+  boto3 client and its ``S3_MAX_POOL_CONNECTIONS`` connections with every
+  other S3 call.
+* ``MemoryStore``: answered inline, since nothing blocks.
+* Anything else (``LocalStore``): the blocking store on the ``disk`` pool.
+
+Writes stay on the blocking store. They are single-object, and the
+read-modify-write ones hold ``executors.key_lock``, a thread lock.
+
+Environment variables
+---------------------
+STORAGE_READ_CONCURRENCY
+    Reads in flight per ``gather_bounded`` call (default 16).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Optional, TypeVar
+
+from aind_metadata_viz import storage
+from aind_metadata_viz.executors import run_in
+from aind_metadata_viz.storage import Listing, ObjectInfo, StoredObject
+
+STORAGE_READ_CONCURRENCY = int(os.environ.get("STORAGE_READ_CONCURRENCY", "16"))
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class AsyncObjectStore(ABC):
+    """The read side of ``storage.ObjectStore``, as coroutines."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[StoredObject]:
+        """Return the object at ``key``, or ``None`` if it does not exist."""
+
+    @abstractmethod
+    async def head(self, key: str) -> Optional[ObjectInfo]:
+        """Return the size and ETag of ``key``, or ``None`` if it does not exist."""
+
+    @abstractmethod
+    async def list(self, prefix: str, delimiter: Optional[str] = None) -> Listing:
+        """Return the keys (and, with ``delimiter``, common prefixes) under ``prefix``."""
+
+
+class _InlineStore(AsyncObjectStore):
+    """A store whose calls never block, called directly on the event loop."""
+
+    def __init__(self, store: storage.ObjectStore):
+        self.store = store
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def head(self, key):
+        return self.store.head(key)
+
+    async def list(self, prefix, delimiter=None):
+        return self.store.list(prefix, delimiter)
+
+
+class _PooledStore(_InlineStore):
+    """A blocking store, called on a named worker pool."""
+
+    def __init__(self, store: storage.ObjectStore, pool: str):
+        super().__init__(store)
+        self.pool = pool
+
+    async def get(self, key):
+        return await run_in(self.pool, self.store.get, key)
+
+    async def head(self, key):
+        return await run_in(self.pool, self.store.head, key)
+
+    async def list(self, prefix, delimiter=None):
+        return await run_in(self.pool, self.store.list, prefix, delimiter)
+
+
+@asynccontextmanager
+async def session() -> AsyncIterator[AsyncObjectStore]:
+    """Yield an ``AsyncObjectStore`` reading from ``storage.backend()``."""
+    store = storage.backend()
+    if isinstance(store, storage.S3Store):
+        yield _PooledStore(store, "s3")
+    elif isinstance(store, storage.MemoryStore):
+        yield _InlineStore(store)
+    else:
+        yield _PooledStore(store, "disk")
+
+
+async def gather_bounded(fn: Callable[[T], Awaitable[R]], items: Iterable[T]) -> List[R]:
+    """Return ``[await fn(item) for item in items]``, running up to ``STORAGE_READ_CONCURRENCY`` at once."""
+    semaphore = asyncio.Semaphore(STORAGE_READ_CONCURRENCY)
+
+    async def one(item: T) -> R:
+        async with semaphore:
+            return await fn(item)
+
+    return list(await asyncio.gather(*(one(item) for item in items)))
@@ -0,0 +1,180 @@
+"""Bounded in-process async cache with TTL and stale-while-revalidate.
+
+Used in front of the aind-metadata-service lookups behind /gather and the
+/retrieve-records results. Each ``AsyncTTLCache`` holds at most ``maxsize``
+entries, and optionally at most ``max_bytes`` as measured by ``sizeof``
+(least recently used evicted first), and serves them in three phases:
+
+* fresh (age < ``ttl_s``) — returned directly.
+* stale (age < ``ttl_s + stale_s``) — returned directly while one
+  background task reloads the entry.
+* expired / missing — loaded inline. Concurrent misses for the same key
+  share a single upstream call.
+
+Counters are kept per cache and exposed through ``stats()``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTTLCache:
+    """LRU-bounded TTL cache whose values are produced by async loaders.
+
+    ``should_cache`` decides whether a loaded value is stored (e.g. skip
+    "not found" results). A ``ttl_s`` of 0 disables caching entirely while
+    keeping the miss counter and single-flight behaviour. When ``max_bytes``
+    is set, ``sizeof`` (default ``len``) gives each value's size; values
+    larger than ``max_bytes`` are never stored.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_s: float,
+        stale_s: float,
+        maxsize: int,
+        should_cache: Callable[[Any], bool] = lambda value: value is not None,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = len,
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.name = name
+        self.ttl_s = ttl_s
+        self.stale_s = stale_s
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._should_cache = should_cache
+        self._sizeof = sizeof
+        self._entries: OrderedDict[Hashable, tuple[Any, float, int]] = OrderedDict()
+        self._bytes = 0
+        self._inflight: dict[Hashable, tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the value for ``key``, calling ``loader`` when needed."""
+        value, _ = await self.get_with_status(key, loader)
+        return value
+
+    async def get_with_status(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> tuple[Any, str]:
+        """Like ``get`` but also return how the value was served.
+
+        The status is ``"hit"``, ``"stale"``, ``"miss"`` (this call ran the
+        loader) or ``"coalesced"`` (joined another caller's load).
+        """
+        entry = self._entries.get(key)
+        if entry is not None and self.ttl_s > 0:
+            value, stored_at, _ = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl_s:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value, "hit"
+            if age < self.ttl_s + self.stale_s:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                if self._running_load(key) is None:
+                    self.refreshes += 1
+                    self._start_load(key, loader).add_done_callback(self._log_refresh_error)
+                return value, "stale"
+
+        self.misses += 1
+        task = self._running_load(key)
+        if task is not None:
+            self.coalesced += 1
+            status = "coalesced"
+        else:
+            task = self._start_load(key, loader)
+            status = "miss"
+        # Shield so one cancelled caller doesn't cancel the load for the rest.
+        return await asyncio.shield(task), status
+
+    def _running_load(self, key: Hashable) -> Optional[asyncio.Future]:
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            return None
+        loop, task = inflight
+        if loop is not asyncio.get_running_loop() or task.done():
+            return None
+        return task
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        task = asyncio.ensure_future(self._fill(key, loader))
+        self._inflight[key] = (asyncio.get_running_loop(), task)
+
+        def _done(_):
+            if self._inflight.get(key, (None, None))[1] is task:
+                del self._inflight[key]
+
+        task.add_done_callback(_done)
+        return task
+
+    async def _fill(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+        except Exception:
+            self.errors += 1
+            raise
+        if self.ttl_s > 0 and self._should_cache(value):
+            self._store(key, value)
+        return value
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value) if self.max_bytes is not None else 0
+        self._discard(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self._entries[key] = (value, time.monotonic(), size)
+        self._bytes += size
+        while len(self._entries) > self.maxsize or (self.max_bytes is not None and self._bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _log_refresh_error(self, task: asyncio.Future) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background refresh failed in cache %s: %s", self.name, task.exception())
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters. Used in tests."""
+        self._entries.clear()
+        self._inflight.clear()
+        self._bytes = 0
+        self.hits = self.stale_hits = self.misses = 0
+        self.coalesced = self.refreshes = self.errors = 0
+
+    def stats(self) -> dict:
+        """Return the current size and hit/miss counters."""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl_s,
+            "stale_s": self.stale_s,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
@@ -10,9 +10,12 @@ from typing import Any
 
 import boto3
 
+from aind_metadata_viz import lazy, timing
+from aind_metadata_viz.executors import run_in
+from aind_metadata_viz.metrics import instrument_boto3_client
+
 from .prompt import SYSTEM_PROMPT
 from .security import extract_json_field
-from .tools import invoke_tool, list_allowed_tools, to_bedrock_tool_spec
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +31,14 @@ MAX_TOOL_RESULT_BYTES = int(
 PER_TOOL_TIMEOUT_S = float(os.environ.get("CHAT_TOOL_TIMEOUT_S", "60"))
 
 
+async def invoke_tool(
+    name: str, arguments: dict[str, Any] | None, *, max_bytes: int
+) -> tuple[str, bool]:
+    """``tools.invoke_tool``; the tool registry is imported on first use."""
+    tools = await lazy.load("aind_metadata_viz.chat.tools")
+    return await tools.invoke_tool(name, arguments, max_bytes=max_bytes)
+
+
 @dataclass
 class ToolCallRecord:
     """Audit record for a single tool invocation."""
@@ -58,14 +69,16 @@ def _bedrock_client():
             RoleArn=role_arn, RoleSessionName="chat-agent"
         )
         creds = assumed["Credentials"]
-        return boto3.client(
+        client = boto3.client(
             "bedrock-runtime",
             region_name=region,
             aws_access_key_id=creds["AccessKeyId"],
             aws_secret_access_key=creds["SecretAccessKey"],
             aws_session_token=creds["SessionToken"],
         )
-    return boto3.client("bedrock-runtime", region_name=region)
+    else:
+        client = boto3.client("bedrock-runtime", region_name=region)
+    return instrument_boto3_client(client, "bedrock")
 
 
 def _history_to_messages(history: list[dict] | None) -> list[dict]:
@@ -121,8 +134,10 @@ async def run_agent(
     bedrock_client_factory:
         Injected for tests so they can supply a mock Bedrock client.
     """
-    tools = await list_allowed_tools()
-    tool_specs = [to_bedrock_tool_spec(t) for t in tools]
+    # aind-data-mcp is slow to import, so the registry loads on first use.
+    registry = await lazy.load("aind_metadata_viz.chat.tools")
+    tools = await registry.list_allowed_tools()
+    tool_specs = [registry.to_bedrock_tool_spec(t) for t in tools]
     tool_names = {t.name for t in tools}
 
     messages = _history_to_messages(history)
@@ -136,16 +151,16 @@ async def run_agent(
     total_tool_calls = 0
 
     for iteration in range(1, MAX_ITERATIONS + 1):
-        response = await asyncio.get_event_loop().run_in_executor(
-            None,
-            lambda: _converse_sync(
+        with timing.phase("bedrock"):
+            response = await run_in(
+                "bedrock",
+                _converse_sync,
                 bedrock,
                 modelId=chosen_model,
                 system=[{"text": SYSTEM_PROMPT}],
                 messages=messages,
                 toolConfig={"tools": tool_specs},
-            ),
-        )
+            )
 
         output_msg = response["output"]["message"]
         # Append assistant turn (with tool_use blocks if any) so the next
@@ -224,12 +239,13 @@ async def run_agent(
                 continue
 
             try:
-                text, is_error = await asyncio.wait_for(
-                    invoke_tool(
-                        name, args, max_bytes=MAX_TOOL_RESULT_BYTES
-                    ),
-                    timeout=PER_TOOL_TIMEOUT_S,
-                )
+                with timing.phase(f"tool:{name}"):
+                    text, is_error = await asyncio.wait_for(
+                        invoke_tool(
+                            name, args, max_bytes=MAX_TOOL_RESULT_BYTES
+                        ),
+                        timeout=PER_TOOL_TIMEOUT_S,
+                    )
             except asyncio.TimeoutError:
                 text = (
                     f"Tool '{name}' timed out after "
@@ -290,15 +306,15 @@ async def run_agent(
             ],
         }
     ]
-    final_response = await asyncio.get_event_loop().run_in_executor(
-        None,
-        lambda: _converse_sync(
+    with timing.phase("bedrock"):
+        final_response = await run_in(
+            "bedrock",
+            _converse_sync,
             bedrock,
             modelId=chosen_model,
             system=[{"text": SYSTEM_PROMPT}],
             messages=final_messages,
-        ),
-    )
+        )
     text_parts = [
         b["text"]
         for b in final_response["output"]["message"].get("content", [])
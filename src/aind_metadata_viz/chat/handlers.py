@@ -9,6 +9,8 @@ from typing import Optional
 from fastapi import APIRouter, Query, Request
 from fastapi.responses import JSONResponse
 
+from aind_metadata_viz.executors import run_in
+
 from .agent import result_to_dict, run_agent
 from .log import append_chat_log
 from .ratelimit import RateLimiter, client_ip
@@ -132,7 +134,9 @@ async def chat_endpoint(
         result.iterations,
         len(result.tool_calls),
     )
-    append_chat_log(
+    await run_in(
+        "s3",
+        append_chat_log,
         message=payload["message"],
         response=result_to_dict(result).get("response", ""),
         stop_reason=result.stop_reason,
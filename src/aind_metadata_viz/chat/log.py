@@ -1,6 +1,7 @@
-"""S3-backed chat & summary request/response logger.
+"""Chat & summary request/response logger.
 
-Appends one JSON Lines record per request to a daily log file in S3:
+Appends one JSON Lines record per request to a daily log object in the
+configured ``storage.backend()`` (S3 in production):
     s3://aind-scratch-data/aind-metadata-viz-logs/chat_log_{YYYY-MM-DD}.json
     s3://aind-scratch-data/aind-metadata-viz-logs/summary_log_{YYYY-MM-DD}.json
 
@@ -27,19 +28,14 @@ import logging
 from datetime import datetime, timezone
 from typing import Optional
 
-import boto3
-from botocore.exceptions import ClientError
+from .. import storage, timing
+from ..executors import key_lock
 
 logger = logging.getLogger(__name__)
 
-_S3_BUCKET = "aind-scratch-data"
 _S3_PREFIX = "aind-metadata-viz-logs"
 
 
-def _s3():
-    return boto3.client("s3")
-
-
 def _log_key(date_str: str) -> str:
     return f"{_S3_PREFIX}/chat_log_{date_str}.json"
 
@@ -52,33 +48,26 @@ def _today_utc() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
 
-def _get_existing(key: str) -> bytes:
-    try:
-        resp = _s3().get_object(Bucket=_S3_BUCKET, Key=key)
-        body = resp["Body"].read()
-        if not body.endswith(b"\n"):
-            body += b"\n"
-        return body
-    except ClientError as exc:
-        if exc.response["Error"]["Code"] in ("NoSuchKey", "404"):
-            return b""
-        raise
-
-
 def _append_record(key: str, record: dict) -> None:
-    """Append a single JSON record as a line to an S3 NDJSON file."""
+    """Append a single JSON record as a line to an NDJSON log object.
+
+    Object stores have no append, so the object is read and rewritten with
+    ``storage.update``; its conditional put keeps appends from other
+    replicas from dropping each other's lines, and ``key_lock`` queues up
+    the appends from this process.
+    """
     line = (json.dumps(record) + "\n").encode()
+
+    def _append(existing: Optional[bytes]) -> bytes:
+        if existing and not existing.endswith(b"\n"):
+            existing += b"\n"
+        return (existing or b"") + line
+
     try:
-        existing = _get_existing(key)
-        updated = existing + line
-        _s3().put_object(
-            Bucket=_S3_BUCKET,
-            Key=key,
-            Body=updated,
-            ContentType="application/x-ndjson",
-        )
+        with timing.phase("s3_log"), key_lock(key):
+            storage.update(key, _append, content_type="application/x-ndjson")
     except Exception:
-        logger.exception("Failed to write log to S3 key=%s", key)
+        logger.exception("Failed to write log key=%s", key)
 
 
 def append_chat_log(
@@ -91,7 +80,7 @@ def append_chat_log(
     ip: Optional[str],
     requester_id: Optional[str],
 ) -> None:
-    """Append a single chat record to today's S3 log file."""
+    """Append a single chat record to today's log file."""
     record = {
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "requester_id": requester_id,
@@ -122,7 +111,7 @@ def append_summary_log(
     ip: Optional[str],
     requester_id: Optional[str],
 ) -> None:
-    """Append a single summary record to today's S3 log file."""
+    """Append a single summary record to today's log file."""
     record = {
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "requester_id": requester_id,
@@ -1,7 +1,14 @@
-"""Mount the aind-data-mcp FastMCP server as an HTTP endpoint."""
+"""Mount the aind-data-mcp FastMCP server as an HTTP endpoint.
+
+aind-data-mcp takes seconds to import, so the FastMCP app is not built
+when this module loads. ``mount_mcp_server`` mounts a placeholder that
+starts building it in the background when the app starts. Requests to the
+mount wait for it to be ready, or get a 503 after ``MCP_STARTUP_TIMEOUT_S``.
+"""
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
@@ -12,17 +19,14 @@ from starlette.datastructures import Headers
 from starlette.responses import JSONResponse
 from starlette.types import ASGIApp, Receive, Scope, Send
 
-# Import side-effect: registers tools on the shared mcp instance and
-# disables the NWB tools that we don't want exposed.
-from . import tools as _tools  # noqa: F401
-from aind_data_mcp.mcp_instance import mcp
-
+from .. import lazy
 from .ratelimit import RateLimiter, client_ip
 from .security import ALLOWED_ORIGIN_REGEX, origin_error
 
 logger = logging.getLogger(__name__)
 
 MCP_MOUNT_PATH = os.environ.get("MCP_MOUNT_PATH", "/mcp")
+MCP_STARTUP_TIMEOUT_S = float(os.environ.get("MCP_STARTUP_TIMEOUT_S", "60"))
 
 # 1 request/second sustained. The burst must be large enough to absorb a
 # client's startup sequence in one go: VS Code (and other MCP clients)
@@ -87,9 +91,7 @@ class _MCPSecurityMiddleware:
         await self.app(scope, receive, send)
 
 
-def mount_mcp_server(app: FastAPI) -> None:
-    """Mount the FastMCP HTTP app onto ``app`` and wire up lifespan."""
-
+def _build_mcp_app(mcp) -> ASGIApp:
     mcp_app = mcp.http_app(path="/")
     mcp_app.add_middleware(_MCPSecurityMiddleware)
     mcp_app.add_middleware(
@@ -98,20 +100,94 @@ def mount_mcp_server(app: FastAPI) -> None:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    return mcp_app
+
+
+class _DeferredMCPApp:
+    """Stand-in for the FastMCP app until it has been built and started.
+
+    FastMCP requires its session manager to start via the ASGI lifespan
+    event. ``start`` builds the app in a task that keeps its lifespan open
+    until ``stop`` is called.
+    """
+
+    def __init__(self) -> None:
+        self.app: ASGIApp | None = None
+        self._ready: asyncio.Event | None = None
+        self._stopping: asyncio.Event | None = None
+
+    def start(self) -> asyncio.Task:
+        self.app = None
+        self._ready = asyncio.Event()
+        self._stopping = asyncio.Event()
+        return asyncio.create_task(self._serve())
+
+    def stop(self) -> None:
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def _serve(self) -> None:
+        try:
+            # Importing the tools module registers every tool on the shared
+            # mcp instance and disables the NWB tools we don't expose.
+            tools = await lazy.load("aind_metadata_viz.chat.tools")
+            mcp_app = _build_mcp_app(tools.mcp)
+            # mcp_app.lifespan is already an @asynccontextmanager-decorated
+            # factory — call it with the sub-app to get the context manager.
+            async with mcp_app.lifespan(mcp_app):
+                self.app = mcp_app
+                self._ready.set()
+                logger.info("FastMCP server ready at %s", MCP_MOUNT_PATH)
+                await self._stopping.wait()
+        except Exception:
+            logger.exception("FastMCP server failed to start")
+        finally:
+            self.app = None
+            self._ready.set()
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if self.app is None and self._ready is not None:
+            try:
+                await asyncio.wait_for(
+                    self._ready.wait(), timeout=MCP_STARTUP_TIMEOUT_S
+                )
+            except asyncio.TimeoutError:
+                pass
+        app = self.app
+        if app is None:
+            response = JSONResponse(
+                status_code=503,
+                content={"error": "The MCP server is not running yet."},
+                headers={"Retry-After": "5"},
+            )
+            await response(scope, receive, send)
+            return
+        await app(scope, receive, send)
+
+
+def mount_mcp_server(app: FastAPI) -> None:
+    """Mount the FastMCP HTTP app onto ``app`` and wire up lifespan."""
+
+    deferred = _DeferredMCPApp()
 
-    # FastMCP requires its session manager to start via the ASGI lifespan
-    # event. When mounted under FastAPI, we must propagate the inner
-    # lifespan or tool calls will fail with "session manager not started".
+    # When mounted under FastAPI, we must propagate the inner lifespan or
+    # tool calls will fail with "session manager not started".
     existing_lifespan = app.router.lifespan_context
 
     @asynccontextmanager
     async def combined_lifespan(scope_app: FastAPI):
-        # mcp_app.lifespan is already an @asynccontextmanager-decorated
-        # factory — call it with the sub-app to get the context manager.
-        async with mcp_app.lifespan(mcp_app):
+        # Built in the background so startup (and /health) doesn't wait
+        # for the aind-data-mcp import.
+        serving = deferred.start()
+        try:
             async with existing_lifespan(scope_app):
                 yield
+        finally:
+            deferred.stop()
+            await serving
 
     app.router.lifespan_context = combined_lifespan
-    app.mount(MCP_MOUNT_PATH, mcp_app)
+    app.mount(MCP_MOUNT_PATH, deferred)
     logger.info("Mounted FastMCP server at %s", MCP_MOUNT_PATH)
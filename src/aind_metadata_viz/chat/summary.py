@@ -16,7 +16,6 @@ responsible for two things:
 
 from __future__ import annotations
 
-import asyncio
 import json
 import logging
 import os
@@ -24,6 +23,9 @@ import re
 from dataclasses import dataclass
 from typing import Any
 
+from aind_metadata_viz import timing
+from aind_metadata_viz.executors import run_in
+
 from .agent import DEFAULT_MODEL_ID, _bedrock_client, _converse_sync
 from .security import extract_json_field
 
@@ -198,9 +200,10 @@ async def summarize_record(
 ) -> SummaryResult:
     """Compact ``record`` and ask Bedrock for a one-paragraph summary."""
     name = record.get("name") or record.get("_id") or "<unnamed>"
-    original_bytes = _json_size(record)
-    compacted = compact_record(record, max_bytes=max_bytes)
-    compacted_bytes = _json_size(compacted)
+    with timing.phase("compact"):
+        original_bytes = _json_size(record)
+        compacted = compact_record(record, max_bytes=max_bytes)
+        compacted_bytes = _json_size(compacted)
 
     chosen_model = model_id or os.environ.get(
         "CHAT_MODEL_ID", DEFAULT_MODEL_ID
@@ -210,15 +213,15 @@ async def summarize_record(
     user_text = _build_user_prompt(name, compacted)
     messages = [{"role": "user", "content": [{"text": user_text}]}]
 
-    response = await asyncio.get_event_loop().run_in_executor(
-        None,
-        lambda: _converse_sync(
+    with timing.phase("bedrock"):
+        response = await run_in(
+            "bedrock",
+            _converse_sync,
             bedrock,
             modelId=chosen_model,
             system=[{"text": SUMMARY_SYSTEM_PROMPT}],
             messages=messages,
-        ),
-    )
+        )
 
     text_parts = [
         b["text"]
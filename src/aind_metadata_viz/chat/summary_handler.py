@@ -1,22 +1,24 @@
 """GET /summary endpoint: LLM summary of a single DocDB v2 record.
 
-Hits the v2 metadata DB via ``biodata_query.retrieve_records`` (which
-defaults to ``DOCDB_API_VERSION=v2``), shrinks the record so it fits in
-the model's context window, and asks Bedrock for a high-level summary.
+Hits the v2 metadata DB through the shared DocDB client pool, shrinks the
+record so it fits in the model's context window, and asks Bedrock for a
+high-level summary.
 """
 
 from __future__ import annotations
 
-import asyncio
 import logging
 import os
 import time
 from typing import Optional
 
-from biodata_query.query import retrieve_records
 from fastapi import APIRouter, Query, Request
 from fastapi.responses import JSONResponse
 
+from aind_metadata_viz.docdb import docdb_client
+from aind_metadata_viz.executors import named_executor, run_in
+from aind_metadata_viz.singleflight import SingleFlight
+
 from .log import append_summary_log
 from .ratelimit import RateLimiter, client_ip
 from .security import origin_error
@@ -36,19 +38,23 @@ summary_rate_limiter = RateLimiter(
 
 summary_router = APIRouter()
 
+# Browsers opening the same asset page ask for the same name at once; they
+# share one DocDB lookup.
+_fetch_v2_record_flight = SingleFlight("fetch_v2_record")
+
 
 def _fetch_v2_record(name: str) -> Optional[dict]:
     """Fetch a single record from DocDB v2 by exact name match.
 
-    ``force_backend='docdb'`` skips the cache so we always get the full
+    Goes straight to DocDB rather than the cache so we always get the full
     record (the cache only stores a subset of fields).
     """
-    result = retrieve_records(
-        {"name": name}, limit=1, force_backend="docdb"
+    records = docdb_client("v2").retrieve_docdb_records(
+        filter_query={"name": name}, limit=1
     )
-    if not result.records:
+    if not records:
         return None
-    return result.records[0]
+    return records[0]
 
 
 @summary_router.get(
@@ -87,8 +93,8 @@ async def summary_endpoint(
         )
 
     try:
-        record = await asyncio.get_event_loop().run_in_executor(
-            None, lambda: _fetch_v2_record(name)
+        record = await _fetch_v2_record_flight.run(
+            name, lambda: _fetch_v2_record(name), named_executor("docdb")
         )
     except Exception as exc:  # noqa: BLE001
         logger.exception("DocDB lookup failed for name=%s", name)
@@ -139,7 +145,9 @@ async def summary_endpoint(
         result.latency_ms,
         duration_ms,
     )
-    append_summary_log(
+    await run_in(
+        "s3",
+        append_summary_log,
         name=result.name,
         summary=result.summary,
         model_id=result.model_id,
@@ -9,7 +9,7 @@ Models:
 Serialization:
     to_json, from_json, to_yaml, from_yaml, load
 
-Storage (S3-backed):
+Storage (``aind_metadata_viz.storage``):
     store_contributions, get_contributions, get_contributions_by_doi
 """
 
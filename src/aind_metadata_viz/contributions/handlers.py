@@ -3,7 +3,6 @@
 See /docs (Swagger UI) for full request/response schemas.
 """
 
-import asyncio
 import logging
 
 from fastapi import APIRouter, Query, Request
@@ -17,7 +16,6 @@ from . import (
     from_json,
     from_yaml,
     get_contributions,
-    list_all_projects,
     list_project_commits,
     store_contributions,
     to_json,
@@ -25,9 +23,11 @@ from . import (
 )
 from .store import (
     get_author_image_key,
-    get_contributions_by_doi,
+    get_contributions_by_doi_async,
+    list_all_projects_async,
 )
 from ..auth import get_current_user
+from ..executors import run_in
 
 
 contributions_router = APIRouter(tags=["contributions"])
@@ -132,14 +132,14 @@ def _merge_scoped_contributions(existing, orcid, name, new_contributions):
     return True, None, merged
 
 
-def _resolve_project(identifier):
+async def _resolve_project(identifier):
     """Return ``(contributions, project_name)`` for a DOI or project name."""
     try:
-        contributions = get_contributions_by_doi(identifier)
+        contributions = await get_contributions_by_doi_async(identifier)
         return contributions, contributions.project_name
     except FileNotFoundError:
         pass
-    contributions = get_contributions(identifier)
+    contributions = await run_in("s3", get_contributions, identifier)
     return contributions, identifier
 
 
@@ -154,7 +154,7 @@ def _resolve_project(identifier):
 )
 async def contributions_projects():
     try:
-        names = await asyncio.to_thread(list_all_projects)
+        names = await list_all_projects_async()
     except Exception as e:
         _logger.exception("GET /contributions/projects")
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -189,7 +189,7 @@ async def contributions_get(
 
     if doi:
         try:
-            contributions, project_name = await asyncio.to_thread(_resolve_project, doi)
+            contributions, project_name = await _resolve_project(doi)
         except FileNotFoundError as e:
             return JSONResponse(status_code=404, content={"error": str(e)})
         except Exception as e:
@@ -203,7 +203,7 @@ async def contributions_get(
 
     if history == "true":
         try:
-            commits = await asyncio.to_thread(list_project_commits, project)
+            commits = await run_in("s3", list_project_commits, project)
         except FileNotFoundError as e:
             return JSONResponse(status_code=404, content={"error": str(e)})
         except Exception as e:
@@ -214,7 +214,7 @@ async def contributions_get(
     fmt = format.lower()
 
     try:
-        contributions = await asyncio.to_thread(get_contributions, project, commit_hash=commit)
+        contributions = await run_in("s3", get_contributions, project, commit_hash=commit)
     except FileNotFoundError as e:
         return JSONResponse(status_code=404, content={"error": str(e)})
     except Exception as e:
@@ -265,7 +265,7 @@ async def contributions_post(
     authed_via_session = False
 
     try:
-        existing = await asyncio.to_thread(get_contributions, project)
+        existing = await run_in("s3", get_contributions, project)
     except FileNotFoundError:
         existing = None
 
@@ -318,15 +318,15 @@ async def contributions_post(
         # the row they own; all other rows come from storage untouched.
         orcid = session_user["orcid"] if session_user else None
         name = session_user.get("name") if session_user else None
-        ok, err, merged = await asyncio.to_thread(
-            _merge_scoped_contributions, existing, orcid, name, new_contributions
+        ok, err, merged = await run_in(
+            "cpu", _merge_scoped_contributions, existing, orcid, name, new_contributions
         )
         if not ok:
             return JSONResponse(status_code=403, content={"error": err})
         to_store = merged
 
     try:
-        commit_hash = await asyncio.to_thread(store_contributions, project, to_store, message=message)
+        commit_hash = await run_in("s3", store_contributions, project, to_store, message=message)
     except Exception as e:
         _logger.exception("POST /contributions/post project=%s", project)
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -359,7 +359,7 @@ async def contributions_access(
     is_admin = bool(user["is_admin"])
     if project and not is_admin:
         try:
-            existing = await asyncio.to_thread(get_contributions, project)
+            existing = await run_in("s3", get_contributions, project)
         except FileNotFoundError:
             existing = None
         except Exception:
@@ -387,7 +387,7 @@ async def contributions_author_image(
 ):
     if not author:
         return JSONResponse(status_code=400, content={"error": "author query parameter is required"})
-    key = await asyncio.to_thread(get_author_image_key, author)
+    key = await run_in("s3", get_author_image_key, author)
     if key is None:
         return JSONResponse(status_code=404, content={"error": f"No image found for author '{author}'"})
     return JSONResponse(content={"author": author, "image_key": key})
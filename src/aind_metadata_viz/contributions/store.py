@@ -1,7 +1,8 @@
-"""S3-backed storage for ProjectContributions.
+"""Object storage for ProjectContributions.
 
-Each project's versions are stored as JSON objects in S3
-(bucket: ``aind-scratch-data``, prefix: ``contributions-app/``).
+Each project's versions are stored as JSON objects in the configured
+``storage.backend()`` (S3 in production: bucket ``aind-scratch-data``),
+under the ``contributions-app/`` prefix.
 
 Object layout::
 
@@ -13,28 +14,30 @@ Object layout::
   from the version object keys without reading each object.
 * ``get_contributions_by_doi`` finds the latest version of any project by DOI.
 
+``list_all_projects`` and ``get_contributions_by_doi`` read every project's
+latest version, concurrently through ``async_storage``. The request
+handlers await their ``_async`` forms; the plain ones wrap those for
+synchronous callers.
+
 Built-in examples can be seeded via ``scripts/seed_contributions.py``.
 """
 
+import asyncio
 import json
 import uuid
 from datetime import datetime, timezone
 from typing import Optional, Union
 
-import boto3
-from botocore.exceptions import ClientError
-
+from .. import async_storage, storage
+from ..executors import run_in
 from .models import ProjectContributions
 from .serializers import from_json as _from_json, load as _load, to_json as _to_json
 
-_S3_BUCKET = "aind-scratch-data"
+# The scripts in scripts/ talk to S3 directly with these.
+_S3_BUCKET = storage.STORAGE_BUCKET
 _S3_PREFIX = "contributions-app"
 
 
-def _s3():
-    return boto3.client("s3")
-
-
 def _safe_key(project_name: str) -> str:
     return project_name.replace("/", "_").replace("\\", "_")
 
@@ -48,33 +51,17 @@ def _version_prefix(project_name: str) -> str:
 
 
 def _put_json(key: str, obj: dict) -> None:
-    _s3().put_object(
-        Bucket=_S3_BUCKET,
-        Key=key,
-        Body=json.dumps(obj).encode(),
-        ContentType="application/json",
-    )
+    storage.backend().put(key, json.dumps(obj).encode())
 
 
 def _get_json(key: str) -> Optional[dict]:
-    try:
-        response = _s3().get_object(Bucket=_S3_BUCKET, Key=key)
-        return json.loads(response["Body"].read().decode())
-    except ClientError as exc:
-        if exc.response["Error"]["Code"] in ("NoSuchKey", "404"):
-            return None
-        raise
+    stored = storage.backend().get(key)
+    return None if stored is None else json.loads(stored.body.decode())
 
 
 def _list_version_keys(project_name: str) -> list:
     """Return all version object keys for *project_name*, sorted ascending by key name."""
-    prefix = _version_prefix(project_name)
-    paginator = _s3().get_paginator("list_objects_v2")
-    keys = []
-    for page in paginator.paginate(Bucket=_S3_BUCKET, Prefix=prefix):
-        for obj in page.get("Contents", []):
-            keys.append(obj["Key"])
-    return sorted(keys)
+    return storage.backend().list(_version_prefix(project_name)).keys
 
 
 def store_contributions(
@@ -114,7 +101,7 @@ def list_project_commits(
     for key in reversed(keys):  # newest first
         # The commit id and timestamp are both encoded in the key name
         # ({prefix}{ts}_{version_id}.json), so we can build the history
-        # listing without reading each version object from S3.
+        # listing without reading each version object from storage.
         filename = key.rsplit("/", 1)[-1]
         if filename.endswith(".json"):
             filename = filename[: -len(".json")]
@@ -161,73 +148,71 @@ def get_author_image_key(author_name: str) -> Optional[str]:
     exactly is returned.
     """
     prefix = f"{_S3_PREFIX}/images/{author_name}"
-    paginator = _s3().get_paginator("list_objects_v2")
-    for page in paginator.paginate(Bucket=_S3_BUCKET, Prefix=prefix):
-        for obj in page.get("Contents", []):
-            key: str = obj["Key"]
-            filename = key[len(f"{_S3_PREFIX}/images/"):]
-            dot = filename.find(".")
-            stem = filename[:dot] if dot != -1 else filename
-            if stem == author_name:
-                return key
+    for key in storage.backend().list(prefix).keys:
+        filename = key[len(f"{_S3_PREFIX}/images/"):]
+        dot = filename.find(".")
+        stem = filename[:dot] if dot != -1 else filename
+        if stem == author_name:
+            return key
     return None
 
 
-def _list_latest_project_keys() -> list:
-    """Return the newest version object key for every project.
+async def _read_latest_versions(store: async_storage.AsyncObjectStore) -> list:
+    """Return the decoded newest version object of every project, listing and reading concurrently.
 
     Lists all project sub-prefixes under ``contributions-app/`` (skipping the
-    reserved ``images/`` prefix) and returns the most recent version key for
-    each.
+    reserved ``images/`` prefix) and reads the most recent version of each.
     """
-    versions_prefix = f"{_S3_PREFIX}/"
-    paginator = _s3().get_paginator("list_objects_v2")
-
     images_prefix = f"{_S3_PREFIX}/images/"
-    latest_keys = []
-    for page in paginator.paginate(Bucket=_S3_BUCKET, Prefix=versions_prefix, Delimiter="/"):
-        for cp in page.get("CommonPrefixes", []):
-            proj_prefix = cp["Prefix"]
-            if proj_prefix == images_prefix:
-                continue
-            proj_keys = []
-            for inner_page in paginator.paginate(Bucket=_S3_BUCKET, Prefix=proj_prefix):
-                for obj in inner_page.get("Contents", []):
-                    proj_keys.append(obj["Key"])
-            if proj_keys:
-                latest_keys.append(sorted(proj_keys)[-1])
-    return latest_keys
+    listing = await store.list(f"{_S3_PREFIX}/", delimiter="/")
+    prefixes = [prefix for prefix in listing.prefixes if prefix != images_prefix]
+    listings = await async_storage.gather_bounded(store.list, prefixes)
+    latest_keys = [listing.keys[-1] for listing in listings if listing.keys]
+    objects = await async_storage.gather_bounded(store.get, latest_keys)
+    return [json.loads(obj.body.decode()) for obj in objects if obj is not None]
 
 
-def list_all_projects(
-    store_dir=None,  # retained for API compatibility; ignored
-) -> list:
+def _first_with_doi(objs, doi: str) -> ProjectContributions:
+    for obj in objs:
+        if obj:
+            contrib = _from_json(obj["data"])
+            if contrib.doi and doi in contrib.doi:
+                return contrib
+    raise FileNotFoundError(f"No project found with DOI '{doi}'")
+
+
+async def list_all_projects_async() -> list:
     """Return the sorted list of all current project names.
 
     Reads the latest version object of every project to recover the true
-    ``project_id`` (the S3 prefix is a lossy ``_``-escaped form of the name).
+    ``project_id`` (the key prefix is a lossy ``_``-escaped form of the name).
     """
-    names = set()
-    for key in _list_latest_project_keys():
-        obj = _get_json(key)
-        if obj and obj.get("project_id"):
-            names.add(obj["project_id"])
-    return sorted(names)
+    async with async_storage.session() as store:
+        objs = await _read_latest_versions(store)
+    return sorted({obj["project_id"] for obj in objs if obj and obj.get("project_id")})
 
 
-def get_contributions_by_doi(
-    doi: str,
+def list_all_projects(
     store_dir=None,  # retained for API compatibility; ignored
-) -> ProjectContributions:
+) -> list:
+    """``list_all_projects_async`` for synchronous callers (not from a running event loop)."""
+    return asyncio.run(list_all_projects_async())
+
+
+async def get_contributions_by_doi_async(doi: str) -> ProjectContributions:
     """Return the latest version of any project whose DOI matches *doi*.
 
-    Raises ``FileNotFoundError`` when no matching project is found.
+    Raises ``FileNotFoundError`` when no matching project is found. Parsing
+    the versions into models is CPU work, so it runs on the ``cpu`` pool.
     """
-    for key in _list_latest_project_keys():
-        obj = _get_json(key)
-        if obj:
-            contrib = _from_json(obj["data"])
-            if contrib.doi and doi in contrib.doi:
-                return contrib
+    async with async_storage.session() as store:
+        objs = await _read_latest_versions(store)
+    return await run_in("cpu", _first_with_doi, objs, doi)
 
-    raise FileNotFoundError(f"No project found with DOI '{doi}'")
+
+def get_contributions_by_doi(
+    doi: str,
+    store_dir=None,  # retained for API compatibility; ignored
+) -> ProjectContributions:
+    """``get_contributions_by_doi_async`` for synchronous callers (not from a running event loop)."""
+    return asyncio.run(get_contributions_by_doi_async(doi))
@@ -0,0 +1,151 @@
+"""Long-lived DocDB API clients shared by every endpoint.
+
+Building a ``MetadataDbClient`` per request means a new ``requests`` session
+(and TLS handshake) and a new boto3 session (and credential lookup) every
+time. Instead, each API version (``v1``, ``v2``) gets a small pool of
+clients with keep-alive sessions, created in the app lifespan and handed
+out round-robin by ``docdb_client(version)``. Pools are also created
+lazily on first use, so code running outside the lifespan (scripts, a
+``TestClient`` without ``with``) works the same way.
+
+Every HTTP request a pooled client makes is timed; ``stats()`` reports the
+request count, errors and latency per client.
+
+Environment variables
+---------------------
+DOCDB_POOL_SIZE
+    Clients per API version (default 4).
+DOCDB_POOL_CONNECTIONS
+    Keep-alive connections per client (default 10).
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+import time
+from typing import Dict, List
+
+import requests
+from aind_data_access_api.document_db import MetadataDbClient
+from requests.adapters import HTTPAdapter
+
+from aind_metadata_viz import timing
+from aind_metadata_viz.metrics import observe_dependency
+
+DOCDB_HOST = "api.allenneuraldynamics.org"
+DOCDB_POOL_SIZE = int(os.environ.get("DOCDB_POOL_SIZE", "4"))
+DOCDB_POOL_CONNECTIONS = int(os.environ.get("DOCDB_POOL_CONNECTIONS", "10"))
+DOCDB_VERSIONS = ("v1", "v2")
+
+
+class _TimedSession(requests.Session):
+    """A ``requests.Session`` that counts and times every request it sends."""
+
+    def __init__(self):
+        super().__init__()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=DOCDB_POOL_CONNECTIONS)
+        self.mount("https://", adapter)
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.total_latency_s = 0.0
+        self.max_latency_s = 0.0
+
+    def request(self, *args, **kwargs):
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = super().request(*args, **kwargs)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            observe_dependency("docdb", args[0] if args else kwargs.get("method", "unknown"), elapsed, failed)
+            timing.record("docdb", elapsed)
+            with self._stats_lock:
+                self.requests += 1
+                self.errors += failed
+                self.total_latency_s += elapsed
+                self.max_latency_s = max(self.max_latency_s, elapsed)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "mean_latency_s": self.total_latency_s / self.requests if self.requests else 0.0,
+                "max_latency_s": self.max_latency_s,
+            }
+
+
+class DocDbPool:
+    """``size`` ``MetadataDbClient`` instances for one API version, handed out round-robin."""
+
+    def __init__(self, version: str, size: int):
+        if size < 1:
+            raise ValueError(f"DocDB pool size must be at least 1, got {size}")
+        self.version = version
+        self.clients: List[MetadataDbClient] = [
+            MetadataDbClient(host=DOCDB_HOST, version=version, session=_TimedSession()) for _ in range(size)
+        ]
+        self._next = itertools.cycle(self.clients)
+        self._lock = threading.Lock()
+
+    def client(self) -> MetadataDbClient:
+        with self._lock:
+            return next(self._next)
+
+    def close(self) -> None:
+        for client in self.clients:
+            client.session.close()
+
+    def stats(self) -> dict:
+        clients = [client.session.stats() for client in self.clients]
+        requests_total = sum(c["requests"] for c in clients)
+        latency_total = sum(c["mean_latency_s"] * c["requests"] for c in clients)
+        return {
+            "size": len(self.clients),
+            "requests": requests_total,
+            "errors": sum(c["errors"] for c in clients),
+            "mean_latency_s": latency_total / requests_total if requests_total else 0.0,
+            "clients": clients,
+        }
+
+
+_pools: Dict[str, DocDbPool] = {}
+_lock = threading.Lock()
+
+
+def docdb_client(version: str) -> MetadataDbClient:
+    """Return a pooled client for DocDB API ``version``, creating the pool on first use."""
+    with _lock:
+        pool = _pools.get(version)
+        if pool is None:
+            pool = _pools[version] = DocDbPool(version, DOCDB_POOL_SIZE)
+    return pool.client()
+
+
+def start() -> None:
+    """Create the v1 and v2 pools up front. Called from the app lifespan."""
+    with _lock:
+        for version in DOCDB_VERSIONS:
+            if version not in _pools:
+                _pools[version] = DocDbPool(version, DOCDB_POOL_SIZE)
+
+
+def stop() -> None:
+    """Close every pooled session. Called from the app lifespan."""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def stats() -> dict:
+    """Return ``{version: pool stats}`` for every pool created so far."""
+    with _lock:
+        pools = dict(_pools)
+    return {version: pool.stats() for version, pool in pools.items()}
@@ -1,26 +1,55 @@
 from fastapi import APIRouter, Query, Request, Response
-from fastapi.responses import JSONResponse, RedirectResponse
-from aind_data_schema.core.subject import Subject
-from aind_data_schema.core.data_description import DataDescription
-from aind_data_schema.core.procedures import Procedures
-from aind_data_schema_models.data_name_patterns import DataLevel, Group
-from aind_data_schema_models.organizations import Organization
-from aind_data_schema_models.modalities import Modality
-from aind_metadata_upgrader.upgrade import Upgrade
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timezone
-from typing import List, Optional
+from importlib.metadata import version
+from typing import Any, AsyncIterator, Awaitable, List, NamedTuple, Optional, Tuple
 import asyncio
-import copy
+import base64
+import functools
+import hashlib
+import httpx
 import json
-import requests
 import logging
+import os
+import shutil
+import threading
+import time
 import traceback
 
-from aind_data_access_api.document_db import MetadataDbClient
-from biodata_query.llm.endpoint import handle_get_query
-from biodata_query.query import retrieve_aggregation, retrieve_records
-
-_DOCDB_HOST = "api.allenneuraldynamics.org"
+from aind_metadata_viz import docdb, executors, s3, timing
+from aind_metadata_viz.cache import AsyncTTLCache
+from aind_metadata_viz.docdb import docdb_client
+from aind_metadata_viz.executors import PoolSaturated, named_executor, run_in, upgrade_pool, validation_executor
+from aind_metadata_viz.http_client import metadata_service_client
+from aind_metadata_viz.json_patch import make_patch
+from aind_metadata_viz.metrics import dependency_timer
+from aind_metadata_viz.singleflight import SingleFlight, all_stats as coalescing_stats
+
+# Env-overridable caps for POST /gather/batch.
+GATHER_BATCH_CONCURRENCY = int(os.environ.get("GATHER_BATCH_CONCURRENCY", "8"))
+GATHER_BATCH_MAX_CONCURRENCY = int(os.environ.get("GATHER_BATCH_MAX_CONCURRENCY", "32"))
+GATHER_BATCH_MAX_ITEMS = int(os.environ.get("GATHER_BATCH_MAX_ITEMS", "1000"))
+
+# Per-source entry cap for the metadata-service lookup caches.
+METADATA_CACHE_MAX_ENTRIES = int(os.environ.get("METADATA_CACHE_MAX_ENTRIES", "1024"))
+
+# DocDB API version and page size used by /retrieve-records?stream=true.
+DOCDB_API_VERSION = os.environ.get("DOCDB_API_VERSION", "v2")
+RETRIEVE_STREAM_PAGE_SIZE = int(os.environ.get("RETRIEVE_STREAM_PAGE_SIZE", "500"))
+RETRIEVE_MAX_PAGE_SIZE = int(os.environ.get("RETRIEVE_MAX_PAGE_SIZE", "1000"))
+
+# Env-overridable caps for POST /upgrade/batch.
+UPGRADE_BATCH_MAX_ITEMS = int(os.environ.get("UPGRADE_BATCH_MAX_ITEMS", "1000"))
+UPGRADE_BATCH_PAGE_SIZE = int(os.environ.get("UPGRADE_BATCH_PAGE_SIZE", "100"))
+
+# Upgrade result cache. UPGRADE_CACHE_DIR enables the on-disk tier, capped
+# at UPGRADE_CACHE_DISK_MAX_BYTES (least recently used entries go first).
+UPGRADE_CACHE_TTL_S = float(os.environ.get("UPGRADE_CACHE_TTL_S", "86400"))
+UPGRADE_CACHE_MAX_ENTRIES = int(os.environ.get("UPGRADE_CACHE_MAX_ENTRIES", "1024"))
+UPGRADE_CACHE_MAX_BYTES = int(os.environ.get("UPGRADE_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+UPGRADE_CACHE_DIR = os.environ.get("UPGRADE_CACHE_DIR")
+UPGRADE_CACHE_DISK_MAX_BYTES = int(os.environ.get("UPGRADE_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024)))
 
 
 router = APIRouter()
@@ -68,9 +97,11 @@ async def redirect_upgrade():
     return RedirectResponse(url="https://data.allenneuraldynamics.org/upgrade", status_code=301)
 
 
-def _get_subject(subject_id: str, metadata_service_url: str) -> Optional[dict]:
+async def _get_subject(
+    client: httpx.AsyncClient, subject_id: str, metadata_service_url: str
+) -> Optional[dict]:
     try:
-        response = requests.get(f"{metadata_service_url}/api/v2/subject/{subject_id}")
+        response = await client.get(f"{metadata_service_url}/api/v2/subject/{subject_id}")
         if response.status_code == 200:
             return response.json().get("data", response.json())
         elif response.status_code == 404:
@@ -78,13 +109,15 @@ def _get_subject(subject_id: str, metadata_service_url: str) -> Optional[dict]:
             return None
         else:
             raise Exception(f"Subject service returned status {response.status_code}")
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise Exception(f"Failed to retrieve subject metadata: {str(e)}")
 
 
-def _get_procedures(subject_id: str, metadata_service_url: str) -> Optional[dict]:
+async def _get_procedures(
+    client: httpx.AsyncClient, subject_id: str, metadata_service_url: str
+) -> Optional[dict]:
     try:
-        response = requests.get(f"{metadata_service_url}/api/v2/procedures/{subject_id}")
+        response = await client.get(f"{metadata_service_url}/api/v2/procedures/{subject_id}")
         if response.status_code == 200:
             return response.json().get("data", response.json())
         elif response.status_code == 404:
@@ -92,14 +125,16 @@ def _get_procedures(subject_id: str, metadata_service_url: str) -> Optional[dict
             return None
         else:
             raise Exception(f"Procedures service returned status {response.status_code}")
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise Exception(f"Failed to retrieve procedures metadata: {str(e)}")
 
 
-def _get_funding(project_name: str, metadata_service_url: str) -> tuple:
+async def _get_funding(
+    client: httpx.AsyncClient, project_name: str, metadata_service_url: str
+) -> tuple:
     try:
         funding_url = f"{metadata_service_url}/api/v2/funding/{project_name}"
-        response = requests.get(funding_url)
+        response = await client.get(funding_url)
         if response.status_code == 200:
             funding_info = response.json()
         else:
@@ -132,10 +167,56 @@ def _get_funding(project_name: str, metadata_service_url: str) -> tuple:
     return parsed_funding_info, unique_investigators
 
 
+# aind-data-schema, the upgrader and biodata-query are slow to import, so
+# they are imported where they are used, not with this module (see ``lazy``).
+
+
+def handle_get_query(event: dict) -> dict:
+    """biodata-query's LLM query builder."""
+    from biodata_query.llm.endpoint import handle_get_query
+
+    return handle_get_query(event)
+
+
+def retrieve_records(*args, **kwargs):
+    """biodata-query's ``retrieve_records``."""
+    from biodata_query.query import retrieve_records
+
+    return retrieve_records(*args, **kwargs)
+
+
+def retrieve_aggregation(*args, **kwargs):
+    """biodata-query's ``retrieve_aggregation``."""
+    from biodata_query.query import retrieve_aggregation
+
+    return retrieve_aggregation(*args, **kwargs)
+
+
+@functools.cache
+def _data_description_lookups() -> Tuple[dict, dict]:
+    """Lookup tables for _build_data_description, built once instead of per request.
+
+    Modality abbreviations match case-insensitively; groups match on either
+    the enum name or its value.
+    """
+    from aind_data_schema_models.data_name_patterns import Group
+    from aind_data_schema_models.modalities import Modality
+
+    modality_by_abbreviation = {
+        abbreviation.lower(): modality for abbreviation, modality in Modality.abbreviation_map.items()
+    }
+    group_by_name = {
+        **{option.value.upper(): option for option in Group},
+        **{option.name.upper(): option for option in Group},
+    }
+    return modality_by_abbreviation, group_by_name
+
+
 def _build_data_description(
     project_name: str,
     subject_id: str,
-    metadata_service_url: str,
+    funding_source: list,
+    investigators: list,
     modalities: List[str],
     tags: Optional[List[str]],
     group: Optional[str],
@@ -143,6 +224,10 @@ def _build_data_description(
     data_summary: Optional[str],
     acquisition_start_time: Optional[str],
 ) -> dict:
+    from aind_data_schema.core.data_description import DataDescription
+    from aind_data_schema_models.data_name_patterns import DataLevel
+    from aind_data_schema_models.organizations import Organization
+
     if acquisition_start_time:
         try:
             iso_time_str = acquisition_start_time.replace("Z", "+00:00")
@@ -152,33 +237,12 @@ def _build_data_description(
     else:
         creation_time = datetime.now(tz=timezone.utc)
 
-    funding_source, investigators = _get_funding(project_name, metadata_service_url)
-
-    parsed_modalities = []
-    for modality in modalities:
-        if isinstance(modality, str):
-            try:
-                found_modality = Modality.from_abbreviation(modality.lower())
-                parsed_modalities.append(found_modality)
-            except (AttributeError, ValueError):
-                parsed_modalities.append(modality)
-        else:
-            parsed_modalities.append(modality)
-
-    parsed_group = None
-    if group:
-        try:
-            for group_option in Group:
-                if (
-                    group_option.name.upper() == group.upper()
-                    or group_option.value.upper() == group.upper()
-                ):
-                    parsed_group = group_option
-                    break
-            if parsed_group is None:
-                parsed_group = Group(group.lower())
-        except (AttributeError, ValueError):
-            parsed_group = None
+    modality_by_abbreviation, group_by_name = _data_description_lookups()
+    parsed_modalities = [
+        modality_by_abbreviation.get(m.lower(), m) if isinstance(m, str) else m
+        for m in modalities
+    ]
+    parsed_group = group_by_name.get(group.upper()) if isinstance(group, str) else None
 
     new_data_description = DataDescription(
         creation_time=creation_time,
@@ -195,24 +259,107 @@ def _build_data_description(
         data_summary=data_summary,
     )
 
+    # ``name`` was built from the acquisition time above; creation_time
+    # itself records when this description was produced.
     new_data_description.creation_time = datetime.now(tz=timezone.utc)
-    return json.loads(new_data_description.model_dump_json())
+    return new_data_description.model_dump(mode="json")
 
 
-def _gather_metadata(
+_subject_cache = AsyncTTLCache(
+    "subject",
+    ttl_s=float(os.environ.get("SUBJECT_CACHE_TTL_S", "3600")),
+    stale_s=float(os.environ.get("SUBJECT_CACHE_STALE_S", "3600")),
+    maxsize=METADATA_CACHE_MAX_ENTRIES,
+)
+_procedures_cache = AsyncTTLCache(
+    "procedures",
+    ttl_s=float(os.environ.get("PROCEDURES_CACHE_TTL_S", "900")),
+    stale_s=float(os.environ.get("PROCEDURES_CACHE_STALE_S", "900")),
+    maxsize=METADATA_CACHE_MAX_ENTRIES,
+)
+# Failed funding lookups come back as ([], []); don't cache those.
+_funding_cache = AsyncTTLCache(
+    "funding",
+    ttl_s=float(os.environ.get("FUNDING_CACHE_TTL_S", "86400")),
+    stale_s=float(os.environ.get("FUNDING_CACHE_STALE_S", "86400")),
+    maxsize=METADATA_CACHE_MAX_ENTRIES,
+    should_cache=lambda value: bool(value[0]),
+)
+_METADATA_CACHES = (_subject_cache, _procedures_cache, _funding_cache)
+
+
+async def _cached_subject(subject_id: str, metadata_service_url: str) -> Optional[dict]:
+    async def load():
+        async with metadata_service_client() as client:
+            return await _get_subject(client, subject_id, metadata_service_url)
+
+    return await _subject_cache.get((metadata_service_url, subject_id), load)
+
+
+async def _cached_procedures(subject_id: str, metadata_service_url: str) -> Optional[dict]:
+    async def load():
+        async with metadata_service_client() as client:
+            return await _get_procedures(client, subject_id, metadata_service_url)
+
+    return await _procedures_cache.get((metadata_service_url, subject_id), load)
+
+
+async def _fetch_funding(project_name: str, metadata_service_url: str) -> tuple:
+    async def load():
+        async with metadata_service_client() as client:
+            return await _get_funding(client, project_name, metadata_service_url)
+
+    return await _funding_cache.get((metadata_service_url, project_name), load)
+
+
+def clear_metadata_caches() -> None:
+    """Drop cached metadata-service lookups and reset their counters."""
+    for cache in _METADATA_CACHES:
+        cache.clear()
+
+
+async def _fetch_upstream(
     subject_id: str,
     project_name: str,
     metadata_service_url: str,
-    modalities: List[str],
-    tags: Optional[List[str]],
-    group: Optional[str],
-    restrictions: Optional[str],
-    data_summary: Optional[str],
-    acquisition_start_time: Optional[str],
+    funding: Optional[Awaitable[tuple]] = None,
+) -> tuple:
+    """Fetch subject, procedures and funding concurrently, via the caches.
+
+    Latency is that of the slowest lookup rather than the sum of all three.
+    Errors are re-raised in subject, procedures, funding order so the
+    reported failure doesn't depend on which call happened to finish first.
+    ``funding`` lets a caller supply an already-started funding lookup that
+    is shared between several subjects of the same project.
+    """
+    results = await asyncio.gather(
+        _cached_subject(subject_id, metadata_service_url),
+        _cached_procedures(subject_id, metadata_service_url),
+        funding if funding is not None else _fetch_funding(project_name, metadata_service_url),
+        return_exceptions=True,
+    )
+    for r in results:
+        if isinstance(r, BaseException):
+            raise r
+    return results
+
+
+def _validate_gathered(
+    subject_id: str,
+    subject_data: Optional[dict],
+    procedures_data: Optional[dict],
+    data_description_params: dict,
 ) -> dict:
+    """Validation stage of ``_gather_metadata``; runs on the validation pool.
+
+    Module-level and free of pydantic exception objects in what it raises,
+    so it works on a process pool as well as a thread pool.
+    """
+    from aind_data_schema.core.procedures import Procedures
+    from aind_data_schema.core.subject import Subject
+
     result = {}
 
-    subject_data = _get_subject(subject_id, metadata_service_url)
     if not subject_data:
         raise Exception(f"Subject metadata not found for subject_id: {subject_id}")
 
@@ -222,7 +369,6 @@ def _gather_metadata(
     except Exception as e:
         raise Exception(f"Subject validation failed: {str(e)}")
 
-    procedures_data = _get_procedures(subject_id, metadata_service_url)
     if not procedures_data:
         raise Exception(f"Procedures metadata not found for subject_id: {subject_id}")
 
@@ -232,27 +378,85 @@ def _gather_metadata(
     except Exception as e:
         raise Exception(f"Procedures validation failed: {str(e)}")
 
-    data_description = _build_data_description(
-        project_name=project_name,
-        subject_id=subject_id,
-        metadata_service_url=metadata_service_url,
-        modalities=modalities,
-        tags=tags,
-        group=group,
-        restrictions=restrictions,
-        data_summary=data_summary,
-        acquisition_start_time=acquisition_start_time,
-    )
-
+    # Constructing the DataDescription is its one and only validation.
     try:
-        DataDescription.model_validate(data_description)
-        result["data_description"] = data_description
+        result["data_description"] = _build_data_description(**data_description_params)
     except Exception as e:
         raise Exception(f"DataDescription validation failed: {str(e)}")
 
     return result
 
 
+async def _gather_metadata(
+    subject_id: str,
+    project_name: str,
+    metadata_service_url: str,
+    modalities: List[str],
+    tags: Optional[List[str]],
+    group: Optional[str],
+    restrictions: Optional[str],
+    data_summary: Optional[str],
+    acquisition_start_time: Optional[str],
+    funding: Optional[Awaitable[tuple]] = None,
+) -> dict:
+    subject_data, procedures_data, (funding_source, investigators) = await _fetch_upstream(
+        subject_id, project_name, metadata_service_url, funding=funding
+    )
+
+    return await asyncio.get_running_loop().run_in_executor(
+        validation_executor(),
+        _validate_gathered,
+        subject_id,
+        subject_data,
+        procedures_data,
+        {
+            "project_name": project_name,
+            "subject_id": subject_id,
+            "funding_source": funding_source,
+            "investigators": investigators,
+            "modalities": modalities,
+            "tags": tags,
+            "group": group,
+            "restrictions": restrictions,
+            "data_summary": data_summary,
+            "acquisition_start_time": acquisition_start_time,
+        },
+    )
+
+
+def _parse_gather_params(data) -> Tuple[Optional[str], Optional[dict]]:
+    """Return (error_message, _gather_metadata kwargs). One is always None."""
+    if not isinstance(data, dict):
+        return "Request body must be a JSON object.", None
+
+    subject_id = data.get("subject_id")
+    project_name = data.get("project_name")
+
+    if not subject_id:
+        return "subject_id is required.", None
+
+    if not project_name:
+        return "project_name is required.", None
+
+    modalities_raw = data.get("modalities", [])
+    if not isinstance(modalities_raw, (list, str)):
+        return "modalities must be a list or a comma-separated string.", None
+    tags_raw = data.get("tags", None)
+    if tags_raw is not None and not isinstance(tags_raw, (list, str)):
+        return "tags must be a list or a comma-separated string.", None
+    return None, {
+        "subject_id": subject_id,
+        "project_name": project_name,
+        "metadata_service_url": data.get("metadata_service_url", "http://aind-metadata-service"),
+        "modalities": modalities_raw if isinstance(modalities_raw, list) else modalities_raw.split(","),
+        "tags": tags_raw if isinstance(tags_raw, list) else (tags_raw.split(",") if tags_raw else None),
+        "group": data.get("group", None),
+        "restrictions": data.get("restrictions", None),
+        "data_summary": data.get("data_summary", None),
+        "acquisition_start_time": data.get("acquisition_start_time", None),
+    }
+
+
 @router.post(
     "/gather",
     tags=["gather"],
@@ -271,37 +475,12 @@ async def gather(request: Request):
     except Exception:
         return JSONResponse(status_code=400, content={"error": "Invalid JSON format."})
 
-    subject_id = data.get("subject_id")
-    project_name = data.get("project_name")
-
-    if not subject_id:
-        return JSONResponse(status_code=400, content={"error": "subject_id is required."})
-
-    if not project_name:
-        return JSONResponse(status_code=400, content={"error": "project_name is required."})
-
-    metadata_service_url = data.get("metadata_service_url", "http://aind-metadata-service")
-    modalities_raw = data.get("modalities", [])
-    modalities = modalities_raw if isinstance(modalities_raw, list) else modalities_raw.split(",")
-    tags_raw = data.get("tags", None)
-    tags = tags_raw if isinstance(tags_raw, list) else (tags_raw.split(",") if tags_raw else None)
-    group = data.get("group", None)
-    restrictions = data.get("restrictions", None)
-    data_summary = data.get("data_summary", None)
-    acquisition_start_time = data.get("acquisition_start_time", None)
+    error, params = _parse_gather_params(data)
+    if error:
+        return JSONResponse(status_code=400, content={"error": error})
 
     try:
-        result = _gather_metadata(
-            subject_id=subject_id,
-            project_name=project_name,
-            metadata_service_url=metadata_service_url,
-            modalities=modalities,
-            tags=tags,
-            group=group,
-            restrictions=restrictions,
-            data_summary=data_summary,
-            acquisition_start_time=acquisition_start_time,
-        )
+        result = await _gather_metadata(**params)
         return JSONResponse(content=result)
     except Exception as e:
         return JSONResponse(
@@ -310,24 +489,487 @@ async def gather(request: Request):
         )
 
 
+def _parse_batch_item(index: int, item) -> Tuple[dict, Optional[dict]]:
+    """Return (line, _gather_metadata kwargs) for one /gather/batch item.
+
+    For a malformed item the kwargs are None and ``line`` is its finished
+    400 line.
+    """
+    line = {"index": index, "subject_id": item.get("subject_id") if isinstance(item, dict) else None}
+    try:
+        error, params = _parse_gather_params(item)
+    except Exception as e:
+        return {**line, "status": 400, "error": "Invalid item.", "details": str(e)}, None
+    if error:
+        return {**line, "status": 400, "error": error}, None
+    return line, params
+
+
+async def _gather_batch_lines(items: list, concurrency: int) -> AsyncIterator[bytes]:
+    """Yield one NDJSON line per item, in completion order.
+
+    At most ``concurrency`` items are gathered at once. Funding is looked up
+    once per (metadata_service_url, project_name) and shared by every item
+    of that project; a slow subject only delays its own line.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    funding_tasks = {}
+
+    def shared_funding(params: dict) -> Awaitable[tuple]:
+        key = (params["metadata_service_url"], params["project_name"])
+        if key not in funding_tasks:
+            funding_tasks[key] = asyncio.ensure_future(_fetch_funding(key[1], key[0]))
+        # Shield so one cancelled item doesn't cancel the lookup for the rest.
+        return asyncio.shield(funding_tasks[key])
+
+    async def run_one(index: int, item) -> dict:
+        line, params = _parse_batch_item(index, item)
+        if params is None:
+            return line
+        async with semaphore:
+            try:
+                result = await _gather_metadata(**params, funding=shared_funding(params))
+            except Exception as e:
+                return {**line, "status": 500, "error": "Failed to gather metadata", "details": str(e)}
+        return {**line, "status": 200, "result": result}
+
+    tasks = [asyncio.ensure_future(run_one(i, item)) for i, item in enumerate(items)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield (json.dumps(await next_done) + "\n").encode()
+    finally:
+        for task in [*tasks, *funding_tasks.values()]:
+            task.cancel()
+
+
+@router.post(
+    "/gather/batch",
+    tags=["gather"],
+    summary="Gather and validate metadata for many subjects",
+    description=(
+        "Runs /gather for each item of `items` (each shaped like a /gather body) with at most "
+        "`concurrency` subjects in flight (default 8, capped at 32). Funding is fetched once per "
+        "project. Streams `application/x-ndjson`, one line per item as it finishes (not in input "
+        "order): `{\"index\", \"subject_id\", \"status\", \"result\"?, \"error\"?, "
+        "\"details\"?}`, where `result` is the /gather response body."
+    ),
+)
+async def gather_batch(request: Request):
+    try:
+        data = await request.json()
+    except Exception:
+        return JSONResponse(status_code=400, content={"error": "Invalid JSON format."})
+
+    items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return JSONResponse(status_code=400, content={"error": "items must be a non-empty list."})
+    if len(items) > GATHER_BATCH_MAX_ITEMS:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"items exceeds maximum of {GATHER_BATCH_MAX_ITEMS} subjects."},
+        )
+
+    concurrency = GATHER_BATCH_CONCURRENCY
+    if isinstance(data, dict):
+        concurrency = data.get("concurrency", GATHER_BATCH_CONCURRENCY)
+    if not isinstance(concurrency, int) or isinstance(concurrency, bool) or concurrency < 1:
+        return JSONResponse(status_code=400, content={"error": "concurrency must be a positive integer."})
+    concurrency = min(concurrency, GATHER_BATCH_MAX_CONCURRENCY)
+
+    return StreamingResponse(_gather_batch_lines(items, concurrency), media_type="application/x-ndjson")
+
+
+@router.get(
+    "/gather/cache-stats",
+    tags=["gather"],
+    summary="Hit/miss counters for the metadata-service lookup caches",
+    description=(
+        "Returns `{\"subject\", \"procedures\", \"funding\"}`, each with the cache `size` and "
+        "`hits`, `stale_hits` (served stale while refreshing), `misses`, `coalesced` (misses that "
+        "joined an in-flight lookup), `refreshes`, `errors` and `hit_ratio`. Upstream calls saved "
+        "= `hits + stale_hits + coalesced`."
+    ),
+)
+async def gather_cache_stats():
+    return JSONResponse(content={cache.name: cache.stats() for cache in _METADATA_CACHES})
+
+
+# Each LLM query-builder call is a multi-second round-trip, so successful
+# answers are cached by their normalized parameters. Values are
+# ``(status_code, body)``.
+_upgrade_query_cache = AsyncTTLCache(
+    "upgrade_query",
+    ttl_s=float(os.environ.get("UPGRADE_QUERY_CACHE_TTL_S", "600")),
+    stale_s=0,
+    maxsize=int(os.environ.get("UPGRADE_QUERY_CACHE_MAX_ENTRIES", "256")),
+    should_cache=lambda response: response[0] == 200,
+)
+_upgrade_query_flight = SingleFlight("upgrade_query")
+
+
+def _normalize_query_params(params) -> dict:
+    """Sort the parameters and collapse whitespace in their values."""
+    return {key: " ".join(params[key].split()) for key in sorted(params)}
+
+
 @router.get(
     "/upgrade-query",
     tags=["query"],
     summary="Build a query using the LLM query builder",
-    description="Pass arbitrary query string parameters as needed; they are forwarded to the LLM query builder.",
+    description=(
+        "Pass arbitrary query string parameters as needed; they are forwarded to the LLM query builder.\n\n"
+        "Successful answers are cached for `UPGRADE_QUERY_CACHE_TTL_S` (default 10 minutes), keyed on "
+        "the parameters with keys sorted and whitespace collapsed, and concurrent identical requests "
+        "share one LLM call. The `X-Cache` header is `HIT`, `MISS` or `BYPASS` (sent "
+        "`Cache-Control: no-cache`)."
+    ),
 )
 async def upgrade_query(request: Request):
-    event = {"queryStringParameters": dict(request.query_params)}
-    response = await asyncio.get_event_loop().run_in_executor(
-        None, lambda: handle_get_query(event)
-    )
+    # Normalized params only pick the cache entry; the LLM sees the question as asked.
+    key = _query_cache_key(_normalize_query_params(request.query_params))
+
+    def build_query() -> dict:
+        with dependency_timer("bedrock", "query_builder"), timing.phase("bedrock"):
+            return handle_get_query({"queryStringParameters": dict(request.query_params)})
+
+    async def load() -> Tuple[int, str]:
+        response = await _upgrade_query_flight.run(key, build_query, named_executor("bedrock"))
+        return response["statusCode"], response["body"]
+
+    if _cache_opt_out(request):
+        (status_code, body), cache_header = await load(), "BYPASS"
+    else:
+        (status_code, body), status = await _upgrade_query_cache.get_with_status(key, load)
+        cache_header = "MISS" if status == "miss" else "HIT"
     return Response(
-        content=response["body"],
-        status_code=response["statusCode"],
+        content=body,
+        status_code=status_code,
         media_type="application/json",
+        headers={"X-Cache": cache_header},
+    )
+
+
+@router.get(
+    "/upgrade-query/cache-stats",
+    tags=["query"],
+    summary="Counters for the /upgrade-query response cache",
+    description=(
+        "Returns the cache `size`, `hits`, `misses`, `coalesced` (identical questions that joined "
+        "one LLM call in flight), `errors` and `hit_ratio`."
+    ),
+)
+async def upgrade_query_cache_stats():
+    return JSONResponse(content=_upgrade_query_cache.stats())
+
+
+# Result cache for non-streaming /retrieve-records. Values are the encoded
+# response bodies, so the byte bound is exact.
+_query_result_cache = AsyncTTLCache(
+    "retrieve_records",
+    ttl_s=float(os.environ.get("RETRIEVE_CACHE_TTL_S", "30")),
+    stale_s=0,
+    maxsize=int(os.environ.get("RETRIEVE_CACHE_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.environ.get("RETRIEVE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+)
+
+
+# Concurrent identical queries share one executor call, cached or not.
+_retrieve_records_flight = SingleFlight("retrieve_records")
+_retrieve_aggregation_flight = SingleFlight("retrieve_aggregation")
+
+
+def _query_cache_key(query: dict) -> str:
+    """Hash a query canonically: key order and whitespace don't matter."""
+    canonical = json.dumps(query, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _cache_opt_out(request: Request) -> bool:
+    cache_control = request.headers.get("cache-control", "").lower()
+    return "no-cache" in cache_control or "no-store" in cache_control
+
+
+async def _cached_query_response(query: dict, flight: SingleFlight, run_query, use_cache: bool) -> Response:
+    """Run ``run_query`` through ``flight``, serving repeats from the cache.
+
+    The ``X-Cache`` response header is ``HIT``, ``MISS`` or ``BYPASS`` (the
+    client sent ``Cache-Control: no-cache`` or ``no-store``).
+    """
+
+    key = _query_cache_key(query)
+
+    async def load() -> bytes:
+        result = await flight.run(key, run_query, named_executor("docdb"))
+        response_body = {
+            "backend": result.backend,
+            "elapsed_seconds": result.elapsed_seconds,
+            "asset_names": result.asset_names,
+        }
+        if result.records is not None:
+            response_body["records"] = result.records
+        return json.dumps(response_body).encode()
+
+    if use_cache:
+        content, status = await _query_result_cache.get_with_status(key, load)
+        cache_header = "MISS" if status == "miss" else "HIT"
+    else:
+        content, cache_header = await load(), "BYPASS"
+    return Response(content=content, media_type="application/json", headers={"X-Cache": cache_header})
+
+
+_CURSOR_ORDERINGS = {"_id": ("_id",), "name": ("name", "_id")}
+
+
+class _InvalidCursor(ValueError):
+    pass
+
+
+def _encode_cursor(order_by: str, query_hash: str, record: dict) -> str:
+    position = {"o": order_by, "q": query_hash, "k": [record.get(key) for key in _CURSOR_ORDERINGS[order_by]]}
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, order_by: str, query_hash: str) -> list:
+    """Return the sort-key values stored in ``cursor``.
+
+    Cursors are only valid for the query and ordering that produced them.
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        keys = position["k"]
+        valid = position["o"] == order_by and position["q"] == query_hash
+    except (ValueError, TypeError, KeyError):
+        raise _InvalidCursor("cursor is malformed.")
+    if not valid or not isinstance(keys, list) or len(keys) != len(_CURSOR_ORDERINGS[order_by]):
+        raise _InvalidCursor("cursor does not belong to this query and order_by.")
+    return keys
+
+
+def _after_cursor(order_by: str, keys: list) -> dict:
+    """Build the keyset condition selecting records strictly after ``keys``."""
+    if order_by == "_id":
+        return {"_id": {"$gt": keys[0]}}
+    name, record_id = keys
+    return {"$or": [{"name": {"$gt": name}}, {"name": name, "_id": {"$gt": record_id}}]}
+
+
+def _page_projection(projection: Optional[dict], names_only: bool, order_by: str) -> Optional[dict]:
+    """Make sure the sort keys survive the projection so the next cursor can be built."""
+    if names_only:
+        projection = {"name": 1}
+    if projection is None:
+        return None
+    projection = dict(projection)
+    is_inclusion = any(value for value in projection.values())
+    for key in _CURSOR_ORDERINGS[order_by]:
+        if is_inclusion:
+            projection[key] = 1
+        else:
+            projection.pop(key, None)
+    return projection or None
+
+
+def _fetch_page(
+    filter_query: dict,
+    projection: Optional[dict],
+    names_only: bool,
+    order_by: str,
+    page_size: int,
+    cursor: Optional[str],
+) -> dict:
+    """Fetch one keyset-paginated page of records from DocDB.
+
+    ``next_cursor`` is set only when the page is full.
+    """
+    started = time.perf_counter()
+    query_hash = _query_cache_key({"filter": filter_query, "projection": projection, "names_only": names_only})
+    page_filter = filter_query
+    if cursor:
+        page_filter = {"$and": [filter_query, _after_cursor(order_by, _decode_cursor(cursor, order_by, query_hash))]}
+    sort = {key: 1 for key in _CURSOR_ORDERINGS[order_by]}
+    fetch_projection = _page_projection(projection, names_only, order_by)
+
+    # retrieve_docdb_records keeps asking until ``page_size`` records arrive
+    # or DocDB runs out, since the API gateway may return short pages.
+    records = docdb_client(DOCDB_API_VERSION).retrieve_docdb_records(
+        filter_query=page_filter, projection=fetch_projection, sort=sort, limit=page_size
+    )
+
+    response_body = {
+        "backend": "docdb",
+        "elapsed_seconds": time.perf_counter() - started,
+        "asset_names": [record.get("name") for record in records],
+        "next_cursor": (
+            _encode_cursor(order_by, query_hash, records[-1]) if len(records) == page_size else None
+        ),
+    }
+    if not names_only:
+        response_body["records"] = records
+    return response_body
+
+
+async def _paged_response(
+    filter_query: dict,
+    projection: Optional[dict],
+    names_only: bool,
+    order_by: str,
+    page_size: Optional[int],
+    cursor: Optional[str],
+    limit: int,
+    stream: bool,
+) -> JSONResponse:
+    if page_size is None:
+        return JSONResponse(status_code=400, content={"error": "page_size is required with cursor."})
+    if not 1 <= page_size <= RETRIEVE_MAX_PAGE_SIZE:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"page_size must be between 1 and {RETRIEVE_MAX_PAGE_SIZE}."},
+        )
+    if order_by not in _CURSOR_ORDERINGS:
+        return JSONResponse(status_code=400, content={"error": "order_by must be '_id' or 'name'."})
+    if limit or stream:
+        return JSONResponse(status_code=400, content={"error": "page_size cannot be combined with limit or stream."})
+    try:
+        response_body = await run_in(
+            "docdb", _fetch_page, filter_query, projection, names_only, order_by, page_size, cursor
+        )
+    except _InvalidCursor as e:
+        return JSONResponse(status_code=400, content={"error": f"Invalid cursor: {e}"})
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": "Query execution failed", "details": str(e)},
+        )
+    return JSONResponse(content=response_body)
+
+
+def _ndjson_line(obj) -> bytes:
+    return (json.dumps(obj) + "\n").encode()
+
+
+async def _stream_docdb_records(
+    filter_query: dict, projection: Optional[dict], limit: int, names_only: bool
+) -> AsyncIterator[bytes]:
+    """Page through DocDB and yield one NDJSON line per record.
+
+    Pages of ``RETRIEVE_STREAM_PAGE_SIZE`` records are fetched in ``_id``
+    order on the ``docdb`` executor, each starting after the last ``_id`` of
+    the page before (keyset paging, as with ``page_size``). Only one page is
+    held in memory at a time, a page deep into the result costs no more than
+    the first, and records inserted or deleted mid-stream can't shift later
+    pages. The last line is ``{"trailer": {...}}`` with the backend, elapsed
+    time, record count and, if a page failed, the error.
+    """
+    started = time.perf_counter()
+    if names_only:
+        projection = {"name": 1, "_id": 0}
+    # The next page needs each page's last _id, even when the caller hid it.
+    fetch_projection = _page_projection(projection, False, "_id")
+    hide_id = projection is not None and "_id" in projection and not projection["_id"]
+    trailer = {"backend": "docdb", "count": 0}
+    try:
+        client = docdb_client(DOCDB_API_VERSION)
+        page_filter = filter_query
+        while limit <= 0 or trailer["count"] < limit:
+            page_size = RETRIEVE_STREAM_PAGE_SIZE
+            if limit > 0:
+                page_size = min(page_size, limit - trailer["count"])
+            page = await run_in(
+                "docdb",
+                client.retrieve_docdb_records,
+                filter_query=page_filter,
+                projection=fetch_projection,
+                sort={"_id": 1},
+                limit=page_size,
+            )
+            if not page:
+                break
+            page_filter = {"$and": [filter_query, _after_cursor("_id", [page[-1]["_id"]])]}
+            trailer["count"] += len(page)
+            if hide_id:
+                page = [{key: value for key, value in record.items() if key != "_id"} for record in page]
+            yield b"".join(_ndjson_line(record) for record in page)
+            del page
+    except Exception as e:
+        trailer["error"] = "Query execution failed"
+        trailer["details"] = str(e)
+    trailer["elapsed_seconds"] = time.perf_counter() - started
+    yield _ndjson_line({"trailer": trailer})
+
+
+async def _stream_aggregation(pipeline: list) -> AsyncIterator[bytes]:
+    """Run an aggregation pipeline and yield its records as NDJSON lines.
+
+    DocDB returns an aggregation's result in one response, so the whole
+    result is in memory before the first line is written: streaming only
+    changes the response format, not the memory used.
+    """
+    try:
+        result = await _retrieve_aggregation_flight.run(
+            _query_cache_key({"pipeline": pipeline}), lambda: retrieve_aggregation(pipeline), named_executor("docdb")
+        )
+    except Exception as e:
+        yield _ndjson_line(
+            {"trailer": {"backend": "docdb", "count": 0, "error": "Aggregation execution failed", "details": str(e)}}
+        )
+        return
+    records = result.records if result.records is not None else [{"name": name} for name in result.asset_names]
+    for record in records:
+        yield _ndjson_line(record)
+    yield _ndjson_line(
+        {"trailer": {"backend": result.backend, "count": len(records), "elapsed_seconds": result.elapsed_seconds}}
     )
 
 
+def _parse_projection(projection: Optional[str]) -> Tuple[Optional[str], Optional[dict]]:
+    """Return (error_message, projection dict or None if not given). The error is None if it parsed."""
+    if not projection:
+        return None, None
+    try:
+        projection_dict = json.loads(projection)
+    except json.JSONDecodeError:
+        projection_dict = None
+    if not isinstance(projection_dict, dict):
+        return "projection must be a JSON object.", None
+    return None, projection_dict
+
+
+async def _aggregation_response(pipeline: list, stream: bool, use_cache: bool) -> Response:
+    if stream:
+        return StreamingResponse(_stream_aggregation(pipeline), media_type="application/x-ndjson")
+    try:
+        return await _cached_query_response(
+            {"pipeline": pipeline}, _retrieve_aggregation_flight, lambda: retrieve_aggregation(pipeline), use_cache
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": "Aggregation execution failed", "details": str(e)},
+        )
+
+
+async def _filter_query_response(
+    filter_query: dict, projection: Optional[dict], names_only: bool, limit: int, stream: bool, use_cache: bool
+) -> Response:
+    if stream:
+        return StreamingResponse(
+            _stream_docdb_records(filter_query, projection, limit, names_only),
+            media_type="application/x-ndjson",
+        )
+    try:
+        return await _cached_query_response(
+            {"filter": filter_query, "projection": projection, "limit": limit, "names_only": names_only},
+            _retrieve_records_flight,
+            lambda: retrieve_records(filter_query, names_only=names_only, limit=limit, projection=projection),
+            use_cache,
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": "Query execution failed", "details": str(e)},
+        )
+
+
 @router.post(
     "/retrieve-records",
     tags=["query"],
@@ -336,7 +978,19 @@ async def upgrade_query(request: Request):
         "Send a JSON object as the body to run a **filter query** against the metadata store, or "
         "a JSON array of pipeline stage dicts to run an **aggregation pipeline** (always executed "
         "against DocumentDB). Returns `{\"backend\", \"elapsed_seconds\", \"asset_names\", "
-        "\"records\"?}`."
+        "\"records\"?}`.\n\n"
+        "With `stream=true` the response is `application/x-ndjson`: one line per record (or "
+        "`{\"name\"}` with `names_only=true`) followed by a final `{\"trailer\": {\"backend\", "
+        "\"elapsed_seconds\", \"count\", \"error\"?, \"details\"?}}` line. Filter queries are paged "
+        "straight from DocumentDB in `_id` order so memory stays flat regardless of result size. "
+        "Aggregations are run in full before the first line is sent, so for them streaming saves "
+        "no memory.\n\n"
+        "Non-streaming results are cached for `RETRIEVE_CACHE_TTL_S` (default 30s), keyed by a "
+        "canonical hash of the body, `projection`, `limit` and `names_only`. The `X-Cache` header "
+        "reports `HIT`, `MISS` or `BYPASS`; send `Cache-Control: no-cache` to skip the cache.\n\n"
+        "For filter queries, `page_size` (max 1000) returns one page ordered by `order_by` (`_id` "
+        "or `name`) plus `next_cursor`; pass it back as `cursor` with the same body and "
+        "parameters for the next page. `next_cursor` is null on the last page."
     ),
 )
 async def retrieve_records_endpoint(
@@ -346,32 +1000,28 @@ async def retrieve_records_endpoint(
     projection: Optional[str] = Query(
         default=None, description="JSON object specifying which fields to include/exclude (filter query only)"
     ),
+    stream: str = Query(default="false", description="'true' to stream records as NDJSON with a trailer line"),
+    page_size: Optional[int] = Query(
+        default=None, description="Return one page of this many records plus `next_cursor` (filter query only)"
+    ),
+    cursor: Optional[str] = Query(default=None, description="`next_cursor` from the previous page"),
+    order_by: str = Query(default="_id", description="Page ordering: '_id' or 'name' (with page_size)"),
 ):
     try:
         data = await request.json()
     except Exception:
         return JSONResponse(status_code=400, content={"error": "Invalid JSON format."})
 
+    stream_bool = stream.lower() == "true"
+    use_cache = not _cache_opt_out(request)
+
     # Aggregation path: body is a list (MongoDB aggregation pipeline)
     if isinstance(data, list):
-        try:
-            result = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: retrieve_aggregation(data),
-            )
-            response_body = {
-                "backend": result.backend,
-                "elapsed_seconds": result.elapsed_seconds,
-                "asset_names": result.asset_names,
-            }
-            if result.records is not None:
-                response_body["records"] = result.records
-            return JSONResponse(content=response_body)
-        except Exception as e:
+        if page_size is not None or cursor:
             return JSONResponse(
-                status_code=500,
-                content={"error": "Aggregation execution failed", "details": str(e)},
+                status_code=400, content={"error": "page_size and cursor apply to filter queries only."}
             )
+        return await _aggregation_response(data, stream_bool, use_cache)
 
     if not isinstance(data, dict):
         return JSONResponse(status_code=400, content={"error": "Request body must be a JSON object or a list (aggregation pipeline)."})
@@ -382,33 +1032,88 @@ async def retrieve_records_endpoint(
     except ValueError:
         return JSONResponse(status_code=400, content={"error": "limit must be an integer."})
 
-    projection_dict = None
-    if projection:
-        try:
-            projection_dict = json.loads(projection)
-            if not isinstance(projection_dict, dict):
-                raise ValueError
-        except (json.JSONDecodeError, ValueError):
-            return JSONResponse(status_code=400, content={"error": "projection must be a JSON object."})
+    error, projection_dict = _parse_projection(projection)
+    if error:
+        return JSONResponse(status_code=400, content={"error": error})
 
-    try:
-        result = await asyncio.get_event_loop().run_in_executor(
-            None,
-            lambda: retrieve_records(data, names_only=names_only_bool, limit=limit_int, projection=projection_dict),
-        )
-        response_body = {
-            "backend": result.backend,
-            "elapsed_seconds": result.elapsed_seconds,
-            "asset_names": result.asset_names,
-        }
-        if result.records is not None:
-            response_body["records"] = result.records
-        return JSONResponse(content=response_body)
-    except Exception as e:
-        return JSONResponse(
-            status_code=500,
-            content={"error": "Query execution failed", "details": str(e)},
+    if page_size is not None or cursor:
+        return await _paged_response(
+            data, projection_dict, names_only_bool, order_by, page_size, cursor, limit_int, stream_bool
         )
+    return await _filter_query_response(data, projection_dict, names_only_bool, limit_int, stream_bool, use_cache)
+
+
+@router.get(
+    "/retrieve-records/cache-stats",
+    tags=["query"],
+    summary="Counters for the /retrieve-records result cache",
+    description=(
+        "Returns the result cache `size`, `bytes`, `max_bytes`, `hits`, `misses`, `coalesced` "
+        "(identical queries that joined one in flight), `errors` and `hit_ratio`."
+    ),
+)
+async def retrieve_records_cache_stats():
+    return JSONResponse(content=_query_result_cache.stats())
+
+
+@router.get(
+    "/coalescing-stats",
+    tags=["query"],
+    summary="Request-coalescing counters for DocDB and LLM query-builder calls",
+    description=(
+        "Returns `{name: {\"calls\", \"executions\", \"coalesced\", \"in_flight\", "
+        "\"coalescing_ratio\"}}` for `retrieve_records`, `retrieve_aggregation`, "
+        "`fetch_v2_record` and `upgrade_query`. `coalesced` calls joined an identical call already "
+        "in flight instead of reaching DocDB or the LLM; `coalescing_ratio` = `coalesced / calls`."
+    ),
+)
+async def coalescing_stats_endpoint():
+    return JSONResponse(content=coalescing_stats())
+
+
+@router.get(
+    "/executor-stats",
+    tags=["health"],
+    summary="Queue depth and wait time for the named worker pools",
+    description=(
+        "Returns `{<pool>: {\"workers\", \"queued\", \"active\", \"completed\", \"mean_wait_s\", "
+        "\"max_wait_s\"}}` for the `docdb`, `s3`, `bedrock`, `cpu` and `disk` thread pools that run blocking "
+        "calls and the `validation` pool behind /gather. `mean_wait_s` and `max_wait_s` measure how long "
+        "jobs waited for a free worker."
+    ),
+)
+async def executor_stats():
+    return JSONResponse(content=executors.named_stats())
+
+
+@router.get(
+    "/docdb/pool-stats",
+    tags=["query"],
+    summary="Request counts and latency for the shared DocDB clients",
+    description=(
+        "Returns `{<api version>: {\"size\", \"requests\", \"errors\", \"mean_latency_s\", "
+        "\"clients\": [{\"requests\", \"errors\", \"mean_latency_s\", \"max_latency_s\"}]}}` "
+        "for each pool of long-lived DocDB API clients (`v1`, `v2`). `errors` counts failed "
+        "requests and 5xx responses."
+    ),
+)
+async def docdb_pool_stats():
+    return JSONResponse(content=docdb.stats())
+
+
+@router.get(
+    "/s3/client-stats",
+    tags=["health"],
+    summary="Call counts, latency and bytes for the shared S3 client",
+    description=(
+        "Returns `{<operation>: {\"calls\", \"errors\", \"mean_latency_s\", \"max_latency_s\", "
+        "\"bytes_sent\", \"bytes_received\"}}` for each S3 API operation (`GetObject`, `PutObject`, "
+        "`ListObjectsV2`, ...) made by the contributions, acquisitions, pinpoint and chat-log stores. "
+        "`errors` counts failed calls and 5xx responses."
+    ),
+)
+async def s3_client_stats():
+    return JSONResponse(content=s3.stats())
 
 
 _UPGRADE_FIELD_CONVERSION_MAP = {
@@ -416,6 +1121,8 @@ _UPGRADE_FIELD_CONVERSION_MAP = {
     "rig": "instrument",
 }
 
+_UPGRADE_RESPONSE_FORMATS = ("full", "patch")
+
 _UPGRADE_CORE_FILES = [
     "data_description",
     "procedures",
@@ -429,79 +1136,276 @@ _UPGRADE_CORE_FILES = [
 ]
 
 
-def _run_upgrade_on_dict(record: dict) -> dict:
-    record = dict(record)
-    record.setdefault("_id", record.get("name", "upload"))
-    record.setdefault("name", record.get("_id", "upload"))
-    record.setdefault("location", "")
+@functools.cache
+def _current_core_models() -> dict:
+    """Core files that exist in the installed aind-data-schema, with the model that validates them.
+
+    ``session`` and ``rig`` were renamed, so they always need the upgrader.
+    """
+    from aind_data_schema.core.acquisition import Acquisition
+    from aind_data_schema.core.data_description import DataDescription
+    from aind_data_schema.core.instrument import Instrument
+    from aind_data_schema.core.procedures import Procedures
+    from aind_data_schema.core.processing import Processing
+    from aind_data_schema.core.quality_control import QualityControl
+    from aind_data_schema.core.subject import Subject
+
+    return {
+        "data_description": DataDescription,
+        "procedures": Procedures,
+        "subject": Subject,
+        "acquisition": Acquisition,
+        "instrument": Instrument,
+        "processing": Processing,
+        "quality_control": QualityControl,
+    }
+
+
+@functools.cache
+def _current_schema_versions() -> dict:
+    return {
+        core_file: model.model_fields["schema_version"].default for core_file, model in _current_core_models().items()
+    }
+
+
+def _copy_json(value):
+    """Copy the dicts and lists of a JSON-shaped value, sharing the immutable leaves.
+
+    Cheaper than ``copy.deepcopy`` for decoded JSON: no memo table, no
+    per-object dispatch.
+    """
+    if type(value) is dict:
+        return {key: _copy_json(item) for key, item in value.items()}
+    if type(value) is list:
+        return [_copy_json(item) for item in value]
+    return value
+
+
+def _with_upgrade_defaults(record: dict) -> dict:
+    # Shallow copy: the caller's record is never mutated, so its core files
+    # double as the "original" side of the response.
+    original_record = dict(record)
+    original_record.setdefault("_id", original_record.get("name", "upload"))
+    original_record.setdefault("name", original_record.get("_id", "upload"))
+    original_record.setdefault("location", "")
+    return original_record
+
+
+def _present_core_files(original_record: dict) -> List[str]:
+    return [core_file for core_file in _UPGRADE_CORE_FILES if original_record.get(core_file)]
+
+
+def _file_result(
+    original_record: dict, core_file: str, upgraded, error: Optional[str], as_patch: bool = False
+) -> dict:
+    """One ``files_tested`` entry. With ``as_patch``, ``upgraded`` is already the patch from the original."""
+    if as_patch:
+        return {
+            "success": error is None,
+            "error": error,
+            "patch": upgraded,
+            "converted_to": _UPGRADE_FIELD_CONVERSION_MAP.get(core_file),
+        }
+    return {
+        "success": error is None,
+        "error": error,
+        "original": original_record.get(core_file),
+        "upgraded": upgraded,
+        "converted_to": _UPGRADE_FIELD_CONVERSION_MAP.get(core_file),
+    }
+
+
+def _upgraded_output(original_record: dict, core_file: str, upgraded, as_patch: bool):
+    if not as_patch or upgraded is None:
+        return upgraded
+    return make_patch(original_record[core_file], upgraded)
 
-    original_record = copy.deepcopy(record)
 
+def _is_current(core_file: str, value) -> bool:
+    """Whether ``value`` already declares the installed schema version for ``core_file``."""
+    current_version = _current_schema_versions().get(core_file)
+    return current_version is not None and isinstance(value, dict) and value.get("schema_version") == current_version
+
+
+def _validate_current_fields(original_record: dict, core_files: List[str]) -> dict:
+    """Validate the core files that are already on the installed schema version.
+
+    Returns ``{core_file: validated JSON}`` for those that pass. Outdated
+    files, and current ones that fail validation, are left out for the
+    upgrader (with its repairs).
+    """
+    validated = {}
+    for core_file in core_files:
+        if not _is_current(core_file, original_record[core_file]):
+            continue
+        try:
+            model = _current_core_models()[core_file].model_validate(_copy_json(original_record[core_file]))
+        except Exception:
+            continue
+        validated[core_file] = model.model_dump(mode="json")
+    return validated
+
+
+def _upgrade_whole_record(original_record: dict, include_original: bool = True, as_patch: bool = False) -> dict:
+    """Upgrade the whole record at once; ``files_tested`` stays empty on failure.
+
+    Core files already on the installed schema version are only validated
+    and listed in ``skipped_fields``. If every file is current, that is the
+    whole result. If only some are, the upgrader is not run here either:
+    the result has ``overall_success`` False with just the skipped files in
+    ``files_tested``, and ``_upgrade_record`` upgrades the outdated ones
+    field by field.
+
+    With ``include_original=False`` the ``original`` entries are left as
+    None for the caller to fill in, so a pool worker doesn't send the
+    record straight back. With ``as_patch`` each entry carries a JSON Patch
+    from the original instead of the original and upgraded documents.
+    """
     results = {
         "overall_success": False,
         "overall_error": None,
+        "skipped_fields": [],
         "files_tested": {},
     }
-
-    try:
-        upgrader = Upgrade(copy.deepcopy(record))
-        upgraded_metadata = upgrader.metadata.model_dump(mode="json")
-        results["overall_success"] = True
-
-        for core_file in _UPGRADE_CORE_FILES:
-            if core_file in original_record and original_record[core_file]:
-                converted_to = _UPGRADE_FIELD_CONVERSION_MAP.get(core_file)
-                target_field = converted_to if converted_to else core_file
-                results["files_tested"][core_file] = {
-                    "success": True,
-                    "error": None,
-                    "original": original_record[core_file],
-                    "upgraded": upgraded_metadata.get(target_field),
-                    "converted_to": converted_to,
-                }
-
+    source = original_record if include_original else {}
+
+    present = _present_core_files(original_record)
+    validated = _validate_current_fields(original_record, present)
+    if validated:
+        results["overall_success"] = len(validated) == len(present)
+        results["skipped_fields"] = list(validated)
+        for core_file, value in validated.items():
+            output = _upgraded_output(original_record, core_file, value, as_patch)
+            results["files_tested"][core_file] = _file_result(source, core_file, output, None, as_patch)
         return results
 
+    from aind_metadata_upgrader.upgrade import Upgrade
+
+    try:
+        # Each Upgrade gets its own copy: the upgrader and the schema's
+        # before-validators edit their input in place.
+        metadata = Upgrade(_copy_json(original_record)).metadata
+        # The upgrader and its working copy are gone by now; only the model
+        # and its dump are alive together.
+        upgraded_metadata = metadata.model_dump(mode="json")
+        del metadata
     except Exception as e:
         results["overall_error"] = str(e)
         results["overall_traceback"] = traceback.format_exc()
+        return results
 
-    for core_file in _UPGRADE_CORE_FILES:
-        if core_file not in original_record or not original_record[core_file]:
-            continue
+    results["overall_success"] = True
+    for core_file in present:
+        target_field = _UPGRADE_FIELD_CONVERSION_MAP.get(core_file, core_file)
+        output = _upgraded_output(original_record, core_file, upgraded_metadata.get(target_field), as_patch)
+        results["files_tested"][core_file] = _file_result(source, core_file, output, None, as_patch)
+    return results
 
-        converted_to = _UPGRADE_FIELD_CONVERSION_MAP.get(core_file)
-        test_dict = {core_file: copy.deepcopy(original_record[core_file])}
-        if core_file != "subject" and "subject" in original_record:
-            test_dict["subject"] = copy.deepcopy(original_record["subject"])
-        test_dict["_id"] = record.get("_id", "upload")
-        test_dict["name"] = record.get("name", "upload")
-        test_dict["location"] = record.get("location", "")
 
-        try:
-            field_upgrader = Upgrade(test_dict, skip_metadata_validation=True)
-            field_upgraded = field_upgrader.metadata.model_dump(mode="json")
-            target_field = converted_to if converted_to else core_file
-            results["files_tested"][core_file] = {
-                "success": True,
-                "error": None,
-                "original": original_record[core_file],
-                "upgraded": field_upgraded.get(target_field),
-                "converted_to": converted_to,
-            }
-        except Exception as e:
-            results["files_tested"][core_file] = {
-                "success": False,
-                "error": str(e),
-                "original": original_record[core_file],
-                "upgraded": None,
-                "converted_to": converted_to,
-            }
+def _field_upgrade_input(original_record: dict, core_file: str) -> dict:
+    """The part of the record the per-field fallback upgrade of ``core_file`` needs."""
+    field_input = {core_file: original_record[core_file]}
+    if core_file != "subject" and "subject" in original_record:
+        field_input["subject"] = original_record["subject"]
+    for key in ("_id", "name", "location"):
+        field_input[key] = original_record[key]
+    return field_input
 
-    successful_fields = [f for f, r in results["files_tested"].items() if r["success"]]
-    results["partial_success"] = len(successful_fields) > 0
 
-    return results
+def _upgrade_single_field(
+    core_file: str, field_input: dict, as_patch: bool = False
+) -> Tuple[Optional[Any], Optional[str]]:
+    """Upgrade one core file on its own. Returns ``(upgraded or patch, error)``."""
+    from aind_metadata_upgrader.upgrade import Upgrade
+
+    try:
+        field_metadata = Upgrade(_copy_json(field_input), skip_metadata_validation=True).metadata
+        field_upgraded = field_metadata.model_dump(mode="json")
+    except Exception as e:
+        return None, str(e)
+    upgraded = field_upgraded.get(_UPGRADE_FIELD_CONVERSION_MAP.get(core_file, core_file))
+    return _upgraded_output(field_input, core_file, upgraded, as_patch), None
+
+
+async def _run_on_upgrade_pool(fn, *args, wait_if_saturated: bool) -> Any:
+    while True:
+        try:
+            return await upgrade_pool().run(fn, *args, timeout=executors.UPGRADE_JOB_TIMEOUT_S)
+        except PoolSaturated:
+            if not wait_if_saturated:
+                raise
+            await asyncio.sleep(0.5)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM on a huge record); start a fresh pool for the next job.
+            executors.reset_upgrade_pool()
+            raise
+
+
+async def _upgrade_record(
+    record: dict, wait_if_saturated: bool = False, as_patch: bool = False
+) -> Tuple[dict, bool]:
+    """Upgrade ``record`` on the upgrade pool; the code path behind /upgrade.
+
+    If the whole-record upgrade fails, or it was skipped because only some
+    core files are outdated, every core file not yet in ``files_tested`` is
+    upgraded on its own concurrently, so the fallback takes as long as the
+    slowest field rather than the sum. Fields still running after ``UPGRADE_FALLBACK_TIMEOUT_S``
+    are reported as failed. Only the first job can raise ``PoolSaturated``;
+    fallback jobs wait for a free slot. ``as_patch`` is passed on to the
+    workers, so patches are computed there.
+
+    Returns ``(results, deterministic)``; ``deterministic`` is False when a
+    field failed for reasons other than the upgrade itself (timeouts, pool
+    errors), i.e. when the same input might give a different result.
+    """
+    original_record = _with_upgrade_defaults(record)
+    results = await _run_on_upgrade_pool(
+        _upgrade_whole_record, original_record, False, as_patch, wait_if_saturated=wait_if_saturated
+    )
+    if not as_patch:
+        for core_file, file_result in results["files_tested"].items():
+            file_result["original"] = original_record[core_file]
+    if results["overall_success"]:
+        return results, True
+
+    tasks = {
+        core_file: asyncio.ensure_future(
+            _run_on_upgrade_pool(
+                _upgrade_single_field,
+                core_file,
+                _field_upgrade_input(original_record, core_file),
+                as_patch,
+                wait_if_saturated=True,
+            )
+        )
+        for core_file in _present_core_files(original_record)
+        if core_file not in results["files_tested"]
+    }
+    if tasks:
+        _, pending = await asyncio.wait(tasks.values(), timeout=executors.UPGRADE_FALLBACK_TIMEOUT_S)
+        for task in pending:
+            task.cancel()
+
+    deterministic = True
+    for core_file, task in tasks.items():
+        if not task.done() or task.cancelled():
+            upgraded = None
+            error = f"Upgrade did not finish within {executors.UPGRADE_FALLBACK_TIMEOUT_S:g} seconds."
+            deterministic = False
+        elif task.exception() is not None:
+            upgraded, error = None, str(task.exception()) or type(task.exception()).__name__
+            deterministic = False
+        else:
+            upgraded, error = task.result()
+        results["files_tested"][core_file] = _file_result(original_record, core_file, upgraded, error, as_patch)
+    if results.get("skipped_fields"):
+        # Only the outdated files went through the upgrader, so there is no
+        # whole-record failure to report: the record is fine if they all are.
+        results["overall_success"] = all(r["success"] for r in results["files_tested"].values())
+    results["partial_success"] = not results["overall_success"] and any(
+        r["success"] for r in results["files_tested"].values()
+    )
+    return results, deterministic
 
 
 @router.post(
@@ -512,10 +1416,22 @@ def _run_upgrade_on_dict(record: dict) -> dict:
         "Accepts a `metadata.json`-shaped dict (or fetches one via `asset_name`) and runs it "
         "through [aind-metadata-upgrader](https://github.com/AllenNeuralDynamics/aind-metadata-upgrader). "
         "Always returns original and upgraded JSON side by side for each core field, even when "
-        "some fields fail: `{\"overall_success\", \"overall_error\", \"partial_success\"?, "
+        "some fields fail: `{\"overall_success\", \"overall_error\", \"partial_success\"?, \"skipped_fields\", "
         "\"files_tested\": {<field>: {\"success\", \"error\", \"original\", \"upgraded\", "
         "\"converted_to\"?}}}`. Fields that rename across schema versions (e.g. `session` → "
-        "`acquisition`, `rig` → `instrument`) include a `converted_to` key."
+        "`acquisition`, `rig` → `instrument`) include a `converted_to` key.\n\n"
+        "Core fields that already have the installed aind-data-schema `schema_version` skip the "
+        "upgrader and are only validated; they are listed in `skipped_fields`. When only some "
+        "fields are current, the others are upgraded one field at a time.\n\n"
+        "Upgrades run on a dedicated worker pool. Returns 503 (with `Retry-After`) when every "
+        "worker is busy and the queue is full, and 504 if the upgrade takes longer than "
+        "`UPGRADE_JOB_TIMEOUT_S`. If the whole-record upgrade fails, each core field is retried "
+        "on its own in parallel; fields not done within `UPGRADE_FALLBACK_TIMEOUT_S` are reported "
+        "as failed.\n\n"
+        "Results are cached by a hash of the record and the installed aind-metadata-upgrader and "
+        "aind-data-schema versions; the `X-Cache` header reports `HIT`, `DISK` or `MISS`.\n\n"
+        "With `format=patch`, each field carries `patch`, an RFC 6902 JSON Patch from the original "
+        "to the upgraded document, instead of `original` and `upgraded`."
     ),
 )
 async def upgrade_endpoint(
@@ -523,37 +1439,433 @@ async def upgrade_endpoint(
     asset_name: Optional[str] = Query(
         default=None, description="Fetch and upgrade an existing asset by name instead of using the request body"
     ),
+    response_format: str = Query(
+        default="full",
+        alias="format",
+        description="`full` (original and upgraded documents) or `patch` (JSON Patch per field)",
+    ),
 ):
+    if response_format not in _UPGRADE_RESPONSE_FORMATS:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"Invalid format '{response_format}'. Use 'full' or 'patch'."},
+        )
     if asset_name:
-        try:
-            def _fetch_v1_record():
-                client = MetadataDbClient(host=_DOCDB_HOST, version="v1")
-                records = client.retrieve_docdb_records(filter_query={"name": asset_name})
-                return records
+        error, data = await _fetch_upgrade_asset(asset_name)
+    else:
+        error, data = await _read_upgrade_body(request)
+    if error is not None:
+        return error
+    return await _upgrade_response(data, as_patch=response_format == "patch")
+
+
+def _fetch_v1_record(asset_name: str) -> List[dict]:
+    return docdb_client("v1").retrieve_docdb_records(filter_query={"name": asset_name})
+
+
+async def _fetch_upgrade_asset(asset_name: str) -> Tuple[Optional[JSONResponse], Optional[dict]]:
+    """Return (error response, v1 record to upgrade). One is always None."""
+    try:
+        records = await run_in("docdb", _fetch_v1_record, asset_name)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": f"Failed to fetch record: {str(e)}"}), None
+    if not records:
+        return JSONResponse(status_code=404, content={"error": f"Asset '{asset_name}' not found."}), None
+    return None, records[0]
+
+
+async def _read_upgrade_body(request: Request) -> Tuple[Optional[JSONResponse], Optional[dict]]:
+    """Return (error response, record to upgrade) from the /upgrade body. One is always None."""
+    try:
+        data = await request.json()
+    except Exception:
+        return JSONResponse(status_code=400, content={"error": "Invalid JSON format."}), None
+    if not isinstance(data, dict):
+        return JSONResponse(status_code=400, content={"error": "Request body must be a JSON object."}), None
+    if not any(data.get(f) for f in _UPGRADE_CORE_FILES):
+        return (
+            JSONResponse(status_code=400, content={"error": "No recognized metadata fields found in request body."}),
+            None,
+        )
+    return None, data
+
+
+_UPGRADE_LIBRARY_VERSIONS = (
+    f"aind-metadata-upgrader=={version('aind-metadata-upgrader')};aind-data-schema=={version('aind-data-schema')}"
+)
+
+
+class _UpgradeOutput(NamedTuple):
+    """An encoded /upgrade response body plus what /upgrade/batch needs to tally it."""
+
+    body: bytes
+    outcome: dict
+    cacheable: bool
+
+
+# Content-addressed: the key covers the record and the library versions, so
+# an upgrade of either library invalidates every entry.
+_upgrade_cache = AsyncTTLCache(
+    "upgrade",
+    ttl_s=UPGRADE_CACHE_TTL_S,
+    stale_s=0,
+    maxsize=UPGRADE_CACHE_MAX_ENTRIES,
+    should_cache=lambda output: output.cacheable,
+    max_bytes=UPGRADE_CACHE_MAX_BYTES,
+    sizeof=lambda output: len(output.body),
+)
+
+
+def _upgrade_cache_key(record: dict, as_patch: bool = False) -> str:
+    canonical = json.dumps(record, sort_keys=True, separators=(",", ":"), default=str)
+    response_format = "patch" if as_patch else "full"
+    return hashlib.sha256(f"{_UPGRADE_LIBRARY_VERSIONS}\n{response_format}\n{canonical}".encode()).hexdigest()
 
-            records = await asyncio.get_event_loop().run_in_executor(None, _fetch_v1_record)
-        except Exception as e:
-            return JSONResponse(status_code=500, content={"error": f"Failed to fetch record: {str(e)}"})
 
-        if not records:
-            return JSONResponse(status_code=404, content={"error": f"Asset '{asset_name}' not found."})
+def _encode_upgrade_output(results: dict, cacheable: bool) -> _UpgradeOutput:
+    outcome = {
+        "overall_success": results.get("overall_success", False),
+        "partial_success": results.get("partial_success", False),
+        "files": {core_file: r["success"] for core_file, r in results.get("files_tested", {}).items()},
+    }
+    return _UpgradeOutput(json.dumps(results).encode(), outcome, cacheable)
+
+
+# Disk entries live under a directory named for the library versions, so
+# entries written by older versions can be removed wholesale.
+_upgrade_disk_lock = threading.Lock()
+_upgrade_disk_bytes: Optional[int] = None
+
+
+def _upgrade_disk_version_dir() -> str:
+    return os.path.join(UPGRADE_CACHE_DIR, hashlib.sha256(_UPGRADE_LIBRARY_VERSIONS.encode()).hexdigest()[:16])
+
+
+def _upgrade_disk_path(key: str) -> str:
+    return os.path.join(_upgrade_disk_version_dir(), key[:2], f"{key}.json")
+
+
+def _evict_upgrade_disk_cache() -> None:
+    """Delete the least recently used entries until the tier is under 90% of its cap.
+
+    Call with ``_upgrade_disk_lock`` held.
+    """
+    global _upgrade_disk_bytes
+    entries = []
+    for root, _, files in os.walk(_upgrade_disk_version_dir()):
+        for filename in files:
+            path = os.path.join(root, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    if total > UPGRADE_CACHE_DISK_MAX_BYTES:
+        for _, size, path in sorted(entries):
+            if total <= UPGRADE_CACHE_DISK_MAX_BYTES * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+    _upgrade_disk_bytes = total
+
+
+def prune_upgrade_disk_cache() -> None:
+    """Remove entries from other library versions and enforce the size cap.
+
+    Called from the app lifespan; a no-op without ``UPGRADE_CACHE_DIR``.
+    """
+    if not UPGRADE_CACHE_DIR or not os.path.isdir(UPGRADE_CACHE_DIR):
+        return
+    current = os.path.basename(_upgrade_disk_version_dir())
+    with _upgrade_disk_lock:
+        for entry in os.scandir(UPGRADE_CACHE_DIR):
+            if entry.is_dir() and entry.name != current:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        _evict_upgrade_disk_cache()
+
+
+def _read_upgrade_disk_cache(key: str) -> Optional[_UpgradeOutput]:
+    """Disk entries are the outcome JSON on the first line, then the response body."""
+    path = _upgrade_disk_path(key)
+    try:
+        with open(path, "rb") as f:
+            outcome_line, body = f.read().split(b"\n", 1)
+        # Eviction is least recently used by mtime.
+        os.utime(path)
+        return _UpgradeOutput(body, json.loads(outcome_line), True)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable upgrade cache entry {key}: {e}")
+        return None
+
+
+def _write_upgrade_disk_cache(key: str, output: _UpgradeOutput) -> None:
+    global _upgrade_disk_bytes
+    path = _upgrade_disk_path(key)
+    data = json.dumps(output.outcome).encode() + b"\n" + output.body
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logging.warning(f"Unable to write upgrade cache entry {key}: {e}")
+        return
+    with _upgrade_disk_lock:
+        if _upgrade_disk_bytes is None:
+            _evict_upgrade_disk_cache()
+        else:
+            _upgrade_disk_bytes += len(data)
+            if _upgrade_disk_bytes > UPGRADE_CACHE_DISK_MAX_BYTES:
+                _evict_upgrade_disk_cache()
+
+
+async def _cached_upgrade(
+    record: dict, wait_if_saturated: bool = False, as_patch: bool = False
+) -> Tuple[_UpgradeOutput, str]:
+    """Upgrade ``record`` through the memory (and optional disk) cache.
+
+    Returns the output and a cache status for the ``X-Cache`` header:
+    ``HIT`` (memory, including joining an identical upgrade in flight),
+    ``DISK`` or ``MISS``.
+    """
+    loop = asyncio.get_running_loop()
+    key = await run_in("cpu", _upgrade_cache_key, record, as_patch)
+    from_disk = False
+
+    async def load() -> _UpgradeOutput:
+        nonlocal from_disk
+        if UPGRADE_CACHE_DIR:
+            output = await run_in("disk", _read_upgrade_disk_cache, key)
+            if output is not None:
+                from_disk = True
+                return output
+        results, deterministic = await _upgrade_record(record, wait_if_saturated, as_patch)
+        output = await run_in("cpu", _encode_upgrade_output, results, deterministic)
+        if UPGRADE_CACHE_DIR and output.cacheable:
+            loop.run_in_executor(named_executor("disk"), _write_upgrade_disk_cache, key, output)
+        return output
+
+    output, status = await _upgrade_cache.get_with_status(key, load)
+    if status != "miss":
+        return output, "HIT"
+    return output, "DISK" if from_disk else "MISS"
+
+
+async def _upgrade_response(data: dict, as_patch: bool = False) -> Response:
+    """Run ``_cached_upgrade``, mapping pool errors to 503/504/500."""
+    try:
+        output, cache_status = await _cached_upgrade(data, as_patch=as_patch)
+    except PoolSaturated:
+        return JSONResponse(
+            status_code=503,
+            content={"error": "All upgrade workers are busy, retry shortly."},
+            headers={"Retry-After": "5"},
+        )
+    except asyncio.TimeoutError:
+        return JSONResponse(
+            status_code=504,
+            content={"error": f"Upgrade did not finish within {executors.UPGRADE_JOB_TIMEOUT_S:g} seconds."},
+        )
+    except BrokenProcessPool as e:
+        return JSONResponse(status_code=500, content={"error": "Upgrade worker crashed", "details": str(e)})
+    return Response(content=output.body, media_type="application/json", headers={"X-Cache": cache_status})
+
+
+def _fetch_v1_page(filter_query: dict, after_id: Optional[str], page_size: int) -> List[dict]:
+    """Fetch up to ``page_size`` v1 records in ``_id`` order, starting after ``after_id``."""
+    if after_id is not None:
+        filter_query = {"$and": [filter_query, _after_cursor("_id", [after_id])]}
+    return docdb_client("v1").retrieve_docdb_records(filter_query=filter_query, sort={"_id": 1}, limit=page_size)
+
+
+class _PageFetchFailed(Exception):
+    pass
+
+
+async def _v1_pages(filter_query: dict, max_items: int) -> AsyncIterator[List[dict]]:
+    """Yield non-empty pages of v1 records, ``max_items`` records at most.
 
-        data = records[0]
+    Pages of ``UPGRADE_BATCH_PAGE_SIZE`` are keyset-paginated on ``_id``.
+    The next page is fetched while the caller works on the current one, so
+    at most two pages are held in memory. A failed fetch raises
+    ``_PageFetchFailed``.
+    """
+
+    def fetch(after_id: Optional[str], fetched: int) -> Awaitable[List[dict]]:
+        page_size = min(UPGRADE_BATCH_PAGE_SIZE, max_items - fetched)
+        return asyncio.ensure_future(run_in("docdb", _fetch_v1_page, filter_query, after_id, page_size))
+
+    next_page = fetch(None, 0)
+    fetched = 0
+    try:
+        while next_page is not None:
+            try:
+                page = await next_page
+            except Exception as e:
+                next_page = None
+                raise _PageFetchFailed(str(e)) from e
+            fetched += len(page)
+            next_page = fetch(page[-1]["_id"], fetched) if page and fetched < max_items else None
+            if page:
+                yield page
+            del page
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+
+
+async def _upgrade_batch_item(
+    record: dict, semaphore: asyncio.Semaphore, as_patch: bool
+) -> Tuple[dict, Optional[_UpgradeOutput]]:
+    """Upgrade one /upgrade/batch record; returns its line and output (None on error)."""
+    name = record.get("name")
+    async with semaphore:
+        try:
+            output, _ = await _cached_upgrade(record, wait_if_saturated=True, as_patch=as_patch)
+            return {"asset_name": name, "status": 200}, output
+        except asyncio.TimeoutError:
+            return {"asset_name": name, "status": 504, "error": "Upgrade timed out"}, None
+        except Exception as e:
+            return {"asset_name": name, "status": 500, "error": "Upgrade failed", "details": str(e)}, None
+
+
+def _tally_upgrade(summary: dict, output: Optional[_UpgradeOutput]) -> None:
+    """Count one /upgrade/batch result (None for an error) into ``summary``."""
+    summary["assets"] += 1
+    if output is None:
+        summary["errors"] += 1
+        return
+    if output.outcome["overall_success"]:
+        summary["upgraded"] += 1
+    elif output.outcome["partial_success"]:
+        summary["partial"] += 1
     else:
+        summary["failed"] += 1
+    for core_file, success in output.outcome["files"].items():
+        counts = summary["files"].setdefault(core_file, {"success": 0, "failure": 0})
+        counts["success" if success else "failure"] += 1
+
+
+def _upgrade_batch_line(line: dict, output: Optional[_UpgradeOutput]) -> bytes:
+    if output is None:
+        return _ndjson_line(line)
+    # Splice the already-encoded body in rather than decoding it again.
+    return json.dumps(line)[:-1].encode() + b', "result": ' + output.body + b"}\n"
+
+
+def _not_found_lines(asset_names: Optional[List[str]], seen: set) -> List[bytes]:
+    return [
+        _ndjson_line({"asset_name": name, "status": 404, "error": f"Asset '{name}' not found."})
+        for name in asset_names or []
+        if name not in seen
+    ]
+
+
+async def _upgrade_batch_lines(
+    filter_query: dict, asset_names: Optional[List[str]], max_items: int, as_patch: bool = False
+) -> AsyncIterator[bytes]:
+    """Yield one NDJSON line per upgraded asset, then a summary line.
+
+    v1 records come from ``_v1_pages`` and each page is upgraded on the
+    upgrade pool while the next one is fetched.
+    """
+    semaphore = asyncio.Semaphore(upgrade_pool().max_workers)
+    summary = {"assets": 0, "upgraded": 0, "partial": 0, "failed": 0, "errors": 0, "not_found": 0, "files": {}}
+    seen = set()
+    tasks = []
+    fetched = 0
+    pages = _v1_pages(filter_query, max_items)
+    try:
         try:
-            data = await request.json()
-        except Exception:
-            return JSONResponse(status_code=400, content={"error": "Invalid JSON format."})
+            async for page in pages:
+                fetched += len(page)
+                tasks = [asyncio.ensure_future(_upgrade_batch_item(record, semaphore, as_patch)) for record in page]
+                seen.update(record.get("name") for record in page)
+                del page
+                for next_done in asyncio.as_completed(tasks):
+                    line, output = await next_done
+                    _tally_upgrade(summary, output)
+                    yield _upgrade_batch_line(line, output)
+        except _PageFetchFailed as e:
+            summary["fetch_error"] = f"Failed to fetch records: {e}"
+        else:
+            not_found = _not_found_lines(asset_names, seen)
+            summary["not_found"] = len(not_found)
+            for line in not_found:
+                yield line
+        summary["truncated"] = asset_names is None and fetched >= max_items
+        yield _ndjson_line({"summary": summary})
+    finally:
+        for task in tasks:
+            task.cancel()
+        await pages.aclose()
 
-        if not isinstance(data, dict):
-            return JSONResponse(status_code=400, content={"error": "Request body must be a JSON object."})
 
-        has_core_fields = any(data.get(f) for f in _UPGRADE_CORE_FILES)
-        if not has_core_fields:
+@router.post(
+    "/upgrade/batch",
+    tags=["upgrade"],
+    summary="Upgrade many DocDB assets and stream the results",
+    description=(
+        "Body: `{\"asset_names\": [...]}` or `{\"filter\": {...}}` (a v1 DocDB filter query). "
+        "Matching v1 records are fetched in pages with one `$in`/filter query each and upgraded in "
+        "parallel on the /upgrade worker pool. Streams `application/x-ndjson`: one "
+        "`{\"asset_name\", \"status\", \"result\"?, \"error\"?}` line per asset as it finishes "
+        "(`result` is the /upgrade response body; names with no record get status 404), then "
+        "`{\"summary\": {\"assets\", \"upgraded\", \"partial\", \"failed\", \"errors\", "
+        "\"not_found\", \"truncated\", \"fetch_error\"?, \"files\": {<field>: {\"success\", \"failure\"}}}}`. "
+        "At most 1000 assets per request. `\"format\": \"patch\"` returns JSON Patches as in /upgrade."
+    ),
+)
+async def upgrade_batch(request: Request):
+    try:
+        data = await request.json()
+    except Exception:
+        return JSONResponse(status_code=400, content={"error": "Invalid JSON format."})
+    if not isinstance(data, dict):
+        return JSONResponse(status_code=400, content={"error": "Request body must be a JSON object."})
+
+    asset_names = data.get("asset_names")
+    filter_query = data.get("filter")
+    if (asset_names is None) == (filter_query is None):
+        return JSONResponse(status_code=400, content={"error": "Provide exactly one of asset_names or filter."})
+    if asset_names is not None:
+        if not isinstance(asset_names, list) or not asset_names or not all(isinstance(n, str) for n in asset_names):
+            return JSONResponse(status_code=400, content={"error": "asset_names must be a non-empty list of strings."})
+        asset_names = list(dict.fromkeys(asset_names))
+        if len(asset_names) > UPGRADE_BATCH_MAX_ITEMS:
             return JSONResponse(
                 status_code=400,
-                content={"error": "No recognized metadata fields found in request body."},
+                content={"error": f"asset_names exceeds maximum of {UPGRADE_BATCH_MAX_ITEMS} assets."},
             )
+        filter_query = {"name": {"$in": asset_names}}
+    elif not isinstance(filter_query, dict):
+        return JSONResponse(status_code=400, content={"error": "filter must be a JSON object."})
+    response_format = data.get("format", "full")
+    if response_format not in _UPGRADE_RESPONSE_FORMATS:
+        return JSONResponse(status_code=400, content={"error": "format must be 'full' or 'patch'."})
+
+    return StreamingResponse(
+        _upgrade_batch_lines(filter_query, asset_names, UPGRADE_BATCH_MAX_ITEMS, response_format == "patch"),
+        media_type="application/x-ndjson",
+    )
 
-    result = _run_upgrade_on_dict(data)
-    return JSONResponse(content=result)
+
+@router.get(
+    "/upgrade/pool-stats",
+    tags=["upgrade"],
+    summary="Queue depth and counters for the /upgrade worker pool",
+    description=(
+        "Returns `{\"workers\", \"max_queue\", \"active\", \"queued\", \"completed\", "
+        "\"rejected\" (answered 503), \"timeouts\" (answered 504), \"cache\"}` where `cache` holds "
+        "the upgrade result cache counters."
+    ),
+)
+async def upgrade_pool_stats():
+    return JSONResponse(content={**upgrade_pool().stats(), "cache": _upgrade_cache.stats()})
@@ -0,0 +1,442 @@
+"""Worker pools for blocking work that must not run on the event loop.
+
+The upgrade pool runs ``_upgrade_whole_record`` and the per-field fallback
+``_upgrade_single_field`` for /upgrade behind a ``BoundedPool`` that caps
+queued jobs and times callers out.
+
+Every other blocking call goes through ``run_in(name, fn, ...)`` on one of
+the named thread pools below, one per dependency class, so a burst of slow
+calls to one dependency (e.g. Bedrock) cannot starve the others:
+
+* ``docdb`` — DocDB API requests.
+* ``s3`` — S3 reads and writes (contributions, acquisitions, pinpoint, logs).
+* ``bedrock`` — Bedrock model calls (/chat, /summary, /upgrade-query).
+* ``cpu`` — short CPU-bound steps such as hashing and encoding.
+* ``disk`` — local file I/O (the /upgrade disk cache), so a slow disk
+  holds up neither the CPU steps nor S3.
+* ``validation`` — the pydantic validation stage of /gather; threads or,
+  with ``GATHER_VALIDATION_POOL=process``, processes.
+
+Read-modify-write updates of one shared object (an S3 JSON document or
+log file) take ``key_lock(key)`` so concurrent workers don't lose each
+other's updates. A key's lock is dropped once nobody holds it.
+
+Each named pool reports its queue depth, active workers and how long jobs
+waited for a worker (``named_stats()``). Pools are created in the app
+lifespan (or lazily on first use) and shut down with it.
+
+Environment variables
+---------------------
+GATHER_VALIDATION_POOL
+    ``thread`` (default) or ``process``. A thread pool keeps the event loop
+    responsive with no pickling overhead; a process pool also lets several
+    validations run in parallel across cores.
+GATHER_VALIDATION_WORKERS
+    Validation pool size. Defaults to the number of CPUs available to the
+    container.
+UPGRADE_POOL
+    ``process`` (default) or ``thread``.
+PROCESS_START_METHOD
+    How process-pool workers are started: ``forkserver`` (default) or
+    ``spawn``. ``fork`` is unsafe in a multi-threaded server.
+UPGRADE_WORKERS
+    Upgrade pool size. Defaults to the number of CPUs available.
+UPGRADE_MAX_QUEUE
+    Jobs allowed to wait for a free upgrade worker before new ones are
+    rejected (default 8).
+UPGRADE_JOB_TIMEOUT_S
+    Seconds a caller waits for its upgrade (default 60).
+UPGRADE_FALLBACK_TIMEOUT_S
+    Cap on the per-field fallback that runs when a whole-record upgrade
+    fails (default 30); fields still running are reported as failed.
+DOCDB_WORKERS, S3_WORKERS, BEDROCK_WORKERS, CPU_WORKERS, DISK_WORKERS
+    Sizes of the named pools (defaults 16, 16, 8, the number of CPUs
+    available, and 4).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import math
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Executor, Future, InvalidStateError, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Union
+
+GATHER_VALIDATION_POOL = os.environ.get("GATHER_VALIDATION_POOL", "thread").strip().lower()
+UPGRADE_POOL = os.environ.get("UPGRADE_POOL", "process").strip().lower()
+PROCESS_START_METHOD = os.environ.get("PROCESS_START_METHOD", "forkserver").strip().lower()
+UPGRADE_MAX_QUEUE = int(os.environ.get("UPGRADE_MAX_QUEUE", "8"))
+UPGRADE_JOB_TIMEOUT_S = float(os.environ.get("UPGRADE_JOB_TIMEOUT_S", "60"))
+UPGRADE_FALLBACK_TIMEOUT_S = float(os.environ.get("UPGRADE_FALLBACK_TIMEOUT_S", "30"))
+
+# The validation pool's size comes from GATHER_VALIDATION_WORKERS instead.
+NAMED_POOL_DEFAULTS = {"docdb": "16", "s3": "16", "bedrock": "8", "cpu": "0", "disk": "4", "validation": "0"}
+
+_upgrade_pool: Optional["BoundedPool"] = None
+_named_executors: Dict[str, Union["ObservableExecutor", "ObservableProcessExecutor"]] = {}
+_key_locks: "weakref.WeakValueDictionary[str, KeyLock]" = weakref.WeakValueDictionary()
+_lock = threading.Lock()
+
+
+class PoolSaturated(RuntimeError):
+    """Raised by ``BoundedPool.run`` when every worker is busy and the queue is full."""
+
+
+class BoundedPool:
+    """An executor with a hard cap on outstanding jobs.
+
+    At most ``max_workers + max_queue`` jobs may be submitted and not yet
+    finished; ``run`` raises ``PoolSaturated`` beyond that instead of letting
+    the backlog grow. A caller whose ``timeout`` expires gets
+    ``asyncio.TimeoutError``; its job is cancelled if it has not started, and
+    otherwise finishes in the background while still holding its slot.
+    """
+
+    def __init__(self, name: str, executor: Executor, max_workers: int, max_queue: int):
+        self.name = name
+        self.executor = executor
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    async def run(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """Run ``fn(*args)`` on the pool and return its result."""
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PoolSaturated(f"{self.name} pool is saturated ({self.pending} jobs outstanding)")
+            self.pending += 1
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+
+    def _release(self, _: Optional[Future]) -> None:
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """Return queue depth and job counters."""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": min(self.pending, self.max_workers),
+                "queued": max(0, self.pending - self.max_workers),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
+
+
+class ObservableExecutor(ThreadPoolExecutor):
+    """A thread pool that counts queued and active jobs and times how long jobs wait for a worker."""
+
+    def __init__(self, name: str, max_workers: int):
+        super().__init__(max_workers=max_workers, thread_name_prefix=name)
+        self.name = name
+        self.max_workers = max_workers
+        self._stats_lock = threading.Lock()
+        self.submitted = 0
+        self.active = 0
+        self.completed = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        submitted_at = time.perf_counter()
+
+        def timed():
+            wait = time.perf_counter() - submitted_at
+            with self._stats_lock:
+                self.active += 1
+                self.total_wait_s += wait
+                self.max_wait_s = max(self.max_wait_s, wait)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._stats_lock:
+                    self.active -= 1
+                    self.completed += 1
+
+        with self._stats_lock:
+            self.submitted += 1
+        try:
+            return super().submit(timed)
+        except BaseException:
+            with self._stats_lock:
+                self.submitted -= 1
+            raise
+
+    def stats(self) -> dict:
+        """Return queue depth, active workers and wait-time counters."""
+        with self._stats_lock:
+            started = self.active + self.completed
+            return {
+                "workers": self.max_workers,
+                "queued": self.submitted - started,
+                "active": self.active,
+                "completed": self.completed,
+                "mean_wait_s": self.total_wait_s / started if started else 0.0,
+                "max_wait_s": self.max_wait_s,
+            }
+
+
+def _timed_call(submitted_at: float, fn: Callable[..., Any], args: tuple, kwargs: dict) -> tuple:
+    """Run ``fn`` in a worker process; returns ``(seconds it waited for the worker, result)``."""
+    return time.monotonic() - submitted_at, fn(*args, **kwargs)
+
+
+class ObservableProcessExecutor(ProcessPoolExecutor):
+    """A process pool with the same ``stats()`` as ``ObservableExecutor``.
+
+    A job's wait is measured in the worker, from submission until it
+    starts, on the system-wide monotonic clock. The parent can't see which
+    jobs are running, so ``active`` counts unfinished jobs up to the pool
+    size and ``queued`` the rest.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        super().__init__(max_workers=max_workers, mp_context=_mp_context())
+        self.name = name
+        self.max_workers = max_workers
+        self._stats_lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.timed = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        with self._stats_lock:
+            self.submitted += 1
+        try:
+            job = super().submit(_timed_call, time.monotonic(), fn, args, kwargs)
+        except BaseException:
+            with self._stats_lock:
+                self.submitted -= 1
+            raise
+        # Callers get a future for fn's own result; cancelling it cancels the job.
+        future: Future = Future()
+        future.add_done_callback(lambda f: job.cancel() if f.cancelled() else None)
+        job.add_done_callback(functools.partial(self._finished, future))
+        return future
+
+    def _finished(self, future: Future, job: Future) -> None:
+        with self._stats_lock:
+            self.completed += 1
+        if job.cancelled():
+            future.cancel()
+            return
+        try:
+            if job.exception() is not None:
+                future.set_exception(job.exception())
+                return
+            wait, result = job.result()
+            with self._stats_lock:
+                self.timed += 1
+                self.total_wait_s += wait
+                self.max_wait_s = max(self.max_wait_s, wait)
+            future.set_result(result)
+        except InvalidStateError:
+            pass  # The caller cancelled it first.
+
+    def stats(self) -> dict:
+        """Return queue depth, active workers and wait-time counters."""
+        with self._stats_lock:
+            pending = self.submitted - self.completed
+            active = min(pending, self.max_workers)
+            return {
+                "workers": self.max_workers,
+                "queued": pending - active,
+                "active": active,
+                "completed": self.completed,
+                "mean_wait_s": self.total_wait_s / self.timed if self.timed else 0.0,
+                "max_wait_s": self.max_wait_s,
+            }
+
+
+class KeyLock:
+    """The lock ``key_lock`` hands out. Unlike ``threading.Lock`` it can be weakly referenced."""
+
+    __slots__ = ("_lock", "__weakref__")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "KeyLock":
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._lock.release()
+
+
+def available_cpus() -> int:
+    """Return the CPUs this process may use, honouring a cgroup v2 CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - non-Linux
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def _mp_context() -> multiprocessing.context.BaseContext:
+    """How process-pool workers are started, so they never inherit the server's threads and locks.
+
+    Forking a multi-threaded server can copy a lock held by another thread
+    (logging, boto3, the event loop) into the child, where it stays locked
+    forever, so workers are started with ``PROCESS_START_METHOD`` instead.
+    """
+    method = PROCESS_START_METHOD
+    if method not in multiprocessing.get_all_start_methods():
+        method = "spawn"
+    return multiprocessing.get_context(method)
+
+
+def _build_validation_executor() -> Union[ObservableExecutor, ObservableProcessExecutor]:
+    workers = int(os.environ.get("GATHER_VALIDATION_WORKERS", "0")) or available_cpus()
+    if GATHER_VALIDATION_POOL == "process":
+        return ObservableProcessExecutor("validation", workers)
+    if GATHER_VALIDATION_POOL != "thread":
+        raise ValueError(
+            f"GATHER_VALIDATION_POOL must be 'thread' or 'process', got '{GATHER_VALIDATION_POOL}'"
+        )
+    return ObservableExecutor("validation", workers)
+
+
+def validation_executor() -> Union[ObservableExecutor, ObservableProcessExecutor]:
+    """Return the /gather validation pool (the ``validation`` named pool)."""
+    return named_executor("validation")
+
+
+def _build_upgrade_pool() -> BoundedPool:
+    workers = int(os.environ.get("UPGRADE_WORKERS", "0")) or available_cpus()
+    if UPGRADE_POOL == "process":
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context())
+    elif UPGRADE_POOL == "thread":
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upgrade")
+    else:
+        raise ValueError(f"UPGRADE_POOL must be 'thread' or 'process', got '{UPGRADE_POOL}'")
+    return BoundedPool("upgrade", executor, max_workers=workers, max_queue=UPGRADE_MAX_QUEUE)
+
+
+def upgrade_pool() -> BoundedPool:
+    """Return the shared /upgrade pool, creating it on first use."""
+    global _upgrade_pool
+    with _lock:
+        if _upgrade_pool is None:
+            _upgrade_pool = _build_upgrade_pool()
+        return _upgrade_pool
+
+
+def upgrade_pool_stats() -> Optional[dict]:
+    """Return the upgrade pool's stats, or None if it hasn't been created."""
+    with _lock:
+        pool = _upgrade_pool
+    return pool.stats() if pool is not None else None
+
+
+def reset_upgrade_pool() -> None:
+    """Discard the upgrade pool (e.g. after a worker crash); the next call rebuilds it."""
+    global _upgrade_pool
+    with _lock:
+        pool, _upgrade_pool = _upgrade_pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def _build_named_executor(name: str) -> Union[ObservableExecutor, ObservableProcessExecutor]:
+    if name == "validation":
+        return _build_validation_executor()
+    workers = int(os.environ.get(f"{name.upper()}_WORKERS", NAMED_POOL_DEFAULTS[name])) or available_cpus()
+    return ObservableExecutor(name, workers)
+
+
+def named_executor(name: str) -> Union[ObservableExecutor, ObservableProcessExecutor]:
+    """Return the named pool (``docdb``, ``s3``, ``bedrock``, ``cpu``, ``disk`` or ``validation``).
+
+    The pool is created on first use.
+    """
+    if name not in NAMED_POOL_DEFAULTS:
+        raise ValueError(f"Unknown executor '{name}'; expected one of {sorted(NAMED_POOL_DEFAULTS)}")
+    with _lock:
+        executor = _named_executors.get(name)
+        if executor is None:
+            executor = _named_executors[name] = _build_named_executor(name)
+        return executor
+
+
+async def run_in(name: str, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+    """Run ``fn(*args, **kwargs)`` on the named pool.
+
+    Like ``asyncio.to_thread``, the call sees the caller's context variables.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    return await loop.run_in_executor(named_executor(name), call)
+
+
+def key_lock(key: str) -> KeyLock:
+    """Return the process-wide lock serializing read-modify-write updates of ``key``.
+
+    Locks are held weakly: once no caller holds or waits on a key's lock it
+    is dropped, so per-object keys don't accumulate.
+    """
+    with _lock:
+        lock = _key_locks.get(key)
+        if lock is None:
+            lock = _key_locks[key] = KeyLock()
+        return lock
+
+
+def start() -> None:
+    """Create the named pools up front. Called from the app lifespan."""
+    for name in NAMED_POOL_DEFAULTS:
+        named_executor(name)
+
+
+def named_stats() -> dict:
+    """Return ``{name: stats}`` for every named pool created so far."""
+    with _lock:
+        executors = dict(_named_executors)
+    return {name: executor.stats() for name, executor in executors.items()}
+
+
+def shutdown() -> None:
+    """Shut down any pools that were created. Called from the app lifespan."""
+    with _lock:
+        named = list(_named_executors.values())
+        _named_executors.clear()
+    for pool in named:
+        pool.shutdown(wait=False, cancel_futures=True)
+    reset_upgrade_pool()
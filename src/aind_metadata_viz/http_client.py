@@ -0,0 +1,104 @@
+"""Shared async HTTP client for calls to aind-metadata-service.
+
+A single ``httpx.AsyncClient`` is opened in the app lifespan and reused by
+every /gather request, so the subject, procedures and funding lookups share
+one keep-alive connection pool instead of paying connection setup on each
+call.
+
+The client is bound to the event loop it was opened on. Callers that run on
+a different loop (or before the lifespan has started, e.g. a ``TestClient``
+used without a ``with`` block) get a short-lived client for the duration of
+the call instead.
+
+Every request is timed into the ``metadata_service`` dependency metrics,
+labelled with its path minus the final segment (e.g. ``/api/v2/subject``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from aind_metadata_viz import timing
+from aind_metadata_viz.metrics import observe_dependency
+
+# Env-overridable pool and timeout settings.
+METADATA_SERVICE_TIMEOUT_S = float(
+    os.environ.get("METADATA_SERVICE_TIMEOUT_S", "30")
+)
+METADATA_SERVICE_CONNECT_TIMEOUT_S = float(
+    os.environ.get("METADATA_SERVICE_CONNECT_TIMEOUT_S", "5")
+)
+METADATA_SERVICE_MAX_CONNECTIONS = int(
+    os.environ.get("METADATA_SERVICE_MAX_CONNECTIONS", "50")
+)
+METADATA_SERVICE_MAX_KEEPALIVE = int(
+    os.environ.get("METADATA_SERVICE_MAX_KEEPALIVE", "20")
+)
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+class _TimedTransport(httpx.AsyncHTTPTransport):
+    """Records the latency of every request in the dependency metrics."""
+
+    async def handle_async_request(
+        self, request: httpx.Request
+    ) -> httpx.Response:
+        operation = request.url.path.rsplit("/", 1)[0] or "/"
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = await super().handle_async_request(request)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            observe_dependency("metadata_service", operation, elapsed, failed)
+            timing.record("metadata_service", elapsed)
+
+
+def _build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=METADATA_SERVICE_MAX_CONNECTIONS,
+        max_keepalive_connections=METADATA_SERVICE_MAX_KEEPALIVE,
+    )
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            METADATA_SERVICE_TIMEOUT_S,
+            connect=METADATA_SERVICE_CONNECT_TIMEOUT_S,
+        ),
+        transport=_TimedTransport(limits=limits),
+    )
+
+
+async def start() -> None:
+    """Open the shared client on the running loop. Called from the app lifespan."""
+    global _client, _client_loop
+    if _client is None:
+        _client = _build_client()
+        _client_loop = asyncio.get_running_loop()
+
+
+async def stop() -> None:
+    """Close the shared client. Called from the app lifespan."""
+    global _client, _client_loop
+    client, _client, _client_loop = _client, None, None
+    if client is not None:
+        await client.aclose()
+
+
+@asynccontextmanager
+async def metadata_service_client() -> AsyncIterator[httpx.AsyncClient]:
+    """Yield the shared client, or a temporary one if it is unusable here."""
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        yield _client
+        return
+    async with _build_client() as client:
+        yield client
@@ -0,0 +1,79 @@
+"""Compute RFC 6902 JSON Patches between two JSON documents.
+
+Used by ``/upgrade?format=patch`` to send what the upgrader changed instead
+of the full upgraded document. ``make_patch(source, target)`` returns a list
+of ``add`` / ``remove`` / ``replace`` operations that turns ``source`` into
+``target``. Objects are diffed key by key. Arrays are diffed after trimming
+their common prefix and suffix, so an element inserted or removed in the
+middle costs one operation rather than a replace of everything after it.
+
+Equality is JSON equality: ``1``, ``1.0`` and ``true`` are different values.
+"""
+
+from __future__ import annotations
+
+from typing import Any, List
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _json_equal(a: Any, b: Any) -> bool:
+    if isinstance(a, dict):
+        return (
+            isinstance(b, dict)
+            and a.keys() == b.keys()
+            and all(_json_equal(value, b[key]) for key, value in a.items())
+        )
+    if isinstance(a, list):
+        return isinstance(b, list) and len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    # The type check keeps True != 1 and 1 != 1.0.
+    return type(a) is type(b) and a == b
+
+
+def _diff(source: Any, target: Any, path: str, ops: List[dict]) -> None:
+    if isinstance(source, dict) and isinstance(target, dict):
+        for key, value in source.items():
+            if key not in target:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+            else:
+                _diff(value, target[key], f"{path}/{_escape(key)}", ops)
+        for key, value in target.items():
+            if key not in source:
+                ops.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+    elif isinstance(source, list) and isinstance(target, list):
+        _diff_list(source, target, path, ops)
+    elif not _json_equal(source, target):
+        ops.append({"op": "replace", "path": path, "value": target})
+
+
+def _diff_list(source: list, target: list, path: str, ops: List[dict]) -> None:
+    shortest = min(len(source), len(target))
+    prefix = 0
+    while prefix < shortest and _json_equal(source[prefix], target[prefix]):
+        prefix += 1
+    suffix = 0
+    while suffix < shortest - prefix and _json_equal(source[-1 - suffix], target[-1 - suffix]):
+        suffix += 1
+
+    source_middle = len(source) - prefix - suffix
+    target_middle = len(target) - prefix - suffix
+    paired = min(source_middle, target_middle)
+    for i in range(prefix, prefix + paired):
+        _diff(source[i], target[i], f"{path}/{i}", ops)
+    # Removing at the same index shifts the next element into it.
+    for _ in range(source_middle - paired):
+        ops.append({"op": "remove", "path": f"{path}/{prefix + paired}"})
+    for i in range(prefix + paired, prefix + target_middle):
+        ops.append({"op": "add", "path": f"{path}/{i}", "value": target[i]})
+
+
+def make_patch(source: Any, target: Any) -> List[dict]:
+    """Return the JSON Patch operations that turn ``source`` into ``target``.
+
+    ``value`` entries reference parts of ``target`` rather than copies.
+    """
+    ops: List[dict] = []
+    _diff(source, target, "", ops)
+    return ops
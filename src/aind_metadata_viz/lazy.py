@@ -0,0 +1,102 @@
+"""Heavy dependencies, imported on first use and warmed in the background.
+
+aind-data-schema's core models, aind-metadata-upgrader, biodata-query and
+the aind-data-mcp tool registry take seconds to import. Importing all of
+them with ``main`` would slow every worker's boot, and make every worker
+hold them in memory, even if it never serves /upgrade or /chat. So the
+modules that use them import them inside the functions that need them.
+``await load(name)`` does the import on a worker thread, so the event loop
+keeps serving while it runs.
+
+The app lifespan calls ``start_warmup()``. It imports ``HEAVY_MODULES`` one
+by one on a background thread without holding up startup, so /health
+answers straight away and the first /upgrade or /chat usually finds them
+loaded.
+
+``scripts/benchmark_import_time.py`` checks the cost of importing
+``aind_metadata_viz.main`` against a budget.
+
+Environment variables
+---------------------
+IMPORT_WARMUP
+    Import ``HEAVY_MODULES`` in the background at startup (default 1). Set
+    to 0 to import each one only on first use.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import os
+import sys
+import time
+from types import ModuleType
+from typing import Optional
+
+from aind_metadata_viz.executors import run_in
+
+logger = logging.getLogger(__name__)
+
+IMPORT_WARMUP = os.environ.get("IMPORT_WARMUP", "1").lower() not in ("0", "false")
+
+# Slowest first: the tool registry also gates /mcp.
+HEAVY_MODULES = (
+    "aind_metadata_viz.chat.tools",
+    "aind_metadata_upgrader.upgrade",
+    "aind_data_schema.core.acquisition",
+    "aind_data_schema.core.data_description",
+    "aind_data_schema.core.instrument",
+    "aind_data_schema.core.procedures",
+    "aind_data_schema.core.processing",
+    "aind_data_schema.core.quality_control",
+    "aind_data_schema.core.subject",
+    "biodata_query.llm.endpoint",
+    "biodata_query.query",
+)
+
+_warmup: Optional[asyncio.Task] = None
+
+
+async def load(name: str) -> ModuleType:
+    """Return module ``name``, importing it on the ``cpu`` pool if needed."""
+    module = sys.modules.get(name)
+    # A module another thread is still importing is in sys.modules already.
+    if module is not None and not getattr(module.__spec__, "_initializing", False):
+        return module
+    return await run_in("cpu", importlib.import_module, name)
+
+
+def warm(names=HEAVY_MODULES) -> dict:
+    """Import ``names`` in order and return ``{name: seconds}``.
+
+    Failures are logged and skipped: the endpoint that needs the module will
+    raise the same error when it is used.
+    """
+    timings = {}
+    for name in names:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception:
+            logger.exception("Background import of %s failed", name)
+            continue
+        timings[name] = time.perf_counter() - started
+    logger.info("Imported heavy modules in %.2fs", sum(timings.values()))
+    return timings
+
+
+def start_warmup() -> Optional[asyncio.Task]:
+    """Start ``warm()`` on a background thread, unless disabled. Called from the app lifespan."""
+    global _warmup
+    if IMPORT_WARMUP and _warmup is None:
+        _warmup = asyncio.get_running_loop().create_task(asyncio.to_thread(warm))
+    return _warmup
+
+
+async def stop_warmup() -> None:
+    """Wait for a running warm-up. Imports can't be interrupted, and the thread holds the import lock."""
+    global _warmup
+    task, _warmup = _warmup, None
+    if task is not None:
+        await task
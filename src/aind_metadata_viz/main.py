@@ -1,10 +1,15 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
-from aind_metadata_viz.endpoints import router
+from aind_metadata_viz import docdb, executors, http_client, lazy
+from aind_metadata_viz.endpoints import prune_upgrade_disk_cache, router
+from aind_metadata_viz.metrics import MetricsMiddleware, metrics_router
+from aind_metadata_viz.timing import TimingMiddleware
 from aind_metadata_viz.contributions.handlers import contributions_router
 from aind_metadata_viz.acquisitions.handlers import acquisitions_router
 from aind_metadata_viz.pinpoint.handlers import pinpoint_router
@@ -24,7 +29,30 @@ _OPENAPI_TAGS = [
     {"name": "pinpoint", "description": "Per-ORCID encrypted storage for arbitrary Pinpoint JSON blobs."},
 ]
 
-app = FastAPI(openapi_tags=_OPENAPI_TAGS)
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    # Shared keep-alive connection pool for aind-metadata-service (/gather).
+    await http_client.start()
+    # Long-lived DocDB API clients shared by /retrieve-records, /upgrade and /summary.
+    docdb.start()
+    # Named docdb / s3 / bedrock / cpu pools for blocking calls.
+    executors.start()
+    # Drop /upgrade disk-cache entries from older library versions.
+    await asyncio.to_thread(prune_upgrade_disk_cache)
+    # Import aind-data-schema, the upgrader and biodata-query in the background.
+    lazy.start_warmup()
+    try:
+        yield
+    finally:
+        await lazy.stop_warmup()
+        await http_client.stop()
+        docdb.stop()
+        # Also shuts down the validation and upgrade pools, created lazily.
+        executors.shutdown()
+
+
+app = FastAPI(openapi_tags=_OPENAPI_TAGS, lifespan=_lifespan)
 
 # The session cookie (set after ORCID login) must be sent on cross-origin
 # requests from the frontend dev server. Browsers reject credentialed CORS
@@ -56,7 +84,15 @@ app.add_middleware(
     https_only=os.environ.get("SESSION_INSECURE", "").lower() not in ("1", "true"),
 )
 
+# Adds Server-Timing and logs each request's phase breakdown (docdb, bedrock, ...).
+app.add_middleware(TimingMiddleware)
+
+# Outermost, so request latency covers every other middleware. Plain ASGI,
+# so streaming responses (including the MCP transport) are not buffered.
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(router)
+app.include_router(metrics_router)
 app.include_router(auth_router)
 app.include_router(contributions_router)
 app.include_router(acquisitions_router)
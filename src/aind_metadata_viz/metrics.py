@@ -0,0 +1,341 @@
+"""In-process metrics, served at /metrics in the Prometheus text format.
+
+``MetricsMiddleware`` is plain ASGI: it only wraps ``send`` to read the
+response status, so streaming responses (NDJSON, the MCP transport) pass
+through untouched. For every HTTP request it records
+
+* ``http_requests_total`` and ``http_request_duration_seconds`` by method,
+  route template and status, and
+* ``http_requests_in_flight`` by method.
+
+Routes are labelled with their path template (``/contributions/{project}``),
+never the raw path, so label cardinality stays bounded; paths that match no
+route are labelled ``<unmatched>``.
+
+Calls to upstream dependencies are timed with ``observe_dependency`` (or
+the ``dependency_timer`` context manager) into
+``dependency_request_duration_seconds`` and ``dependency_errors_total`` by
+dependency (``s3``, ``docdb``, ``bedrock``, ``metadata_service``) and
+operation. Worker pool queue depths are read from ``executors`` each time
+/metrics is scraped.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from aind_metadata_viz import executors
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+UNMATCHED_ROUTE = "<unmatched>"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labels)
+
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        """Return ``(name suffix, label values, value)`` for every sample to render."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, value in self.samples():
+            label_names = self.labels + (("le",) if suffix == "_bucket" else ())
+            lines.append(f"{self.name}{suffix}{_format_labels(label_names, values)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [("", key, value) for key, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    """A value per label set that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative ``le`` buckets, plus their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [per-bucket counts..., sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * len(self.buckets) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-1] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            counts = self._values.get(self._key(labels))
+            return int(sum(counts[:-1])) if counts else 0
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            items = sorted((key, list(counts)) for key, counts in self._values.items())
+        for key, counts in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append(("_bucket", key + (_format_value(bound),), cumulative))
+            samples.append(("_sum", key, counts[-1]))
+            samples.append(("_count", key, cumulative))
+        return samples
+
+
+class Registry:
+    """Metrics rendered together, plus collectors refreshed just before each render."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect: Callable[[], None]) -> None:
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            collect()
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(
+    Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+)
+http_request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time from request start to the end of the response body.",
+        ("method", "route", "status"),
+    )
+)
+http_in_flight = registry.register(
+    Gauge("http_requests_in_flight", "HTTP requests being handled.", ("method",))
+)
+dependency_duration = registry.register(
+    Histogram(
+        "dependency_request_duration_seconds",
+        "Latency of calls to upstream dependencies.",
+        ("dependency", "operation"),
+    )
+)
+dependency_errors = registry.register(
+    Counter("dependency_errors_total", "Failed calls to upstream dependencies.", ("dependency", "operation"))
+)
+executor_queued = registry.register(
+    Gauge("executor_queued_jobs", "Jobs waiting for a free worker.", ("pool",))
+)
+executor_active = registry.register(
+    Gauge("executor_active_jobs", "Jobs running on a worker.", ("pool",))
+)
+executor_workers = registry.register(Gauge("executor_workers", "Worker count.", ("pool",)))
+
+
+def _collect_executor_stats() -> None:
+    pools = executors.named_stats()
+    upgrade = executors.upgrade_pool_stats()
+    if upgrade is not None:
+        pools["upgrade"] = upgrade
+    for pool, stats in pools.items():
+        executor_queued.set(stats["queued"], pool=pool)
+        executor_active.set(stats["active"], pool=pool)
+        executor_workers.set(stats["workers"], pool=pool)
+
+
+registry.add_collector(_collect_executor_stats)
+
+
+def observe_dependency(dependency: str, operation: str, seconds: float, error: bool = False) -> None:
+    """Record one call to ``dependency``."""
+    dependency_duration.observe(seconds, dependency=dependency, operation=operation)
+    if error:
+        dependency_errors.inc(dependency=dependency, operation=operation)
+
+
+@contextmanager
+def dependency_timer(dependency: str, operation: str) -> Iterator[None]:
+    """Time the enclosed block as one call to ``dependency``; exceptions count as errors."""
+    started = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        observe_dependency(dependency, operation, time.perf_counter() - started, failed)
+
+
+def instrument_boto3_client(client, dependency: str):
+    """Time every API call ``client`` makes as a call to ``dependency``; returns ``client``.
+
+    Calls answered with a 5xx status, or failing without a response, count
+    as errors.
+    """
+
+    def before_call(model, context, **_):
+        context["metrics_call"] = (model.name, time.perf_counter())
+
+    def after_call(context, http_response, **_):
+        operation, started = context.pop("metrics_call", ("unknown", None))
+        if started is not None:
+            observe_dependency(
+                dependency, operation, time.perf_counter() - started, http_response.status_code >= 500
+            )
+
+    def after_call_error(context, **_):
+        operation, started = context.pop("metrics_call", ("unknown", None))
+        if started is not None:
+            observe_dependency(dependency, operation, time.perf_counter() - started, True)
+
+    events = client.meta.events
+    # Ahead of other before-call handlers, which may answer the call themselves.
+    events.register_first("before-call.*.*", before_call)
+    events.register("after-call", after_call)
+    events.register("after-call-error", after_call_error)
+    return client
+
+
+def _route_template(scope: Scope, root_path: str) -> str:
+    """The path template of the route that handled the request.
+
+    Routing records the matched route in ``scope``; mounted apps (e.g. MCP)
+    extend ``root_path``, which is kept as the template prefix.
+    """
+    path = getattr(scope.get("route"), "path", None)
+    if path is None:
+        return UNMATCHED_ROUTE
+    return scope.get("root_path", "")[len(root_path):] + path
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request counts, latency and in-flight requests."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        root_path = scope.get("root_path", "")
+        status = "500"
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        # The route is only known once routing has run, so in-flight
+        # requests are counted per method.
+        http_in_flight.inc(method=method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec(method=method)
+            route = _route_template(scope, root_path)
+            http_requests.inc(method=method, route=route, status=status)
+            http_request_duration.observe(elapsed, method=method, route=route, status=status)
+
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get(
+    "/metrics",
+    tags=["health"],
+    summary="Service metrics in the Prometheus text format",
+    description=(
+        "Request counts, latency histograms and in-flight gauges per route and status; "
+        "worker pool queue depths; and per-dependency call latency and errors for S3, DocDB, "
+        "Bedrock and aind-metadata-service."
+    ),
+    response_class=PlainTextResponse,
+)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -5,7 +5,6 @@ namespace is keyed off the logged-in user's ORCID iD, so a user can only ever
 read or write their own data. See /docs (Swagger UI) for full schemas.
 """
 
-import asyncio
 import json
 import logging
 from typing import Optional
@@ -14,7 +13,8 @@ from fastapi import APIRouter, Query, Request
 from fastapi.responses import JSONResponse
 
 from ..auth import require_user
-from .store import DecryptionError, get_blob, list_blobs, store_blob
+from ..executors import run_in
+from .store import DecryptionError, get_blob, list_blobs_async, store_blob
 
 _logger = logging.getLogger(__name__)
 
@@ -44,14 +44,14 @@ async def pinpoint_get(
 
     if not name:
         try:
-            entries = await asyncio.to_thread(list_blobs, orcid)
+            entries = await list_blobs_async(orcid)
         except Exception as e:
             _logger.exception("GET /pinpoint-get list orcid=%s", orcid)
             return JSONResponse(status_code=500, content={"error": str(e)})
         return JSONResponse(content=entries)
 
     try:
-        data = await asyncio.to_thread(get_blob, orcid, name, password)
+        data = await run_in("s3", get_blob, orcid, name, password)
     except FileNotFoundError as e:
         return JSONResponse(status_code=404, content={"error": str(e)})
     except DecryptionError as e:
@@ -101,7 +101,7 @@ async def pinpoint_post(
         return JSONResponse(status_code=400, content={"error": f"Failed to parse body: {e}"})
 
     try:
-        meta = await asyncio.to_thread(store_blob, orcid, name, data, password)
+        meta = await run_in("s3", store_blob, orcid, name, data, password)
     except ValueError as e:
         return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
@@ -1,11 +1,12 @@
-"""S3-backed encrypted storage for arbitrary Pinpoint JSON blobs.
+"""Encrypted object storage for arbitrary Pinpoint JSON blobs.
 
 Each blob belongs to exactly one ORCID account and is stored as a single JSON
-object in S3 (bucket: ``aind-scratch-data``, prefix ``pinpoint/accounts/``)::
+object in the configured ``storage.backend()`` (S3 in production: bucket
+``aind-scratch-data``), under the ``pinpoint/accounts/`` prefix::
 
     pinpoint/accounts/{orcid}/{safe_name}.json
 
-The payload is never stored in the clear. The envelope written to S3 is::
+The payload is never stored in the clear. The envelope written to storage is::
 
     {
       "name": "<blob name>",
@@ -40,20 +41,20 @@ authenticated data, so a blob cannot be replayed under another account or
 another name.
 """
 
+import asyncio
 import base64
 import json
 import os
 from datetime import datetime, timezone
 from typing import List, Optional
 
-import boto3
-from botocore.exceptions import ClientError
 from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.hashes import SHA256
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
-_S3_BUCKET = "aind-scratch-data"
+from .. import async_storage, storage
+
 _S3_PREFIX = "pinpoint/accounts"
 
 _CIPHER = "aes-256-gcm"
@@ -69,10 +70,6 @@ class DecryptionError(Exception):
     """Raised when a blob cannot be decrypted with the supplied credentials."""
 
 
-def _s3():
-    return boto3.client("s3")
-
-
 def _server_secret() -> str:
     secret = os.environ.get("PINPOINT_ENCRYPTION_SECRET")
     if secret:
@@ -116,22 +113,12 @@ def _aad(orcid: str, name: str) -> bytes:
 
 
 def _put_json(key: str, obj: dict) -> None:
-    _s3().put_object(
-        Bucket=_S3_BUCKET,
-        Key=key,
-        Body=json.dumps(obj).encode(),
-        ContentType="application/json",
-    )
+    storage.backend().put(key, json.dumps(obj).encode())
 
 
 def _get_json(key: str) -> Optional[dict]:
-    try:
-        response = _s3().get_object(Bucket=_S3_BUCKET, Key=key)
-        return json.loads(response["Body"].read().decode())
-    except ClientError as exc:
-        if exc.response["Error"]["Code"] in ("NoSuchKey", "404"):
-            return None
-        raise
+    stored = storage.backend().get(key)
+    return None if stored is None else json.loads(stored.body.decode())
 
 
 def store_blob(
@@ -201,28 +188,32 @@ def get_blob(orcid: str, name: str, password: Optional[str] = None):
     return json.loads(plaintext.decode("utf-8"))
 
 
-def list_blobs(orcid: str) -> List[dict]:
-    """Return metadata for every blob owned by *orcid*, sorted by name."""
+async def list_blobs_async(orcid: str) -> List[dict]:
+    """Return metadata for every blob owned by *orcid*, sorted by name.
+
+    The envelopes are read concurrently through ``async_storage``.
+    """
     if not orcid:
         raise ValueError("orcid is required")
     prefix = _account_prefix(orcid)
-    paginator = _s3().get_paginator("list_objects_v2")
+    async with async_storage.session() as store:
+        keys = [key for key in (await store.list(prefix)).keys if key.endswith(".json")]
+        objects = await async_storage.gather_bounded(store.get, keys)
     entries = []
-    for page in paginator.paginate(Bucket=_S3_BUCKET, Prefix=prefix):
-        for obj in page.get("Contents", []):
-            key = obj["Key"]
-            if not key.endswith(".json"):
-                continue
-            envelope = _get_json(key)
-            if not envelope:
-                continue
-            entries.append(
-                {
-                    "name": envelope.get("name", key[len(prefix): -len(".json")]),
-                    "timestamp": envelope.get("timestamp"),
-                    "key_source": envelope.get("key_source"),
-                }
-            )
+    for key, obj in zip(keys, objects):
+        envelope = json.loads(obj.body.decode()) if obj is not None else None
+        if not envelope:
+            continue
+        entries.append(
+            {
+                "name": envelope.get("name", key[len(prefix): -len(".json")]),
+                "timestamp": envelope.get("timestamp"),
+                "key_source": envelope.get("key_source"),
+            }
+        )
     return sorted(entries, key=lambda e: e["name"])
 
 
+def list_blobs(orcid: str) -> List[dict]:
+    """``list_blobs_async`` for synchronous callers (not from a running event loop)."""
+    return asyncio.run(list_blobs_async(orcid))
@@ -0,0 +1,176 @@
+"""The S3 client shared by every S3-backed store.
+
+Building a boto3 client resolves credentials, loads the S3 service model
+and opens a new connection pool, which costs far more than a small
+``GetObject``. ``storage.S3Store``, behind the contributions, acquisitions,
+pinpoint and chat-log stores, therefore calls ``client()``. It returns one
+process-wide client, created on first use under a lock. Once built, a boto3
+client is safe to share between threads.
+
+The client keeps up to ``S3_MAX_POOL_CONNECTIONS`` keep-alive connections,
+enough for every worker of the ``s3`` pool, and retries throttling and 5xx
+errors with backoff. Every call is counted per operation (``GetObject``,
+``PutObject``, ...): calls, errors, latency, and bytes sent and received.
+``stats()`` reports the counts, which are also served at /s3/client-stats.
+Latency also goes to /metrics.
+
+Environment variables
+---------------------
+S3_MAX_POOL_CONNECTIONS
+    Keep-alive connections (default 32).
+S3_MAX_ATTEMPTS
+    Attempts per call, including the first (default 5).
+S3_RETRY_MODE
+    botocore retry mode: ``standard`` (default) or ``adaptive``.
+S3_CONNECT_TIMEOUT_S, S3_READ_TIMEOUT_S
+    Socket timeouts (defaults 5 and 30).
+S3_ENDPOINT_URL
+    Send requests to an S3-compatible endpoint instead of AWS, e.g. a local
+    stand-in for benchmarks.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import boto3
+from botocore.config import Config
+
+from aind_metadata_viz.metrics import instrument_boto3_client
+
+S3_MAX_POOL_CONNECTIONS = int(os.environ.get("S3_MAX_POOL_CONNECTIONS", "32"))
+S3_MAX_ATTEMPTS = int(os.environ.get("S3_MAX_ATTEMPTS", "5"))
+S3_RETRY_MODE = os.environ.get("S3_RETRY_MODE", "standard")
+S3_CONNECT_TIMEOUT_S = float(os.environ.get("S3_CONNECT_TIMEOUT_S", "5"))
+S3_READ_TIMEOUT_S = float(os.environ.get("S3_READ_TIMEOUT_S", "30"))
+S3_ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL") or None
+
+
+class _OperationStats:
+    __slots__ = ("calls", "errors", "total_latency_s", "max_latency_s", "bytes_sent", "bytes_received")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_latency_s = 0.0
+        self.max_latency_s = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "mean_latency_s": self.total_latency_s / self.calls if self.calls else 0.0,
+            "max_latency_s": self.max_latency_s,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+_stats: Dict[str, _OperationStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _body_size(body) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode())
+    if isinstance(body, io.BytesIO):
+        return body.getbuffer().nbytes - body.tell()
+    return 0
+
+
+def _record(operation: str, seconds: float, failed: bool, sent: int, received: int) -> None:
+    with _stats_lock:
+        stats = _stats.get(operation)
+        if stats is None:
+            stats = _stats[operation] = _OperationStats()
+        stats.calls += 1
+        stats.errors += failed
+        stats.total_latency_s += seconds
+        stats.max_latency_s = max(stats.max_latency_s, seconds)
+        stats.bytes_sent += sent
+        stats.bytes_received += received
+
+
+def _count_calls(client) -> None:
+    """Feed every call ``client`` makes into ``stats()``."""
+
+    def before_call(model, params, context, **_):
+        context["s3_call"] = (model.name, time.perf_counter(), _body_size(params.get("body")))
+
+    def after_call(context, model, http_response, parsed, **_):
+        operation, started, sent = context.pop("s3_call", ("unknown", None, 0))
+        if started is None:
+            return
+        received = 0
+        # A HEAD response's Content-Length is the size of the object it describes.
+        if model.http.get("method") != "HEAD":
+            received = int(http_response.headers.get("content-length") or (parsed or {}).get("ContentLength") or 0)
+        _record(operation, time.perf_counter() - started, http_response.status_code >= 500, sent, received)
+
+    def after_call_error(context, **_):
+        operation, started, sent = context.pop("s3_call", ("unknown", None, 0))
+        if started is not None:
+            _record(operation, time.perf_counter() - started, True, sent, 0)
+
+    events = client.meta.events
+    # Ahead of other before-call handlers, which may answer the call themselves.
+    events.register_first("before-call.*.*", before_call)
+    events.register("after-call", after_call)
+    events.register("after-call-error", after_call_error)
+
+
+def _build_client():
+    config = Config(
+        max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+        retries={"total_max_attempts": S3_MAX_ATTEMPTS, "mode": S3_RETRY_MODE},
+        connect_timeout=S3_CONNECT_TIMEOUT_S,
+        read_timeout=S3_READ_TIMEOUT_S,
+        tcp_keepalive=True,
+    )
+    # A session of its own: boto3's default session is not safe to build
+    # clients from on several threads at once.
+    client = boto3.session.Session().client("s3", config=config, endpoint_url=S3_ENDPOINT_URL)
+    instrument_boto3_client(client, "s3")
+    _count_calls(client)
+    return client
+
+
+def client():
+    """Return the shared S3 client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _build_client()
+    return _client
+
+
+def reset() -> None:
+    """Close the shared client and clear the counters; the next ``client()`` builds a new one. Used in tests."""
+    global _client
+    with _client_lock:
+        previous, _client = _client, None
+    if previous is not None:
+        previous.close()
+    with _stats_lock:
+        _stats.clear()
+
+
+def stats(operation: Optional[str] = None) -> dict:
+    """Return ``{operation: counters}``, or the counters of one ``operation``."""
+    with _stats_lock:
+        if operation is not None:
+            return (_stats.get(operation) or _OperationStats()).as_dict()
+        return {name: stats.as_dict() for name, stats in sorted(_stats.items())}
@@ -0,0 +1,76 @@
+"""Coalesce concurrent identical blocking calls into one upstream call.
+
+``SingleFlight.run(key, fn)`` runs the blocking ``fn`` on an executor. Any
+caller that arrives with the same ``key`` while that call is still running
+awaits the same future instead of starting another one, and gets the same
+result (or exception). Nothing is kept once the call finishes; use
+``AsyncTTLCache`` for that.
+
+Every instance registers itself so ``all_stats()`` can report the
+coalescing ratio (coalesced calls / total calls) for each of them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import Executor
+from typing import Any, Callable, Hashable, Optional
+
+_registry: list["SingleFlight"] = []
+
+
+class SingleFlight:
+    """Per-key de-duplication of in-flight executor calls.
+
+    Callers share the returned object, so they must not mutate it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: dict[Hashable, tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self.calls = 0
+        self.coalesced = 0
+        _registry.append(self)
+
+    async def run(self, key: Hashable, fn: Callable[[], Any], executor: Optional[Executor] = None) -> Any:
+        """Return ``fn()``, sharing one in-flight call per ``key``."""
+        loop = asyncio.get_running_loop()
+        self.calls += 1
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight[0] is loop and not inflight[1].done():
+            self.coalesced += 1
+            future = inflight[1]
+        else:
+            # Like asyncio.to_thread, ``fn`` sees the leader's context variables.
+            future = loop.run_in_executor(executor, functools.partial(contextvars.copy_context().run, fn))
+            self._inflight[key] = (loop, future)
+
+            def _done(_):
+                if self._inflight.get(key, (None, None))[1] is future:
+                    del self._inflight[key]
+
+            future.add_done_callback(_done)
+        # Shield so one cancelled caller doesn't cancel the call for the rest.
+        return await asyncio.shield(future)
+
+    def clear(self) -> None:
+        """Forget in-flight calls and reset counters. Used in tests."""
+        self._inflight.clear()
+        self.calls = self.coalesced = 0
+
+    def stats(self) -> dict:
+        """Return call counts and the coalescing ratio."""
+        return {
+            "calls": self.calls,
+            "executions": self.calls - self.coalesced,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "coalescing_ratio": self.coalesced / self.calls if self.calls else 0.0,
+        }
+
+
+def all_stats() -> dict:
+    """Return ``{name: stats}`` for every ``SingleFlight`` created so far."""
+    return {flight.name: flight.stats() for flight in _registry}
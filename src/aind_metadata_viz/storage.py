@@ -0,0 +1,359 @@
+"""Object storage behind the contributions, acquisitions, pinpoint and chat-log stores.
+
+The stores talk to an ``ObjectStore``: a flat namespace of keys holding
+bytes, with ``get``, ``put``, ``put_if`` (a conditional put), ``list``
+(by prefix), ``delete`` and ``head``. There are three implementations:
+
+* ``S3Store`` — a bucket, through the shared client from ``s3``. This is
+  what runs in production.
+* ``LocalStore`` — a directory tree, one file per key. Lets the app run
+  offline, e.g. for local development and load tests.
+* ``MemoryStore`` — a dict. Used by tests and in-process benchmarks.
+
+``backend()`` returns the process-wide store picked by ``STORAGE_BACKEND``.
+
+Read-modify-write updates of one shared object go through ``update``. It
+writes with ``put_if`` against the ETag it read, and retries when another
+writer got there first. That holds across threads, workers and replicas,
+which the in-process ``executors.key_lock`` alone can't promise.
+
+Environment variables
+---------------------
+STORAGE_BACKEND
+    ``s3`` (default), ``local`` or ``memory``.
+STORAGE_BUCKET
+    Bucket for the ``s3`` backend (default ``aind-scratch-data``).
+STORAGE_DIR
+    Root directory for the ``local`` backend (default ``./storage-data``).
+STORAGE_UPDATE_ATTEMPTS
+    Conditional-put attempts per ``update`` before it gives up (default 10).
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from botocore.exceptions import ClientError
+
+from aind_metadata_viz import s3
+
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "s3").lower()
+STORAGE_BUCKET = os.environ.get("STORAGE_BUCKET", "aind-scratch-data")
+STORAGE_DIR = os.environ.get("STORAGE_DIR", "storage-data")
+STORAGE_UPDATE_ATTEMPTS = int(os.environ.get("STORAGE_UPDATE_ATTEMPTS", "10"))
+
+JSON = "application/json"
+
+
+class StoredObject(NamedTuple):
+    body: bytes
+    etag: str
+
+
+class ObjectInfo(NamedTuple):
+    size: int
+    etag: str
+
+
+class Listing(NamedTuple):
+    """Keys under a prefix, sorted. With a delimiter, deeper keys are rolled up into ``prefixes``."""
+
+    keys: List[str]
+    prefixes: List[str]
+
+
+class UpdateConflict(Exception):
+    """Raised when ``update`` loses the race for an object on every attempt."""
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.md5(body).hexdigest()}"'
+
+
+def _listing(keys, prefix: str, delimiter: Optional[str]) -> Listing:
+    """Build a ``Listing`` from every key under ``prefix``, as S3 would."""
+    contents, prefixes = [], set()
+    for key in keys:
+        if not key.startswith(prefix):
+            continue
+        rest = key[len(prefix):]
+        if delimiter and delimiter in rest:
+            prefixes.add(prefix + rest[: rest.index(delimiter) + len(delimiter)])
+        else:
+            contents.append(key)
+    return Listing(sorted(contents), sorted(prefixes))
+
+
+class ObjectStore(ABC):
+    """A flat key/bytes store. Missing keys read as None."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[StoredObject]:
+        """Return the object at ``key``, or None."""
+
+    @abstractmethod
+    def put(self, key: str, body: bytes, content_type: str = JSON) -> str:
+        """Write ``body`` and return its ETag."""
+
+    @abstractmethod
+    def put_if(self, key: str, body: bytes, etag: Optional[str], content_type: str = JSON) -> bool:
+        """Write ``body`` only if ``key`` still has ``etag`` (or, with None, doesn't exist yet).
+
+        Returns False, without writing, if the condition doesn't hold.
+        """
+
+    @abstractmethod
+    def list(self, prefix: str, delimiter: Optional[str] = None) -> Listing:
+        """Return the keys under ``prefix``; see ``Listing``."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove ``key``; removing a missing key is not an error."""
+
+    @abstractmethod
+    def head(self, key: str) -> Optional[ObjectInfo]:
+        """Return the size and ETag of ``key``, or None."""
+
+
+class MemoryStore(ObjectStore):
+    """Objects in a dict, ``objects``: ``{key: bytes}``."""
+
+    def __init__(self):
+        self.objects: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self.objects.get(key)
+        return None if body is None else StoredObject(body, _etag(body))
+
+    def put(self, key, body, content_type=JSON):
+        with self._lock:
+            self.objects[key] = bytes(body)
+        return _etag(body)
+
+    def put_if(self, key, body, etag, content_type=JSON):
+        with self._lock:
+            current = self.objects.get(key)
+            if (None if current is None else _etag(current)) != etag:
+                return False
+            self.objects[key] = bytes(body)
+        return True
+
+    def list(self, prefix, delimiter=None):
+        with self._lock:
+            keys = list(self.objects)
+        return _listing(keys, prefix, delimiter)
+
+    def delete(self, key):
+        with self._lock:
+            self.objects.pop(key, None)
+
+    def head(self, key):
+        with self._lock:
+            body = self.objects.get(key)
+        return None if body is None else ObjectInfo(len(body), _etag(body))
+
+
+class LocalStore(ObjectStore):
+    """One file per key under ``root``.
+
+    Writes go to a temporary file that is renamed into place, so readers
+    never see half an object. ``put_if`` holds an ``flock`` on
+    ``root/.lock`` while it compares and writes, so it is atomic across
+    processes sharing the directory.
+    """
+
+    _TMP_PREFIX = ".tmp-"
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        parts = key.split("/")
+        if not key or any(part in ("", ".", "..") or part.startswith(self._TMP_PREFIX) for part in parts):
+            raise ValueError(f"Invalid storage key: {key!r}")
+        return os.path.join(self.root, *parts)
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            return None
+
+    def _write(self, path: str, body: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = os.path.join(
+            os.path.dirname(path), f"{self._TMP_PREFIX}{os.getpid()}-{threading.get_ident()}-{os.path.basename(path)}"
+        )
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        with self._lock, open(os.path.join(self.root, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get(self, key):
+        body = self._read(self._path(key))
+        return None if body is None else StoredObject(body, _etag(body))
+
+    def put(self, key, body, content_type=JSON):
+        self._write(self._path(key), body)
+        return _etag(body)
+
+    def put_if(self, key, body, etag, content_type=JSON):
+        path = self._path(key)
+        with self._exclusive():
+            current = self._read(path)
+            if (None if current is None else _etag(current)) != etag:
+                return False
+            self._write(path, body)
+        return True
+
+    def list(self, prefix, delimiter=None):
+        # Only the directory the prefix ends in (and below) can hold matches.
+        start = os.path.join(self.root, *prefix.split("/")[:-1])
+        keys = []
+        for directory, _, files in os.walk(start):
+            relative = os.path.relpath(directory, self.root).replace(os.sep, "/")
+            for name in files:
+                if name.startswith(self._TMP_PREFIX) or (relative == "." and name == ".lock"):
+                    continue
+                keys.append(name if relative == "." else f"{relative}/{name}")
+        return _listing(keys, prefix, delimiter)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def head(self, key):
+        body = self._read(self._path(key))
+        return None if body is None else ObjectInfo(len(body), _etag(body))
+
+
+class S3Store(ObjectStore):
+    """Objects in an S3 bucket, through the shared ``s3.client()``."""
+
+    _MISSING = ("NoSuchKey", "404", "NotFound")
+    # 412: the ETag changed; 409: another conditional write to the key is in flight.
+    # An If-Match put to a key that has since been deleted gets NoSuchKey.
+    _CONFLICT = ("PreconditionFailed", "ConditionalRequestConflict")
+
+    def __init__(self, bucket: str):
+        self.bucket = bucket
+
+    def get(self, key):
+        try:
+            response = s3.client().get_object(Bucket=self.bucket, Key=key)
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] in self._MISSING:
+                return None
+            raise
+        return StoredObject(response["Body"].read(), response["ETag"])
+
+    def put(self, key, body, content_type=JSON):
+        response = s3.client().put_object(Bucket=self.bucket, Key=key, Body=body, ContentType=content_type)
+        return response["ETag"]
+
+    def put_if(self, key, body, etag, content_type=JSON):
+        condition = {"IfNoneMatch": "*"} if etag is None else {"IfMatch": etag}
+        try:
+            s3.client().put_object(Bucket=self.bucket, Key=key, Body=body, ContentType=content_type, **condition)
+        except ClientError as exc:
+            code = exc.response["Error"]["Code"]
+            if code in self._CONFLICT or (etag is not None and code in self._MISSING):
+                return False
+            raise
+        return True
+
+    def list(self, prefix, delimiter=None):
+        paginator = s3.client().get_paginator("list_objects_v2")
+        extra = {"Delimiter": delimiter} if delimiter else {}
+        keys, prefixes = [], []
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, **extra):
+            keys.extend(obj["Key"] for obj in page.get("Contents", []))
+            prefixes.extend(common["Prefix"] for common in page.get("CommonPrefixes", []))
+        return Listing(sorted(keys), sorted(prefixes))
+
+    def delete(self, key):
+        s3.client().delete_object(Bucket=self.bucket, Key=key)
+
+    def head(self, key):
+        try:
+            response = s3.client().head_object(Bucket=self.bucket, Key=key)
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] in self._MISSING:
+                return None
+            raise
+        return ObjectInfo(response["ContentLength"], response["ETag"])
+
+
+_backend: Optional[ObjectStore] = None
+_backend_lock = threading.Lock()
+
+
+def _build_backend() -> ObjectStore:
+    if STORAGE_BACKEND == "s3":
+        return S3Store(STORAGE_BUCKET)
+    if STORAGE_BACKEND == "local":
+        return LocalStore(STORAGE_DIR)
+    if STORAGE_BACKEND == "memory":
+        return MemoryStore()
+    raise ValueError(f"STORAGE_BACKEND must be 's3', 'local' or 'memory', got {STORAGE_BACKEND!r}")
+
+
+def backend() -> ObjectStore:
+    """Return the process-wide store, creating it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _build_backend()
+    return _backend
+
+
+def reset() -> None:
+    """Forget the process-wide store; the next ``backend()`` builds a new one. Used in tests."""
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+def update(key: str, change: Callable[[Optional[bytes]], Optional[bytes]], content_type: str = JSON) -> None:
+    """Read-modify-write ``key`` with a conditional put.
+
+    ``change`` gets the current body (None if the key doesn't exist) and
+    returns the new body, or None to leave the object as it is. If another
+    writer changes the object in between, ``change`` runs again on the new
+    body, after a short randomized backoff. Raises ``UpdateConflict`` after
+    ``STORAGE_UPDATE_ATTEMPTS`` lost races.
+    """
+    store = backend()
+    for attempt in range(STORAGE_UPDATE_ATTEMPTS):
+        current = store.get(key)
+        body = change(None if current is None else current.body)
+        if body is None:
+            return
+        if store.put_if(key, body, None if current is None else current.etag, content_type):
+            return
+        time.sleep(random.uniform(0, min(0.01 * 2**attempt, 0.5)))
+    raise UpdateConflict(f"Gave up updating {key!r} after {STORAGE_UPDATE_ATTEMPTS} conflicting writes")
@@ -0,0 +1,141 @@
+"""Per-request phase timing, reported as ``Server-Timing`` and a log line.
+
+``TimingMiddleware`` starts a ``RequestTiming`` for every HTTP request and
+stores it in a context variable. Code anywhere below the handler records
+into it with ``phase(name)`` (a context manager) or ``record(name,
+seconds)``; both are no-ops outside a request. Context variables follow
+the request into ``asyncio.to_thread``, ``executors.run_in`` and
+``SingleFlight`` calls, and the ``RequestTiming`` object itself is shared,
+so phases recorded on a worker thread land on the right request.
+
+Phase names in use: ``docdb``, ``metadata_service``, ``compact``,
+``bedrock``, ``s3_log`` and ``tool:<name>``. Repeated phases are summed.
+
+When the response starts, the phases recorded so far go out in a
+``Server-Timing`` header, plus ``total`` for the time to the first byte
+(streamed responses can't report later phases in a header). When the
+response finishes, requests that recorded any phase are logged on the
+``aind_metadata_viz.timing`` logger as one JSON object::
+
+    timing {"method": "GET", "path": "/summary", "status": 200,
+            "total_ms": 2210.4, "phases": {"docdb": {"ms": 180.2, "count": 1}, ...}}
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+_current: contextvars.ContextVar[Optional["RequestTiming"]] = contextvars.ContextVar(
+    "request_timing", default=None
+)
+_NON_TOKEN = re.compile(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]")
+_NON_DESC = re.compile(r'[^\x20-\x7e]|["\\]')
+
+
+class RequestTiming:
+    """Durations recorded by one request, summed per phase name."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._phases: Dict[str, List[float]] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            totals = self._phases.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def phases(self) -> Dict[str, dict]:
+        """Return ``{name: {"ms", "count"}}`` in the order phases first ran."""
+        with self._lock:
+            return {name: {"ms": round(seconds * 1000, 1), "count": count}
+                    for name, (seconds, count) in self._phases.items()}
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+    def server_timing(self) -> str:
+        """Format the phases as a ``Server-Timing`` header value."""
+        entries = []
+        for name, phase in self.phases().items():
+            token = _NON_TOKEN.sub("_", name)
+            entry = f"{token};dur={phase['ms']}"
+            if token != name or phase["count"] > 1:
+                calls = f" x{phase['count']}" if phase["count"] > 1 else ""
+                entry += f';desc="{_NON_DESC.sub("_", name)}{calls}"'
+            entries.append(entry)
+        entries.append(f"total;dur={self.elapsed_ms()}")
+        return ", ".join(entries)
+
+
+def record(name: str, seconds: float) -> None:
+    """Add ``seconds`` to phase ``name`` of the current request, if any."""
+    timing = _current.get()
+    if timing is not None:
+        timing.record(name, seconds)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the enclosed block as phase ``name`` of the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+class TimingMiddleware:
+    """Pure ASGI middleware adding ``Server-Timing`` and logging the phase breakdown."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            phases = timing.phases()
+            if phases:
+                logger.info(
+                    "timing %s",
+                    json.dumps(
+                        {
+                            "method": scope["method"],
+                            "path": scope["path"],
+                            "status": status,
+                            "total_ms": timing.elapsed_ms(),
+                            "phases": phases,
+                        }
+                    ),
+                )
@@ -0,0 +1,71 @@
+"""Local stand-in for aind-metadata-service used by the /gather tests.
+
+Serves ``/api/v2/{subject,procedures,funding}/<id>`` from canned responses
+on a real loopback socket, with an optional per-request delay so tests can
+compare wall-clock time of concurrent vs. sequential upstream calls.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MetadataServiceStub:
+    """Threaded HTTP server with per-source canned responses.
+
+    ``responses`` maps a source name (``"subject"``, ``"procedures"``,
+    ``"funding"``) to a ``(status_code, json_body)`` tuple. Sources without
+    an entry return 404. ``path_delays`` overrides ``delay_s`` for specific
+    request paths. ``requests`` records every path served.
+    """
+
+    def __init__(self, delay_s: float = 0.0):
+        self.delay_s = delay_s
+        self.responses = {}
+        self.path_delays = {}
+        self.requests = []
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.requests.append(self.path)
+                delay = stub.path_delays.get(self.path, stub.delay_s)
+                if delay:
+                    time.sleep(delay)
+                parts = self.path.strip("/").split("/")
+                source = parts[2] if len(parts) >= 4 else None
+                status, body = stub.responses.get(source, (404, {"message": "not found"}))
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        self.delay_s = 0.0
+        self.responses = {}
+        self.requests = []
@@ -0,0 +1,168 @@
+"""Local stand-in for S3 used by the storage tests and benchmarks.
+
+Serves path-style requests (``/<bucket>/<key>``) for ``GetObject``,
+``PutObject`` (including conditional puts with ``If-Match`` and
+``If-None-Match: *``), ``HeadObject``, ``DeleteObject`` and ``ListObjectsV2`` from
+an in-memory dict on a real loopback socket, so boto3 goes through its
+whole request path (signing, connection pool, response parsing). An
+optional per-request delay stands in for network latency.
+"""
+
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.md5(body).hexdigest()}"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """One method per S3 operation; the owning ``S3Stub`` is ``self.server.stub``."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this,
+    # Nagle plus delayed ACKs add ~40 ms to every keep-alive request.
+    disable_nagle_algorithm = True
+
+    @property
+    def stub(self) -> "S3Stub":
+        return self.server.stub
+
+    def _begin(self):
+        """Record the request, apply the delay and split out bucket, key and query."""
+        self.stub.requests.append((self.command, self.path))
+        if self.stub.delay_s:
+            time.sleep(self.stub.delay_s)
+        url = urlsplit(self.path)
+        bucket, _, key = url.path.lstrip("/").partition("/")
+        return bucket, unquote(key), parse_qs(url.query)
+
+    def _reply(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _not_found(self):
+        self._reply(
+            404,
+            b"<Error><Code>NoSuchKey</Code><Message>Not Found</Message></Error>",
+            {"Content-Type": "application/xml"},
+        )
+
+    def _precondition_failed(self):
+        self._reply(
+            412,
+            b"<Error><Code>PreconditionFailed</Code><Message>At least one of the pre-conditions you "
+            b"specified did not hold</Message></Error>",
+            {"Content-Type": "application/xml"},
+        )
+
+    def _object(self, bucket, key):
+        with self.stub._lock:
+            body = self.stub.objects.get((bucket, key))
+        if body is None:
+            return self._not_found()
+        self._reply(200, body, {"ETag": _etag(body), "Content-Type": "application/octet-stream"})
+
+    def do_GET(self):
+        bucket, key, query = self._begin()
+        if not key:
+            return self._list(bucket, query)
+        self._object(bucket, key)
+
+    def do_HEAD(self):
+        bucket, key, _ = self._begin()
+        self._object(bucket, key)
+
+    def do_PUT(self):
+        bucket, key, _ = self._begin()
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if_match, if_none_match = self.headers.get("If-Match"), self.headers.get("If-None-Match")
+        with self.stub._lock:
+            current = self.stub.objects.get((bucket, key))
+            if if_match is not None and current is None:
+                return self._not_found()
+            if (if_match is not None and if_match != _etag(current)) or (
+                if_none_match == "*" and current is not None
+            ):
+                return self._precondition_failed()
+            self.stub.objects[(bucket, key)] = body
+        self._reply(200, headers={"ETag": _etag(body)})
+
+    def do_DELETE(self):
+        bucket, key, _ = self._begin()
+        with self.stub._lock:
+            self.stub.objects.pop((bucket, key), None)
+        self._reply(204)
+
+    def _list(self, bucket, query):
+        prefix = query.get("prefix", [""])[0]
+        delimiter = query.get("delimiter", [""])[0]
+        with self.stub._lock:
+            sizes = {k: len(v) for (b, k), v in self.stub.objects.items() if b == bucket and k.startswith(prefix)}
+        contents, prefixes = [], set()
+        for key in sorted(sizes):
+            rest = key[len(prefix):]
+            if delimiter and delimiter in rest:
+                prefixes.add(prefix + rest[: rest.index(delimiter) + 1])
+            else:
+                contents.append(key)
+        xml = ['<?xml version="1.0" encoding="UTF-8"?><ListBucketResult>']
+        xml.append(f"<Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix>")
+        xml.append(f"<KeyCount>{len(contents) + len(prefixes)}</KeyCount><IsTruncated>false</IsTruncated>")
+        for key in contents:
+            xml.append(f"<Contents><Key>{escape(key)}</Key><Size>{sizes[key]}</Size></Contents>")
+        for common in sorted(prefixes):
+            xml.append(f"<CommonPrefixes><Prefix>{escape(common)}</Prefix></CommonPrefixes>")
+        xml.append("</ListBucketResult>")
+        self._reply(200, "".join(xml).encode(), {"Content-Type": "application/xml"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    # Room for a burst of new connections from concurrent readers;
+    # the default backlog of 5 drops SYNs and stalls them for a second.
+    request_queue_size = 128
+    daemon_threads = True
+
+    def __init__(self, stub: "S3Stub"):
+        self.stub = stub
+        super().__init__(("127.0.0.1", 0), _Handler)
+
+
+class S3Stub:
+    """Threaded HTTP server holding ``objects``: ``{(bucket, key): bytes}``.
+
+    ``requests`` records ``(method, path)`` for every request served.
+    """
+
+    def __init__(self, delay_s: float = 0.0):
+        self.delay_s = delay_s
+        self.objects = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = _Server(self)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -1,9 +1,9 @@
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
-from io import BytesIO
 from unittest.mock import patch
 
-from botocore.exceptions import ClientError
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.testclient import TestClient
@@ -16,6 +16,7 @@ from aind_metadata_viz.acquisitions.store import (
     get_scheduled_acquisition,
     get_scheduled_acquisitions,
 )
+from aind_metadata_viz.storage import MemoryStore
 
 _app = FastAPI()
 _app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
@@ -23,33 +24,20 @@ _app.include_router(acquisitions_router)
 client = TestClient(_app)
 
 
-class _FakeS3:
-    def __init__(self):
-        self._store = {}
-
-    def put_object(self, Bucket, Key, Body, ContentType=None):
-        self._store[Key] = Body if isinstance(Body, bytes) else Body.encode()
-
-    def get_object(self, Bucket, Key):
-        if Key not in self._store:
-            raise ClientError({"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, "GetObject")
-        return {"Body": BytesIO(self._store[Key])}
-
-
 def _s3_patch(fake):
-    return patch("aind_metadata_viz.acquisitions.store._s3", return_value=fake)
+    return patch("aind_metadata_viz.storage.backend", return_value=fake)
 
 
 class TestAcquisitionTypeStore(unittest.TestCase):
     def test_add_and_get_allowed_types(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             add_acquisition_type("behavior", "training")
             entries = get_allowed_types()
         self.assertEqual(entries, [{"platform": "behavior", "acquisition_type": "training"}])
 
     def test_add_acquisition_type_dedupes(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             add_acquisition_type("behavior", "training")
             add_acquisition_type("behavior", "training")
@@ -57,7 +45,7 @@ class TestAcquisitionTypeStore(unittest.TestCase):
         self.assertEqual(len(entries), 1)
 
     def test_add_acquisition_type_allows_same_type_different_platform(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             add_acquisition_type("behavior", "training")
             add_acquisition_type("ophys", "training")
@@ -65,7 +53,7 @@ class TestAcquisitionTypeStore(unittest.TestCase):
         self.assertEqual(len(entries), 2)
 
     def test_get_allowed_types_empty_when_unset(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             entries = get_allowed_types()
         self.assertEqual(entries, [])
@@ -73,13 +61,13 @@ class TestAcquisitionTypeStore(unittest.TestCase):
 
 class TestScheduledAcquisitionStore(unittest.TestCase):
     def test_add_scheduled_acquisition_rejects_unknown_type(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             with self.assertRaises(ValueError):
                 add_scheduled_acquisition("123456", date.today(), "unknown-type")
 
     def test_add_scheduled_acquisition_returns_uuid_and_resolves_platform(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             add_acquisition_type("behavior", "training")
             acquisition_uuid = add_scheduled_acquisition("123456", date.today(), "training")
@@ -89,14 +77,31 @@ class TestScheduledAcquisitionStore(unittest.TestCase):
         self.assertEqual(record["platform"], "behavior")
         self.assertEqual(record["acquisition_type"], "training")
 
+    def test_concurrent_adds_are_not_lost(self):
+        fake = MemoryStore()
+        get = fake.get
+
+        def slow_get(key):
+            stored = get(key)
+            time.sleep(0.01)
+            return stored
+
+        fake.get = slow_get
+        with _s3_patch(fake):
+            add_acquisition_type("behavior", "training")
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                uuids = list(pool.map(lambda i: add_scheduled_acquisition(str(i), date.today(), "training"), range(8)))
+            records = get_scheduled_acquisitions()
+        self.assertEqual(sorted(r["uuid"] for r in records), sorted(uuids))
+
     def test_get_scheduled_acquisition_missing_returns_none(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             record = get_scheduled_acquisition("does-not-exist")
         self.assertIsNone(record)
 
     def test_get_scheduled_acquisitions_future_excludes_past(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             add_acquisition_type("behavior", "training")
             add_scheduled_acquisition("past-subject", date.today() - timedelta(days=1), "training")
@@ -108,7 +113,7 @@ class TestScheduledAcquisitionStore(unittest.TestCase):
         self.assertEqual(len(all_records), 2)
 
     def test_get_scheduled_acquisitions_today_counts_as_future(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             add_acquisition_type("behavior", "training")
             add_scheduled_acquisition("today-subject", date.today(), "training")
@@ -119,20 +124,20 @@ class TestScheduledAcquisitionStore(unittest.TestCase):
 
 class TestAcquisitionTypeHandlers(unittest.TestCase):
     def test_post_acquisition_type(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             response = client.post("/acquisition-types", json={"platform": "behavior", "acquisition_type": "training"})
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"platform": "behavior", "acquisition_type": "training"})
 
     def test_post_acquisition_type_missing_field(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             response = client.post("/acquisition-types", json={"platform": "behavior"})
         self.assertEqual(response.status_code, 422)
 
     def test_get_acquisition_types(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             client.post("/acquisition-types", json={"platform": "behavior", "acquisition_type": "training"})
             response = client.get("/acquisition-types")
@@ -142,7 +147,7 @@ class TestAcquisitionTypeHandlers(unittest.TestCase):
 
 class TestScheduledAcquisitionHandlers(unittest.TestCase):
     def test_post_scheduled_acquisition(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             client.post("/acquisition-types", json={"platform": "behavior", "acquisition_type": "training"})
             response = client.post(
@@ -153,7 +158,7 @@ class TestScheduledAcquisitionHandlers(unittest.TestCase):
         self.assertIn("uuid", response.json())
 
     def test_post_scheduled_acquisition_unknown_type(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             response = client.post(
                 "/scheduled-acquisitions",
@@ -162,7 +167,7 @@ class TestScheduledAcquisitionHandlers(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
 
     def test_get_scheduled_acquisitions(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             client.post("/acquisition-types", json={"platform": "behavior", "acquisition_type": "training"})
             client.post(
@@ -174,7 +179,7 @@ class TestScheduledAcquisitionHandlers(unittest.TestCase):
         self.assertEqual(len(response.json()), 1)
 
     def test_get_scheduled_acquisition_by_uuid(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             client.post("/acquisition-types", json={"platform": "behavior", "acquisition_type": "training"})
             post_response = client.post(
@@ -190,7 +195,7 @@ class TestScheduledAcquisitionHandlers(unittest.TestCase):
         self.assertEqual(body["acquisition_type"], "training")
 
     def test_get_scheduled_acquisition_by_uuid_not_found(self):
-        fake = _FakeS3()
+        fake = MemoryStore()
         with _s3_patch(fake):
             response = client.get("/scheduled-acquisitions/does-not-exist")
         self.assertEqual(response.status_code, 404)
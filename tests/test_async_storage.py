@@ -0,0 +1,157 @@
+"""Unit tests for the async object-store reads used by the handlers."""
+
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from aind_metadata_viz import async_storage, executors, s3, storage
+from aind_metadata_viz.contributions import store as contributions_store
+from aind_metadata_viz.pinpoint import store as pinpoint_store
+from tests.s3_stub import S3Stub
+from tests.test_contributions import _make_project
+from tests.test_s3 import _AWS_ENV
+
+
+class GatherBoundedTests(unittest.TestCase):
+    def test_keeps_order_and_bounds_concurrency(self):
+        in_flight, peak = 0, 0
+
+        async def work(i):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01 * (i % 3))
+            in_flight -= 1
+            return i * 2
+
+        with patch.object(async_storage, "STORAGE_READ_CONCURRENCY", 4):
+            results = asyncio.run(async_storage.gather_bounded(work, range(20)))
+        self.assertEqual(results, [i * 2 for i in range(20)])
+        self.assertEqual(peak, 4)
+
+
+class SessionTests(unittest.TestCase):
+    async def _session_type(self, store):
+        with patch.object(storage, "backend", return_value=store):
+            async with async_storage.session() as session:
+                return session
+
+    def test_picks_the_implementation_for_the_backend(self):
+        memory = asyncio.run(self._session_type(storage.MemoryStore()))
+        self.assertIs(type(memory), async_storage._InlineStore)
+        with tempfile.TemporaryDirectory() as root:
+            local = asyncio.run(self._session_type(storage.LocalStore(root)))
+        self.assertEqual((type(local), local.pool), (async_storage._PooledStore, "disk"))
+        remote = asyncio.run(self._session_type(storage.S3Store("aind-scratch-data")))
+        self.assertEqual((type(remote), remote.pool), (async_storage._PooledStore, "s3"))
+
+    def test_stores_implement_every_read(self):
+        class Partial(async_storage.AsyncObjectStore):
+            async def get(self, key):
+                return None
+
+        with self.assertRaises(TypeError):
+            Partial()
+
+    def test_local_reads_run_on_the_disk_pool(self):
+        async def read(store):
+            with patch.object(storage, "backend", return_value=store):
+                async with async_storage.session() as session:
+                    return await session.get("a/b.json"), await session.list("a/")
+
+        completed = executors.named_executor("disk").stats()["completed"]
+        with tempfile.TemporaryDirectory() as root:
+            store = storage.LocalStore(root)
+            store.put("a/b.json", b"1")
+            stored, listing = asyncio.run(read(store))
+        self.assertEqual(stored.body, b"1")
+        self.assertEqual(listing.keys, ["a/b.json"])
+        self.assertEqual(executors.named_executor("disk").stats()["completed"], completed + 2)
+
+
+class S3SessionTests(unittest.TestCase):
+    def setUp(self):
+        self.stub = S3Stub(delay_s=0.05).start()
+        self.addCleanup(self.stub.stop)
+        for patcher in (
+            patch.dict(os.environ, _AWS_ENV),
+            patch.object(s3, "S3_ENDPOINT_URL", self.stub.url),
+            patch.object(storage, "backend", return_value=storage.S3Store("aind-scratch-data")),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        s3.reset()
+        self.addCleanup(s3.reset)
+
+    def _run(self, fn):
+        async def in_session():
+            async with async_storage.session() as store:
+                return await fn(store)
+
+        return asyncio.run(in_session())
+
+    def test_get_head_and_list(self):
+        etag = storage.backend().put("p/one/a b.json", b'{"x": 1}')
+        storage.backend().put("p/top.json", b"{}")
+
+        async def reads(store):
+            return (
+                await store.get("p/one/a b.json"),
+                await store.head("p/one/a b.json"),
+                await store.get("p/missing.json"),
+                await store.head("p/missing.json"),
+                await store.list("p/", delimiter="/"),
+            )
+
+        stored, info, missing, missing_info, listing = self._run(reads)
+        self.assertEqual(stored, storage.StoredObject(b'{"x": 1}', etag))
+        self.assertEqual(info, storage.ObjectInfo(8, etag))
+        self.assertIsNone(missing)
+        self.assertIsNone(missing_info)
+        self.assertEqual(listing, storage.Listing(["p/top.json"], ["p/one/"]))
+        self.assertEqual(s3.stats("GetObject")["calls"], 2)
+        self.assertEqual(s3.stats("ListObjectsV2")["calls"], 1)
+
+    def test_project_reads_run_concurrently(self):
+        for i in range(8):
+            contributions_store.store_contributions(f"project-{i}", _make_project(f"project-{i}"))
+        self.stub.requests.clear()
+        s3_jobs = executors.named_executor("s3").stats()["completed"]
+        with patch.object(async_storage, "STORAGE_READ_CONCURRENCY", 8):
+            started = time.perf_counter()
+            names = asyncio.run(contributions_store.list_all_projects_async())
+            elapsed = time.perf_counter() - started
+        self.assertEqual(names, [f"project-{i}" for i in range(8)])
+        # 1 top-level list, then 8 lists and 8 gets, 8 at a time: ~3 round trips of 50 ms rather than 17.
+        self.assertEqual(len(self.stub.requests), 17)
+        self.assertLess(elapsed, 17 * 0.05 / 2)
+        self.assertEqual(executors.named_executor("s3").stats()["completed"], s3_jobs + 17)
+
+    def test_doi_lookup_and_blob_listing(self):
+        project = _make_project("doi-project")
+        project.doi = "10.1234/async"
+        contributions_store.store_contributions("doi-project", project)
+        contributions_store.store_contributions("other-project", _make_project("other-project"))
+        pinpoint_store.store_blob("0000-0001-2345-6789", "probes", {"a": 1})
+        pinpoint_store.store_blob("0000-0001-2345-6789", "notes", {"b": 2})
+
+        found = asyncio.run(contributions_store.get_contributions_by_doi_async("10.1234/async"))
+        self.assertEqual(found, project)
+        with self.assertRaises(FileNotFoundError):
+            asyncio.run(contributions_store.get_contributions_by_doi_async("10.9999/none"))
+        entries = asyncio.run(pinpoint_store.list_blobs_async("0000-0001-2345-6789"))
+        self.assertEqual([entry["name"] for entry in entries], ["notes", "probes"])
+
+    def test_sync_forms_wrap_the_async_reads(self):
+        contributions_store.store_contributions("sync-project", _make_project("sync-project"))
+        self.stub.requests.clear()
+        self.assertEqual(contributions_store.list_all_projects(), ["sync-project"])
+        self.assertEqual(len(self.stub.requests), 3)
+        self.assertEqual(pinpoint_store.list_blobs("0000-0001-2345-6789"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+"""Unit tests for the async TTL / stale-while-revalidate cache."""
+
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from aind_metadata_viz.cache import AsyncTTLCache
+
+
+class _Loader:
+    """Counts calls and returns successive values, optionally after a delay."""
+
+    def __init__(self, delay_s=0.0, value="v"):
+        self.calls = 0
+        self.delay_s = delay_s
+        self.value = value
+
+    async def __call__(self):
+        self.calls += 1
+        if self.delay_s:
+            await asyncio.sleep(self.delay_s)
+        return f"{self.value}{self.calls}"
+
+
+class AsyncTTLCacheTests(unittest.TestCase):
+    def _cache(self, **kwargs):
+        params = {"ttl_s": 10, "stale_s": 10, "maxsize": 10}
+        params.update(kwargs)
+        return AsyncTTLCache("test", **params)
+
+    def test_fresh_hit_does_not_reload(self):
+        cache, loader = self._cache(), _Loader()
+
+        async def run():
+            return await cache.get("k", loader), await cache.get("k", loader)
+
+        self.assertEqual(asyncio.run(run()), ("v1", "v1"))
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_concurrent_misses_share_one_load(self):
+        cache, loader = self._cache(), _Loader(delay_s=0.05)
+
+        async def run():
+            return await asyncio.gather(*(cache.get("k", loader) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(run()), ["v1"] * 5)
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(cache.stats()["coalesced"], 4)
+
+    def test_stale_entry_served_while_refreshing(self):
+        cache, loader = self._cache(), _Loader()
+
+        async def run():
+            with patch("aind_metadata_viz.cache.time.monotonic", return_value=0.0):
+                await cache.get("k", loader)
+            with patch("aind_metadata_viz.cache.time.monotonic", return_value=15.0):
+                stale = await cache.get("k", loader)
+                await asyncio.sleep(0)
+                await asyncio.sleep(0)
+                fresh = await cache.get("k", loader)
+            return stale, fresh
+
+        self.assertEqual(asyncio.run(run()), ("v1", "v2"))
+        self.assertEqual(loader.calls, 2)
+        self.assertEqual(cache.stats()["stale_hits"], 1)
+        self.assertEqual(cache.stats()["refreshes"], 1)
+
+    def test_expired_entry_loads_inline(self):
+        cache, loader = self._cache(), _Loader()
+
+        async def run():
+            with patch("aind_metadata_viz.cache.time.monotonic", return_value=0.0):
+                await cache.get("k", loader)
+            with patch("aind_metadata_viz.cache.time.monotonic", return_value=25.0):
+                return await cache.get("k", loader)
+
+        self.assertEqual(asyncio.run(run()), "v2")
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_lru_eviction(self):
+        cache = self._cache(maxsize=2)
+
+        async def run():
+            for key in ("a", "b", "a", "c"):
+                await cache.get(key, _Loader(value=key))
+
+        asyncio.run(run())
+        self.assertEqual(list(cache._entries), ["a", "c"])
+
+    def test_uncacheable_values_and_errors_are_not_stored(self):
+        cache = self._cache()
+
+        async def none_loader():
+            return None
+
+        async def failing_loader():
+            raise RuntimeError("boom")
+
+        async def run():
+            await cache.get("none", none_loader)
+            with self.assertRaises(RuntimeError):
+                await cache.get("err", failing_loader)
+
+        asyncio.run(run())
+        self.assertEqual(cache.stats()["size"], 0)
+        self.assertEqual(cache.stats()["errors"], 1)
+
+    def test_zero_ttl_disables_caching(self):
+        cache, loader = self._cache(ttl_s=0), _Loader()
+
+        async def run():
+            await cache.get("k", loader)
+            await cache.get("k", loader)
+
+        asyncio.run(run())
+        self.assertEqual(loader.calls, 2)
+
+    def test_byte_bound_evicts_lru_and_skips_oversized(self):
+        cache = self._cache(max_bytes=10)
+
+        async def load(value):
+            async def loader():
+                return value
+            return loader
+
+        async def run():
+            for key, value in (("a", b"aaaa"), ("b", b"bbbb"), ("c", b"cccc"), ("big", b"x" * 11)):
+                await cache.get(key, await load(value))
+
+        asyncio.run(run())
+        self.assertEqual(list(cache._entries), ["b", "c"])
+        self.assertEqual(cache.stats()["bytes"], 8)
+
+    def test_get_with_status(self):
+        cache, loader = self._cache(), _Loader(delay_s=0.05)
+
+        async def run():
+            first = await asyncio.gather(*(cache.get_with_status("k", loader) for _ in range(2)))
+            return first, await cache.get_with_status("k", loader)
+
+        first, second = asyncio.run(run())
+        self.assertEqual(first, [("v1", "miss"), ("v1", "coalesced")])
+        self.assertEqual(second, ("v1", "hit"))
+
+    def test_invalid_maxsize(self):
+        with self.assertRaises(ValueError):
+            self._cache(maxsize=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
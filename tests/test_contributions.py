@@ -1,12 +1,8 @@
 import json
 import unittest
 from datetime import date
-from io import BytesIO
 from unittest.mock import MagicMock, patch
 
-from botocore.exceptions import ClientError
-
-
 from aind_data_schema_models.registries import Registry
 from pydantic import ValidationError
 
@@ -34,6 +30,7 @@ from aind_metadata_viz.contributions.store import (
     store_contributions,
 )
 from aind_metadata_viz.contributions.handlers import contributions_router
+from aind_metadata_viz.storage import MemoryStore
 from fastapi.testclient import TestClient
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -44,48 +41,8 @@ _app.include_router(contributions_router)
 client = TestClient(_app)
 
 
-class _FakePaginator:
-    def __init__(self, store):
-        self._store = store
-
-    def paginate(self, Bucket, Prefix="", Delimiter=None):
-        keys = sorted(k for k in self._store if k.startswith(Prefix))
-        if Delimiter:
-            prefixes = set()
-            contents = []
-            for k in keys:
-                rest = k[len(Prefix):]
-                idx = rest.find(Delimiter)
-                if idx >= 0:
-                    prefixes.add(Prefix + rest[: idx + 1])
-                else:
-                    contents.append({"Key": k})
-            yield {
-                "CommonPrefixes": [{"Prefix": p} for p in sorted(prefixes)],
-                "Contents": contents,
-            }
-        else:
-            yield {"Contents": [{"Key": k} for k in keys], "CommonPrefixes": []}
-
-
-class _FakeS3:
-    def __init__(self):
-        self._store = {}
-
-    def put_object(self, Bucket, Key, Body, ContentType=None):
-        self._store[Key] = Body if isinstance(Body, bytes) else Body.encode()
-
-    def get_object(self, Bucket, Key):
-        if Key not in self._store:
-            raise ClientError({"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, "GetObject")
-        return {"Body": BytesIO(self._store[Key])}
-
-    def get_paginator(self, operation_name):
-        return _FakePaginator(self._store)
-
-
 def _s3_patch(fake):
-    return patch("aind_metadata_viz.contributions.store._s3", return_value=fake)
+    return patch("aind_metadata_viz.storage.backend", return_value=fake)
 
 
 def _make_role(role=CreditRole.SOFTWARE, level=ContributionLevel.LEAD):
@@ -399,7 +356,7 @@ class TestSafeFilename(unittest.TestCase):
 
 class TestStore(unittest.TestCase):
     def setUp(self):
-        self._fake = _FakeS3()
+        self._fake = MemoryStore()
         self._patch = _s3_patch(self._fake)
         self._patch.start()
         self.pc = _make_project("store-test")
@@ -488,7 +445,7 @@ def _make_project_json(name="handler-project"):
 
 class ContributionsHandlerTestCase(unittest.TestCase):
     def setUp(self):
-        self._fake = _FakeS3()
+        self._fake = MemoryStore()
         self._s3_patch = _s3_patch(self._fake)
         self._s3_patch.start()
 
@@ -666,7 +623,7 @@ class TestContributionsPostHandler(ContributionsHandlerTestCase):
 
 class TestGetContributionsByDoi(unittest.TestCase):
     def setUp(self):
-        self._fake = _FakeS3()
+        self._fake = MemoryStore()
         self._patch = _s3_patch(self._fake)
         self._patch.start()
 
@@ -708,7 +665,7 @@ class TestGetHandlerPublic(ContributionsHandlerTestCase):
 
     def _patch_doi(self, contributions):
         return patch(
-            "aind_metadata_viz.contributions.handlers.get_contributions_by_doi",
+            "aind_metadata_viz.contributions.handlers.get_contributions_by_doi_async",
             return_value=contributions,
         )
 
@@ -734,7 +691,7 @@ class TestGetHandlerPublic(ContributionsHandlerTestCase):
     def test_doi_not_found_returns_404(self):
         from unittest.mock import patch as _patch
         with _patch(
-            "aind_metadata_viz.contributions.handlers.get_contributions_by_doi",
+            "aind_metadata_viz.contributions.handlers.get_contributions_by_doi_async",
             side_effect=FileNotFoundError("not found"),
         ), _patch(
             "aind_metadata_viz.contributions.handlers.get_contributions",
@@ -752,7 +709,7 @@ class TestGetHandlerPublic(ContributionsHandlerTestCase):
 
 class TestGetAuthorImageKey(unittest.TestCase):
     def setUp(self):
-        self._fake = _FakeS3()
+        self._fake = MemoryStore()
         self._patch = _s3_patch(self._fake)
         self._patch.start()
 
@@ -762,7 +719,7 @@ class TestGetAuthorImageKey(unittest.TestCase):
     def _put_image(self, author_name, ext=".jpeg"):
         from aind_metadata_viz.contributions.store import _S3_PREFIX
         key = f"{_S3_PREFIX}/images/{author_name}{ext}"
-        self._fake._store[key] = b"fake-image-bytes"
+        self._fake.objects[key] = b"fake-image-bytes"
         return key
 
     def test_returns_key_when_image_exists(self):
@@ -794,7 +751,7 @@ class TestContributionsAuthorImageHandler(ContributionsHandlerTestCase):
     def _put_image(self, author_name, ext=".jpeg"):
         from aind_metadata_viz.contributions.store import _S3_PREFIX
         key = f"{_S3_PREFIX}/images/{author_name}{ext}"
-        self._fake._store[key] = b"fake-image-bytes"
+        self._fake.objects[key] = b"fake-image-bytes"
         return key
 
     def _patch_image(self):
@@ -0,0 +1,77 @@
+"""Unit tests for the shared DocDB client pools."""
+
+import unittest
+from unittest.mock import patch
+
+import requests
+from fastapi.testclient import TestClient
+from requests.adapters import BaseAdapter
+
+from aind_metadata_viz import docdb
+from aind_metadata_viz.main import app
+
+
+class _FakeAdapter(BaseAdapter):
+    """Answers every request locally with ``status``."""
+
+    def __init__(self, status=200):
+        super().__init__()
+        self.status = status
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = self.status
+        response.request = request
+        response._content = b"[]"
+        return response
+
+    def close(self):
+        pass
+
+
+class DocDbPoolTests(unittest.TestCase):
+    def setUp(self):
+        docdb.stop()
+        self.addCleanup(docdb.stop)
+
+    def test_clients_are_reused_round_robin(self):
+        with patch("aind_metadata_viz.docdb.DOCDB_POOL_SIZE", 2):
+            clients = [docdb.docdb_client("v1") for _ in range(4)]
+        self.assertIsNot(clients[0], clients[1])
+        self.assertEqual(clients[:2], clients[2:])
+        self.assertEqual(clients[0].version, "v1")
+        self.assertIsNot(docdb.docdb_client("v2"), clients[0])
+
+    def test_start_creates_both_versions(self):
+        docdb.start()
+        self.assertEqual(set(docdb.stats()), {"v1", "v2"})
+        self.assertEqual(docdb.stats()["v2"]["size"], docdb.DOCDB_POOL_SIZE)
+
+    def test_requests_are_counted_per_client(self):
+        with patch("aind_metadata_viz.docdb.DOCDB_POOL_SIZE", 2):
+            first, second = docdb.docdb_client("v2"), docdb.docdb_client("v2")
+        first.session.mount("https://", _FakeAdapter())
+        second.session.mount("https://", _FakeAdapter(status=502))
+        first.session.get("https://docdb.test/find")
+        first.session.get("https://docdb.test/find")
+        second.session.get("https://docdb.test/find")
+
+        stats = docdb.stats()["v2"]
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual([c["requests"] for c in stats["clients"]], [2, 1])
+        self.assertGreater(stats["clients"][0]["max_latency_s"], 0)
+
+    def test_stats_endpoint(self):
+        docdb.docdb_client("v1")
+        response = TestClient(app).get("/docdb/pool-stats")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.json()), ["v1"])
+
+    def test_invalid_pool_size(self):
+        with self.assertRaises(ValueError):
+            docdb.DocDbPool("v1", 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Unit tests for the named, observable worker pools."""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from aind_metadata_viz import executors
+from aind_metadata_viz.main import app
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+
+
+class NamedExecutorTests(unittest.TestCase):
+    def setUp(self):
+        executors.shutdown()
+        self.addCleanup(executors.shutdown)
+
+    def test_busy_pool_does_not_starve_another(self):
+        release = threading.Event()
+
+        async def run():
+            slow = [asyncio.ensure_future(executors.run_in("bedrock", release.wait, 5)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            value = await executors.run_in("s3", lambda: "object")
+            elapsed = time.perf_counter() - started
+            stats = executors.named_stats()["bedrock"]
+            release.set()
+            await asyncio.gather(*slow)
+            return value, elapsed, stats
+
+        with patch.dict(os.environ, {"BEDROCK_WORKERS": "1"}):
+            value, elapsed, bedrock = asyncio.run(run())
+        self.assertEqual(value, "object")
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual((bedrock["workers"], bedrock["active"], bedrock["queued"]), (1, 1, 2))
+
+        final = executors.named_stats()["bedrock"]
+        self.assertEqual((final["queued"], final["active"], final["completed"]), (0, 0, 3))
+        self.assertGreater(final["max_wait_s"], 0.04)
+
+    def test_run_in_passes_kwargs_and_context(self):
+        def describe(name, suffix=""):
+            return f"{name}{suffix}:{_request_id.get()}"
+
+        async def run():
+            _request_id.set("r1")
+            return await executors.run_in("cpu", describe, name="job", suffix="!")
+
+        self.assertEqual(asyncio.run(run()), "job!:r1")
+
+    def test_start_creates_every_pool(self):
+        executors.start()
+        self.assertEqual(set(executors.named_stats()), {"docdb", "s3", "bedrock", "cpu", "disk", "validation"})
+        self.assertEqual(executors.named_stats()["cpu"]["workers"], executors.available_cpus())
+
+    def test_validation_pool_is_observable(self):
+        self.assertIs(executors.validation_executor(), executors.named_executor("validation"))
+        asyncio.run(executors.run_in("validation", lambda: None))
+        self.assertEqual(executors.named_stats()["validation"]["completed"], 1)
+
+    def test_key_locks_are_dropped_when_released(self):
+        with executors.key_lock("a") as held:
+            self.assertIs(executors.key_lock("a"), held)
+            self.assertIn("a", executors._key_locks)
+        del held
+        self.assertNotIn("a", executors._key_locks)
+
+    def test_key_lock_serializes_updates(self):
+        counts = {"n": 0}
+
+        def increment():
+            for _ in range(200):
+                with executors.key_lock("counter"):
+                    value = counts["n"]
+                    time.sleep(0)
+                    counts["n"] = value + 1
+
+        threads = [threading.Thread(target=increment) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counts["n"], 800)
+
+    def test_unknown_pool(self):
+        with self.assertRaises(ValueError):
+            executors.named_executor("gpu")
+
+    def test_stats_endpoint(self):
+        asyncio.run(executors.run_in("docdb", lambda: None))
+        response = TestClient(app).get("/executor-stats")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["docdb"]["completed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""Unit tests for the RFC 6902 JSON Patch generator."""
+
+import copy
+import unittest
+
+from aind_metadata_viz.json_patch import make_patch
+
+
+def _unescape(token):
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def apply_patch(document, ops):
+    """Minimal RFC 6902 add/remove/replace applier used to check round trips."""
+    document = copy.deepcopy(document)
+    for op in ops:
+        if op["path"] == "":
+            document = op["value"]
+            continue
+        *parents, last = [_unescape(t) for t in op["path"].split("/")[1:]]
+        parent = document
+        for token in parents:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        if isinstance(parent, list):
+            index = len(parent) if last == "-" else int(last)
+            if op["op"] == "add":
+                parent.insert(index, op["value"])
+            elif op["op"] == "remove":
+                del parent[index]
+            else:
+                parent[index] = op["value"]
+        elif op["op"] == "remove":
+            del parent[last]
+        else:
+            parent[last] = op["value"]
+    return document
+
+
+class MakePatchTests(unittest.TestCase):
+    def _round_trip(self, source, target):
+        ops = make_patch(source, target)
+        self.assertEqual(apply_patch(source, ops), target)
+        return ops
+
+    def test_identical_documents_give_empty_patch(self):
+        doc = {"a": [1, {"b": None}], "c": "x"}
+        self.assertEqual(make_patch(doc, copy.deepcopy(doc)), [])
+
+    def test_object_changes(self):
+        ops = self._round_trip({"a": 1, "b": {"c": 2}, "d": 3}, {"a": 1, "b": {"c": 4}, "e": 5})
+        self.assertEqual(
+            ops,
+            [
+                {"op": "replace", "path": "/b/c", "value": 4},
+                {"op": "remove", "path": "/d"},
+                {"op": "add", "path": "/e", "value": 5},
+            ],
+        )
+
+    def test_list_insert_and_remove_in_the_middle(self):
+        source = [{"i": i} for i in range(6)]
+        inserted = source[:3] + [{"i": "new"}] + source[3:]
+        self.assertEqual(self._round_trip(source, inserted), [{"op": "add", "path": "/3", "value": {"i": "new"}}])
+        removed = source[:2] + source[4:]
+        self.assertEqual(self._round_trip(source, removed), [{"op": "remove", "path": "/2"}] * 2)
+
+    def test_list_mixed_changes(self):
+        self._round_trip([1, 2, 3, 4, 5], [1, 9, 8, 7, 6, 5])
+        self._round_trip([1, 2, 3], [])
+        self._round_trip([], [1, 2])
+        self._round_trip([[1, 2], [3]], [[1, 3], [3, 4], [5]])
+
+    def test_type_changes_and_json_equality(self):
+        self.assertEqual(make_patch({"a": 1}, {"a": True}), [{"op": "replace", "path": "/a", "value": True}])
+        self.assertEqual(make_patch([1], [1.0]), [{"op": "replace", "path": "/0", "value": 1.0}])
+        self._round_trip({"a": [1]}, {"a": {"0": 1}})
+        self.assertEqual(make_patch({"a": 1}, [1]), [{"op": "replace", "path": "", "value": [1]}])
+
+    def test_keys_are_escaped(self):
+        ops = self._round_trip({"a/b": 1, "c~d": 2}, {"a/b": 3, "c~d": 4})
+        self.assertEqual([op["path"] for op in ops], ["/a~1b", "/c~0d"])
+
+
+if __name__ == "__main__":
+    unittest.main()
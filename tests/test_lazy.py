@@ -0,0 +1,98 @@
+"""Unit tests for lazily imported heavy dependencies and the deferred /mcp mount."""
+
+import asyncio
+import json
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from aind_metadata_viz import lazy
+from aind_metadata_viz.chat import mcp_app
+
+
+class ImportTests(unittest.TestCase):
+    def test_main_does_not_import_heavy_modules(self):
+        code = (
+            "import json, sys\n"
+            "import aind_metadata_viz.main\n"
+            "from aind_metadata_viz.lazy import HEAVY_MODULES\n"
+            "print(json.dumps([name for name in HEAVY_MODULES if name in sys.modules]))\n"
+        )
+        completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(json.loads(completed.stdout.splitlines()[-1]), [])
+
+    def test_load_returns_the_module(self):
+        module = asyncio.run(lazy.load("aind_metadata_viz.json_patch"))
+        self.assertIs(module, sys.modules["aind_metadata_viz.json_patch"])
+
+    def test_warm_skips_modules_that_fail(self):
+        with self.assertLogs("aind_metadata_viz.lazy", level="ERROR"):
+            timings = lazy.warm(("no_such_module_for_tests", "aind_metadata_viz.json_patch"))
+        self.assertEqual(list(timings), ["aind_metadata_viz.json_patch"])
+
+    def test_warmup_runs_in_the_background(self):
+        async def run():
+            with patch.object(lazy, "warm") as warm:
+                lazy.start_warmup()
+                await lazy.stop_warmup()
+            return warm
+
+        with patch.object(lazy, "IMPORT_WARMUP", True):
+            warm = asyncio.run(run())
+        warm.assert_called_once_with()
+        self.assertIsNone(lazy._warmup)
+
+
+class DeferredMCPTests(unittest.TestCase):
+    def _app(self):
+        app = FastAPI()
+
+        @app.get("/health")
+        async def health():
+            return {"status": "ok"}
+
+        mcp_app.mount_mcp_server(app)
+        return app
+
+    def test_unavailable_outside_the_lifespan(self):
+        response = TestClient(self._app()).post("/mcp/", json={})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["retry-after"], "5")
+
+    def test_health_does_not_wait_for_the_mcp_server(self):
+        async def slow_load(name):
+            await asyncio.sleep(0.5)
+            raise ImportError(name)
+
+        with patch.object(mcp_app.lazy, "load", slow_load), self.assertLogs(mcp_app.logger, level="ERROR"):
+            with TestClient(self._app()) as client:
+                self.assertEqual(client.get("/health").status_code, 200)
+                with patch.object(mcp_app, "MCP_STARTUP_TIMEOUT_S", 0.05):
+                    self.assertEqual(client.post("/mcp/", json={}).status_code, 503)
+
+    def test_serves_mcp_once_started(self):
+        with TestClient(self._app()) as client:
+            response = client.post(
+                "/mcp/",
+                json={
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": "initialize",
+                    "params": {
+                        "protocolVersion": "2025-03-26",
+                        "capabilities": {},
+                        "clientInfo": {"name": "test", "version": "1"},
+                    },
+                },
+                headers={"accept": "application/json, text/event-stream"},
+            )
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertIn('"protocolVersion"', response.text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+"""Unit tests for the in-process metrics registry, middleware and /metrics."""
+
+import asyncio
+import unittest
+
+import boto3
+from botocore.stub import Stubber
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from aind_metadata_viz import docdb, executors, http_client, metrics
+from aind_metadata_viz.main import app
+from tests.metadata_service_stub import MetadataServiceStub
+from tests.test_docdb import _FakeAdapter
+
+client = TestClient(app)
+
+
+def _probe_app():
+    probe = FastAPI()
+    probe.add_middleware(metrics.MetricsMiddleware)
+
+    @probe.get("/probe/{item}")
+    async def in_flight(item: str):
+        return JSONResponse({"in_flight": metrics.http_in_flight.value(method="GET")})
+
+    @probe.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"{i}\n".encode()
+                await asyncio.sleep(0)
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    @probe.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return probe
+
+
+class RegistryTests(unittest.TestCase):
+    def test_renders_prometheus_text(self):
+        registry = metrics.Registry()
+        counter = registry.register(metrics.Counter("jobs_total", "Jobs.", ("kind",)))
+        histogram = registry.register(metrics.Histogram("job_seconds", "Job time.", ("kind",), buckets=(0.1, 1)))
+        counter.inc(kind='say "hi"')
+        counter.inc(2, kind='say "hi"')
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value, kind="a")
+
+        text = registry.render()
+        self.assertIn("# TYPE jobs_total counter\n", text)
+        self.assertIn('jobs_total{kind="say \\"hi\\""} 3\n', text)
+        self.assertIn("# TYPE job_seconds histogram\n", text)
+        self.assertIn('job_seconds_bucket{kind="a",le="0.1"} 1\n', text)
+        self.assertIn('job_seconds_bucket{kind="a",le="1"} 2\n', text)
+        self.assertIn('job_seconds_bucket{kind="a",le="+Inf"} 3\n', text)
+        self.assertIn('job_seconds_sum{kind="a"} 5.55\n', text)
+        self.assertIn('job_seconds_count{kind="a"} 3\n', text)
+
+    def test_metric_without_samples_cannot_be_created(self):
+        class Incomplete(metrics._Metric):
+            kind = "gauge"
+
+        with self.assertRaises(TypeError):
+            Incomplete("incomplete", "Has no samples().")
+
+
+class MiddlewareTests(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(_probe_app(), raise_server_exceptions=False)
+
+    def test_counts_by_route_template_and_status(self):
+        labels = {"method": "GET", "route": "/probe/{item}", "status": "200"}
+        before = metrics.http_requests.value(**labels)
+        for item in ("a", "b"):
+            self.client.get(f"/probe/{item}")
+        self.assertEqual(metrics.http_requests.value(**labels), before + 2)
+        self.assertGreaterEqual(metrics.http_request_duration.count(**labels), 2)
+
+    def test_in_flight_while_handling(self):
+        response = self.client.get("/probe/a")
+        self.assertEqual(response.json()["in_flight"], 1)
+        self.assertEqual(metrics.http_in_flight.value(method="GET"), 0)
+
+    def test_streaming_response_passes_through(self):
+        labels = {"method": "GET", "route": "/stream", "status": "200"}
+        before = metrics.http_requests.value(**labels)
+        response = self.client.get("/stream")
+        self.assertEqual(response.text, "0\n1\n2\n")
+        self.assertEqual(metrics.http_requests.value(**labels), before + 1)
+
+    def test_errors_and_unmatched_paths(self):
+        before_error = metrics.http_requests.value(method="GET", route="/boom", status="500")
+        before_404 = metrics.http_requests.value(method="GET", route=metrics.UNMATCHED_ROUTE, status="404")
+        self.client.get("/boom")
+        self.client.get("/no/such/path")
+        self.assertEqual(metrics.http_requests.value(method="GET", route="/boom", status="500"), before_error + 1)
+        self.assertEqual(
+            metrics.http_requests.value(method="GET", route=metrics.UNMATCHED_ROUTE, status="404"), before_404 + 1
+        )
+
+
+class DependencyTests(unittest.TestCase):
+    def test_boto3_calls_are_timed(self):
+        s3 = metrics.instrument_boto3_client(
+            boto3.client("s3", region_name="us-west-2", aws_access_key_id="x", aws_secret_access_key="x"),
+            "s3",
+        )
+        labels = {"dependency": "s3", "operation": "HeadBucket"}
+        before_count = metrics.dependency_duration.count(**labels)
+        before_errors = metrics.dependency_errors.value(**labels)
+        with Stubber(s3) as stubber:
+            stubber.add_response("head_bucket", {})
+            stubber.add_client_error("head_bucket", http_status_code=503)
+            s3.head_bucket(Bucket="b")
+            with self.assertRaises(Exception):
+                s3.head_bucket(Bucket="b")
+        self.assertEqual(metrics.dependency_duration.count(**labels), before_count + 2)
+        self.assertEqual(metrics.dependency_errors.value(**labels), before_errors + 1)
+
+    def test_metadata_service_calls_are_timed(self):
+        stub = MetadataServiceStub().start()
+        self.addCleanup(stub.stop)
+        stub.responses = {"subject": (200, {"data": {}})}
+        labels = {"dependency": "metadata_service", "operation": "/api/v2/subject"}
+        before = metrics.dependency_duration.count(**labels)
+
+        async def fetch():
+            async with http_client.metadata_service_client() as http:
+                await http.get(f"{stub.url}/api/v2/subject/123")
+
+        asyncio.run(fetch())
+        self.assertEqual(metrics.dependency_duration.count(**labels), before + 1)
+
+    def test_docdb_calls_are_timed(self):
+        session = docdb._TimedSession()
+        self.addCleanup(session.close)
+        session.mount("https://", _FakeAdapter(status=502))
+        before = metrics.dependency_errors.value(dependency="docdb", operation="GET")
+        session.get("https://docdb.example/v2/records")
+        self.assertEqual(metrics.dependency_errors.value(dependency="docdb", operation="GET"), before + 1)
+
+    def test_dependency_timer_counts_exceptions(self):
+        labels = {"dependency": "bedrock", "operation": "test"}
+        before = metrics.dependency_errors.value(**labels)
+        with self.assertRaises(ValueError):
+            with metrics.dependency_timer("bedrock", "test"):
+                raise ValueError
+        self.assertEqual(metrics.dependency_errors.value(**labels), before + 1)
+
+
+class MetricsEndpointTests(unittest.TestCase):
+    def test_exposes_request_and_executor_metrics(self):
+        executors.start()
+        client.get("/health")
+        response = client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain; version=0.0.4"))
+        health = 'method="GET",route="/health",status="200"'
+        self.assertIn(f"http_requests_total{{{health}}}", response.text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{health},le="0.005"}}', response.text)
+        self.assertIn('executor_queued_jobs{pool="s3"} 0', response.text)
+        self.assertIn('executor_workers{pool="bedrock"}', response.text)
+
+
+if __name__ == "__main__":
+    unittest.main()
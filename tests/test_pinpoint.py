@@ -2,10 +2,8 @@
 
 import json
 import unittest
-from io import BytesIO
 from unittest.mock import patch
 
-from botocore.exceptions import ClientError
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
@@ -17,6 +15,7 @@ from aind_metadata_viz.pinpoint.store import (
     list_blobs,
     store_blob,
 )
+from aind_metadata_viz.storage import MemoryStore
 
 _app = FastAPI()
 _app.include_router(pinpoint_router)
@@ -26,33 +25,6 @@ _ALICE = {"orcid": "0000-0001-2345-6789", "name": "Alice", "is_admin": False}
 _BOB = {"orcid": "0000-0002-9999-0000", "name": "Bob", "is_admin": False}
 
 
-class _FakePaginator:
-    def __init__(self, store):
-        self._store = store
-
-    def paginate(self, Bucket, Prefix="", Delimiter=None):
-        keys = sorted(k for k in self._store if k.startswith(Prefix))
-        yield {"Contents": [{"Key": k} for k in keys]}
-
-
-class _FakeS3:
-    def __init__(self):
-        self._store = {}
-
-    def put_object(self, Bucket, Key, Body, ContentType=None):
-        self._store[Key] = Body if isinstance(Body, bytes) else Body.encode()
-
-    def get_object(self, Bucket, Key):
-        if Key not in self._store:
-            raise ClientError(
-                {"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, "GetObject"
-            )
-        return {"Body": BytesIO(self._store[Key])}
-
-    def get_paginator(self, operation_name):
-        return _FakePaginator(self._store)
-
-
 def _patch_user(user):
     return patch(
         "aind_metadata_viz.auth.session.get_current_user", return_value=user
@@ -61,9 +33,9 @@ def _patch_user(user):
 
 class PinpointTestCase(unittest.TestCase):
     def setUp(self):
-        self.fake = _FakeS3()
+        self.fake = MemoryStore()
         self._p = patch(
-            "aind_metadata_viz.pinpoint.store._s3", return_value=self.fake
+            "aind_metadata_viz.storage.backend", return_value=self.fake
         )
         self._p.start()
         self.addCleanup(self._p.stop)
@@ -78,7 +50,7 @@ class TestStore(PinpointTestCase):
 
     def test_stored_object_is_encrypted(self):
         store_blob(_ALICE["orcid"], "probes", {"secret": "trajectory-42"})
-        raw = b"".join(self.fake._store.values())
+        raw = b"".join(self.fake.objects.values())
         self.assertNotIn(b"trajectory-42", raw)
         envelope = json.loads(raw.decode())
         self.assertEqual(envelope["cipher"], "aes-256-gcm")
@@ -86,7 +58,7 @@ class TestStore(PinpointTestCase):
 
     def test_key_is_under_account_prefix(self):
         store_blob(_ALICE["orcid"], "probes", {})
-        key = next(iter(self.fake._store))
+        key = next(iter(self.fake.objects))
         self.assertEqual(
             key, f"pinpoint/accounts/{_ALICE['orcid']}/probes.json"
         )
@@ -94,7 +66,7 @@ class TestStore(PinpointTestCase):
     def test_overwrite_replaces_previous_blob(self):
         store_blob(_ALICE["orcid"], "probes", {"v": 1})
         store_blob(_ALICE["orcid"], "probes", {"v": 2})
-        self.assertEqual(len(self.fake._store), 1)
+        self.assertEqual(len(self.fake.objects), 1)
         self.assertEqual(get_blob(_ALICE["orcid"], "probes"), {"v": 2})
 
     def test_password_roundtrip(self):
@@ -125,8 +97,8 @@ class TestStore(PinpointTestCase):
 
     def test_blob_cannot_be_replayed_under_another_account(self):
         store_blob(_ALICE["orcid"], "probes", {"v": 1})
-        envelope = next(iter(self.fake._store.values()))
-        self.fake._store[
+        envelope = next(iter(self.fake.objects.values()))
+        self.fake.objects[
             f"pinpoint/accounts/{_BOB['orcid']}/probes.json"
         ] = envelope
         with self.assertRaises(DecryptionError):
@@ -134,8 +106,8 @@ class TestStore(PinpointTestCase):
 
     def test_blob_cannot_be_replayed_under_another_name(self):
         store_blob(_ALICE["orcid"], "probes", {"v": 1})
-        envelope = next(iter(self.fake._store.values()))
-        self.fake._store[
+        envelope = next(iter(self.fake.objects.values()))
+        self.fake.objects[
             f"pinpoint/accounts/{_ALICE['orcid']}/other.json"
         ] = envelope
         with self.assertRaises(DecryptionError):
@@ -157,7 +129,7 @@ class TestStore(PinpointTestCase):
 
     def test_name_is_sanitised(self):
         store_blob(_ALICE["orcid"], "../../escape", {"v": 1})
-        key = next(iter(self.fake._store))
+        key = next(iter(self.fake.objects))
         self.assertTrue(key.startswith(f"pinpoint/accounts/{_ALICE['orcid']}/"))
         self.assertNotIn("..", key)
 
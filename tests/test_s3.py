@@ -0,0 +1,83 @@
+"""Unit tests for the shared S3 client."""
+
+import os
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from aind_metadata_viz import s3, storage
+from aind_metadata_viz.contributions import store as contributions_store
+from tests.s3_stub import S3Stub
+from tests.test_contributions import _make_project
+
+_AWS_ENV = {"AWS_ACCESS_KEY_ID": "test", "AWS_SECRET_ACCESS_KEY": "test", "AWS_DEFAULT_REGION": "us-west-2"}
+
+
+class _StubTestCase(unittest.TestCase):
+    def setUp(self):
+        self.stub = S3Stub().start()
+        self.addCleanup(self.stub.stop)
+        for patcher in (patch.dict(os.environ, _AWS_ENV), patch.object(s3, "S3_ENDPOINT_URL", self.stub.url)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        s3.reset()
+        self.addCleanup(s3.reset)
+
+
+class SharedClientTests(_StubTestCase):
+    def test_one_client_across_threads(self):
+        built = []
+        build = s3._build_client
+
+        def slow_build():
+            time.sleep(0.05)
+            built.append(build())
+            return built[-1]
+
+        with patch.object(s3, "_build_client", slow_build), ThreadPoolExecutor(16) as pool:
+            clients = list(pool.map(lambda _: s3.client(), range(16)))
+        self.assertEqual(len(built), 1)
+        self.assertTrue(all(client is built[0] for client in clients))
+
+    def test_tuned_config(self):
+        config = s3.client().meta.config
+        self.assertEqual(config.max_pool_connections, s3.S3_MAX_POOL_CONNECTIONS)
+        self.assertEqual(config.retries["total_max_attempts"], s3.S3_MAX_ATTEMPTS)
+        self.assertEqual(config.retries["mode"], s3.S3_RETRY_MODE)
+
+    def test_counts_latency_and_bytes_per_operation(self):
+        client = s3.client()
+        client.put_object(Bucket="b", Key="k", Body=b"12345")
+        client.get_object(Bucket="b", Key="k")["Body"].read()
+        client.head_object(Bucket="b", Key="k")
+        with self.assertRaises(client.exceptions.NoSuchKey):
+            client.get_object(Bucket="b", Key="missing")
+
+        put, get, head = s3.stats("PutObject"), s3.stats("GetObject"), s3.stats("HeadObject")
+        self.assertEqual((put["calls"], put["bytes_sent"]), (1, 5))
+        self.assertEqual(get["calls"], 2)
+        self.assertGreaterEqual(get["bytes_received"], 5)
+        self.assertEqual((head["calls"], head["bytes_received"]), (1, 0))
+        self.assertGreater(get["mean_latency_s"], 0)
+        self.assertEqual(set(s3.stats()), {"GetObject", "HeadObject", "PutObject"})
+
+
+class StoresShareTheClientTests(_StubTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = patch.object(storage, "backend", return_value=storage.S3Store("aind-scratch-data"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_store_round_trip_on_one_connection_pool(self):
+        commit = contributions_store.store_contributions("shared-client", _make_project("shared-client"))
+        loaded = contributions_store.get_contributions("shared-client")
+        self.assertEqual(loaded.project_name, "shared-client")
+        self.assertEqual(contributions_store.list_project_commits("shared-client")[0]["commit"], commit)
+        self.assertEqual(s3.stats("PutObject")["calls"], 1)
+        self.assertEqual(s3.stats("ListObjectsV2")["calls"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
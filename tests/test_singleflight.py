@@ -0,0 +1,79 @@
+"""Unit tests for single-flight coalescing of executor calls."""
+
+import asyncio
+import threading
+import time
+import unittest
+
+from aind_metadata_viz.singleflight import SingleFlight, all_stats
+
+
+class SingleFlightTests(unittest.TestCase):
+    def setUp(self):
+        self.flight = SingleFlight("test")
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _slow(self, value="v", delay_s=0.05):
+        def fn():
+            with self.lock:
+                self.calls += 1
+            time.sleep(delay_s)
+            return value
+        return fn
+
+    def test_concurrent_identical_calls_share_one_execution(self):
+        async def run():
+            return await asyncio.gather(*(self.flight.run("k", self._slow()) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(run()), ["v"] * 5)
+        self.assertEqual(self.calls, 1)
+        stats = self.flight.stats()
+        self.assertEqual((stats["calls"], stats["executions"], stats["coalesced"]), (5, 1, 4))
+        self.assertEqual(stats["coalescing_ratio"], 0.8)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_different_keys_run_separately(self):
+        async def run():
+            return await asyncio.gather(self.flight.run("a", self._slow("a")), self.flight.run("b", self._slow("b")))
+
+        self.assertEqual(asyncio.run(run()), ["a", "b"])
+        self.assertEqual(self.calls, 2)
+
+    def test_sequential_calls_are_not_remembered(self):
+        async def run():
+            await self.flight.run("k", self._slow(delay_s=0))
+            await self.flight.run("k", self._slow(delay_s=0))
+
+        asyncio.run(run())
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.flight.stats()["coalesced"], 0)
+
+    def test_exception_is_shared(self):
+        def boom():
+            time.sleep(0.05)
+            raise RuntimeError("boom")
+
+        async def run():
+            return await asyncio.gather(*(self.flight.run("k", boom) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.assertEqual(self.flight.stats()["executions"], 1)
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        async def run():
+            first = asyncio.ensure_future(self.flight.run("k", self._slow(delay_s=0.1)))
+            second = asyncio.ensure_future(self.flight.run("k", self._slow(delay_s=0.1)))
+            await asyncio.sleep(0.02)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(run()), "v")
+
+    def test_registered_in_all_stats(self):
+        self.assertIn("test", all_stats())
+
+
+if __name__ == "__main__":
+    unittest.main()
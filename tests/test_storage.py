@@ -0,0 +1,213 @@
+"""Unit tests for the pluggable object storage backends."""
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from aind_metadata_viz import s3, storage
+from aind_metadata_viz.acquisitions import store as acquisitions_store
+from aind_metadata_viz.chat import log as chat_log
+from tests.s3_stub import S3Stub
+from tests.test_s3 import _AWS_ENV
+
+
+class _BackendContract:
+    """Behaviour every ``ObjectStore`` must share. Subclasses set ``self.store`` in ``setUp``."""
+
+    def test_get_missing_returns_none(self):
+        self.assertIsNone(self.store.get("a/missing.json"))
+        self.assertIsNone(self.store.head("a/missing.json"))
+
+    def test_put_get_head_round_trip(self):
+        etag = self.store.put("a/b.json", b'{"x": 1}')
+        stored = self.store.get("a/b.json")
+        self.assertEqual(stored.body, b'{"x": 1}')
+        self.assertEqual(stored.etag, etag)
+        self.assertEqual(self.store.head("a/b.json"), storage.ObjectInfo(8, etag))
+
+    def test_put_if_absent(self):
+        self.assertTrue(self.store.put_if("a/new.json", b"1", None))
+        self.assertFalse(self.store.put_if("a/new.json", b"2", None))
+        self.assertEqual(self.store.get("a/new.json").body, b"1")
+
+    def test_put_if_matching_etag(self):
+        etag = self.store.put("a/b.json", b"1")
+        self.assertTrue(self.store.put_if("a/b.json", b"2", etag))
+        self.assertFalse(self.store.put_if("a/b.json", b"3", etag))
+        self.assertEqual(self.store.get("a/b.json").body, b"2")
+
+    def test_put_if_etag_of_deleted_object_fails(self):
+        etag = self.store.put("a/b.json", b"1")
+        self.store.delete("a/b.json")
+        self.assertFalse(self.store.put_if("a/b.json", b"2", etag))
+        self.assertIsNone(self.store.get("a/b.json"))
+
+    def test_list_by_prefix_and_delimiter(self):
+        for key in ("p/one/1.json", "p/one/2.json", "p/two/1.json", "p/top.json", "q/other.json"):
+            self.store.put(key, b"{}")
+        self.assertEqual(self.store.list("p/one/").keys, ["p/one/1.json", "p/one/2.json"])
+        self.assertEqual(self.store.list("p/t").keys, ["p/top.json", "p/two/1.json"])
+        listing = self.store.list("p/", delimiter="/")
+        self.assertEqual(listing, storage.Listing(["p/top.json"], ["p/one/", "p/two/"]))
+        self.assertEqual(self.store.list("missing/"), storage.Listing([], []))
+
+    def test_delete_is_idempotent(self):
+        self.store.put("a/b.json", b"1")
+        self.store.delete("a/b.json")
+        self.store.delete("a/b.json")
+        self.assertIsNone(self.store.get("a/b.json"))
+        self.assertEqual(self.store.list("a/").keys, [])
+
+    def test_concurrent_updates_are_not_lost(self):
+        def increment(body):
+            return str(int(body or b"0") + 1).encode()
+
+        with patch.object(storage, "backend", return_value=self.store), patch.object(
+            storage, "STORAGE_UPDATE_ATTEMPTS", 100
+        ), ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: storage.update("counter", increment), range(24)))
+        self.assertEqual(self.store.get("counter").body, b"24")
+
+
+class MemoryStoreTests(_BackendContract, unittest.TestCase):
+    def setUp(self):
+        self.store = storage.MemoryStore()
+
+
+class LocalStoreTests(_BackendContract, unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = storage.LocalStore(tmp.name)
+
+    def test_rejects_keys_outside_the_root(self):
+        for key in ("../escape.json", "a//b.json", "/abs.json", ""):
+            with self.assertRaises(ValueError):
+                self.store.put(key, b"{}")
+
+    def test_writes_leave_no_temporary_files(self):
+        self.store.put("a/b.json", b"1")
+        self.store.put_if("a/b.json", b"2", self.store.get("a/b.json").etag)
+        self.assertEqual(os.listdir(os.path.join(self.store.root, "a")), ["b.json"])
+
+
+class S3StoreTests(_BackendContract, unittest.TestCase):
+    def setUp(self):
+        stub = S3Stub().start()
+        self.addCleanup(stub.stop)
+        for patcher in (patch.dict(os.environ, _AWS_ENV), patch.object(s3, "S3_ENDPOINT_URL", stub.url)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        s3.reset()
+        self.addCleanup(s3.reset)
+        self.store = storage.S3Store("aind-scratch-data")
+
+    def test_conditional_puts_send_s3_preconditions(self):
+        etag = self.store.put("a/b.json", b"1")
+        self.store.put_if("a/b.json", b"2", etag)
+        self.store.put_if("a/c.json", b"3", None)
+        self.assertEqual(s3.stats("PutObject")["calls"], 3)
+        self.assertEqual(s3.stats("PutObject")["errors"], 0)
+
+
+class UpdateTests(unittest.TestCase):
+    def setUp(self):
+        self.store = storage.MemoryStore()
+        patcher = patch.object(storage, "backend", return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retries_on_the_fresh_object_after_losing_a_race(self):
+        seen = []
+
+        def append(body):
+            seen.append(body)
+            if len(seen) == 1:
+                # Another replica writes between our read and our conditional put.
+                self.store.put("log", b"theirs\n")
+            return (body or b"") + b"ours\n"
+
+        storage.update("log", append)
+        self.assertEqual(seen, [None, b"theirs\n"])
+        self.assertEqual(self.store.get("log").body, b"theirs\nours\n")
+
+    def test_returning_none_skips_the_write(self):
+        self.store.put("k", b"same")
+        with patch.object(self.store, "put_if") as put_if:
+            storage.update("k", lambda body: None)
+        put_if.assert_not_called()
+
+    def test_gives_up_after_the_attempt_limit(self):
+        with patch.object(self.store, "put_if", return_value=False) as put_if, patch.object(
+            storage, "STORAGE_UPDATE_ATTEMPTS", 3
+        ), patch.object(storage.time, "sleep"):
+            with self.assertRaises(storage.UpdateConflict):
+                storage.update("k", lambda body: b"new")
+        self.assertEqual(put_if.call_count, 3)
+
+    def test_acquisitions_from_two_replicas_are_not_lost(self):
+        # key_lock only covers one process; model a second replica by writing behind its back.
+        acquisitions_store.add_acquisition_type("behavior", "training")
+        theirs = {"subject_id": "1", "date": "2999-01-01", "acquisition_type": "training", "platform": "behavior"}
+        get = self.store.get
+        raced = threading.Event()
+
+        def get_then_race(key):
+            stored = get(key)
+            if key == acquisitions_store._SCHEDULED_ACQUISITIONS_KEY and not raced.is_set():
+                raced.set()
+                self.store.put(key, json.dumps({"other-replica": theirs}).encode())
+            return stored
+
+        with patch.object(self.store, "get", get_then_race):
+            ours = acquisitions_store.add_scheduled_acquisition("2", "2999-01-01", "training")
+        uuids = {record["uuid"] for record in acquisitions_store.get_scheduled_acquisitions()}
+        self.assertEqual(uuids, {"other-replica", ours})
+
+    def test_chat_log_appends_keep_every_line(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: chat_log._append_record("logs/chat.json", {"i": i}), range(16)))
+        lines = self.store.get("logs/chat.json").body.decode().splitlines()
+        self.assertEqual(sorted(json.loads(line)["i"] for line in lines), list(range(16)))
+
+
+class IncompleteBackendTests(unittest.TestCase):
+    def test_missing_methods_fail_at_construction(self):
+        class ReadOnlyStore(storage.ObjectStore):
+            def get(self, key):
+                return None
+
+        with self.assertRaises(TypeError):
+            ReadOnlyStore()
+
+
+class BackendSelectionTests(unittest.TestCase):
+    def setUp(self):
+        storage.reset()
+        self.addCleanup(storage.reset)
+
+    def test_default_is_s3(self):
+        self.assertIsInstance(storage.backend(), storage.S3Store)
+        self.assertEqual(storage.backend().bucket, storage.STORAGE_BUCKET)
+
+    def test_local_and_memory(self):
+        with tempfile.TemporaryDirectory() as root, patch.object(storage, "STORAGE_DIR", root), patch.object(
+            storage, "STORAGE_BACKEND", "local"
+        ):
+            self.assertEqual(storage.backend().root, os.path.abspath(root))
+        storage.reset()
+        with patch.object(storage, "STORAGE_BACKEND", "memory"):
+            self.assertIsInstance(storage.backend(), storage.MemoryStore)
+            self.assertIs(storage.backend(), storage.backend())
+
+    def test_unknown_backend(self):
+        with patch.object(storage, "STORAGE_BACKEND", "gcs"), self.assertRaises(ValueError):
+            storage.backend()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,9 +4,11 @@ from __future__ import annotations
 
 import asyncio
 import json
+import time
 import unittest
 from unittest.mock import patch
 
+import httpx
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
@@ -329,6 +331,47 @@ class SummaryHandlerTests(unittest.TestCase):
         self.assertEqual(r1.status_code, 200)
         self.assertEqual(r2.status_code, 429)
 
+    def test_concurrent_requests_share_one_docdb_lookup(self):
+        calls = []
+
+        def _slow_fetch(name):
+            calls.append(name)
+            time.sleep(0.1)
+            return {"name": name}
+
+        async def _ok(record, **kwargs):
+            return SummaryResult(
+                name=record["name"],
+                summary="s",
+                compacted_bytes=1,
+                original_bytes=1,
+            )
+
+        async def _run():
+            transport = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as http:
+                return await asyncio.gather(
+                    *(
+                        http.get("/summary", params={"name": "x"})
+                        for _ in range(5)
+                    )
+                )
+
+        loose = RateLimiter(per_minute=100, per_day=100, burst=100)
+        handler_mod._fetch_v2_record_flight.clear()
+        with patch.object(handler_mod, "summary_rate_limiter", loose):
+            with patch.object(handler_mod, "_fetch_v2_record", _slow_fetch):
+                with patch.object(handler_mod, "summarize_record", _ok):
+                    with patch.object(handler_mod, "append_summary_log"):
+                        responses = asyncio.run(_run())
+        self.assertEqual([r.status_code for r in responses], [200] * 5)
+        self.assertEqual(calls, ["x"])
+        stats = handler_mod._fetch_v2_record_flight.stats()
+        self.assertEqual(stats["coalesced"], 4)
+        self.assertEqual(stats["coalescing_ratio"], 0.8)
+
 
 if __name__ == "__main__":
     unittest.main()
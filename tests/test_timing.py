@@ -0,0 +1,141 @@
+"""Unit tests for per-request phase timing and the Server-Timing header."""
+
+import asyncio
+import functools
+import json
+import unittest
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from aind_metadata_viz import docdb, executors, storage, timing
+from aind_metadata_viz.chat import log as log_mod
+from aind_metadata_viz.chat import summary_handler as handler_mod
+from aind_metadata_viz.chat.summary import summarize_record
+from aind_metadata_viz.singleflight import SingleFlight
+from tests.test_docdb import _FakeAdapter
+from tests.test_summary import _FakeBedrock
+
+
+def _server_timing(response) -> dict:
+    """Parse ``Server-Timing`` into ``{name: {"dur": ..., "desc": ...}}``."""
+    entries = {}
+    for entry in response.headers["server-timing"].split(", "):
+        name, *params = entry.split(";")
+        entries[name] = dict(param.split("=", 1) for param in params)
+    return entries
+
+
+def _probe_app():
+    probe = FastAPI()
+    probe.add_middleware(timing.TimingMiddleware)
+    flight = SingleFlight("timing-probe")
+
+    def work(name):
+        with timing.phase(name):
+            pass
+
+    @probe.get("/hops")
+    async def hops():
+        await executors.run_in("docdb", work, "run_in")
+        await asyncio.to_thread(work, "to_thread")
+        await flight.run("key", lambda: work("singleflight"))
+        timing.record("twice", 0.001)
+        timing.record("twice", 0.002)
+        return {}
+
+    @probe.get("/tool")
+    async def tool():
+        with timing.phase("tool:get records"):
+            pass
+        return {}
+
+    @probe.get("/plain")
+    async def plain():
+        return {}
+
+    @probe.get("/stream")
+    async def stream():
+        async def chunks():
+            with timing.phase("late"):
+                yield b"x"
+
+        return StreamingResponse(chunks())
+
+    return probe
+
+
+class TimingMiddlewareTests(unittest.TestCase):
+    def setUp(self):
+        executors.start()
+        self.client = TestClient(_probe_app())
+
+    def test_phases_recorded_across_thread_hops(self):
+        entries = _server_timing(self.client.get("/hops"))
+        for name in ("run_in", "to_thread", "singleflight", "twice", "total"):
+            self.assertIn(name, entries)
+        self.assertEqual(entries["twice"]["desc"], '"twice x2"')
+        self.assertGreaterEqual(float(entries["twice"]["dur"]), 3.0)
+
+    def test_names_are_sanitized_to_tokens(self):
+        entries = _server_timing(self.client.get("/tool"))
+        self.assertEqual(entries["tool_get_records"]["desc"], '"tool:get records"')
+
+    def test_requests_without_phases_only_report_total(self):
+        with self.assertNoLogs("aind_metadata_viz.timing"):
+            response = self.client.get("/plain")
+        self.assertEqual(list(_server_timing(response)), ["total"])
+
+    def test_log_line_includes_phases_after_the_header(self):
+        with self.assertLogs("aind_metadata_viz.timing", level="INFO") as logs:
+            response = self.client.get("/stream")
+        self.assertNotIn("late", _server_timing(response))
+        line = json.loads(logs.records[-1].getMessage().removeprefix("timing "))
+        self.assertEqual(line["path"], "/stream")
+        self.assertEqual(line["status"], 200)
+        self.assertEqual(line["phases"]["late"]["count"], 1)
+
+    def test_recording_outside_a_request_is_a_no_op(self):
+        timing.record("docdb", 1.0)
+        with timing.phase("bedrock"):
+            pass
+
+
+class SummaryTimingTests(unittest.TestCase):
+    """/summary reports its DocDB, compaction, Bedrock and S3 log phases."""
+
+    def setUp(self):
+        handler_mod.summary_rate_limiter.reset()
+        app = FastAPI()
+        app.add_middleware(timing.TimingMiddleware)
+        app.include_router(handler_mod.summary_router)
+        self.client = TestClient(app)
+
+    def test_summary_phases(self):
+        session = docdb._TimedSession()
+        self.addCleanup(session.close)
+        session.mount("https://", _FakeAdapter())
+
+        def fetch(name):
+            session.get("https://docdb.example/v2/records")
+            return {"name": name, "subject": {"sex": "F"}}
+
+        store = storage.MemoryStore()
+        summarize = functools.partial(summarize_record, bedrock_client_factory=lambda: _FakeBedrock("A mouse."))
+
+        with patch.object(handler_mod, "_fetch_v2_record", fetch), patch.object(
+            handler_mod, "summarize_record", summarize
+        ), patch.object(storage, "backend", return_value=store):
+            response = self.client.get("/summary", params={"name": "asset_x"})
+
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(list(store.objects), [log_mod._summary_log_key(log_mod._today_utc())])
+        entries = _server_timing(response)
+        for name in ("docdb", "compact", "bedrock", "s3_log", "total"):
+            self.assertIn(name, entries)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,26 @@
 """Test validation handlers including the GatherHandler."""
 
+import asyncio
 import json
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
 import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from unittest.mock import Mock, patch
 import os
+
+import httpx
 from fastapi.testclient import TestClient
 
+from aind_data_schema.core.data_description import DataDescription
+
+from aind_metadata_viz import endpoints, executors
 from aind_metadata_viz.main import app
+from tests.metadata_service_stub import MetadataServiceStub
+from tests.test_json_patch import apply_patch
 
 
 client = TestClient(app)
@@ -21,31 +35,35 @@ def load_test_response(filename):
 
 class TestGatherHandler(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = MetadataServiceStub().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+
     def setUp(self):
         self.subject_response = load_test_response("subject_response.json")
         self.procedures_response = load_test_response("procedures_response.json")
         self.funding_response = load_test_response("funding_response.json")
+        self.stub.reset()
+        endpoints.clear_metadata_caches()
+
+    def _serve_all(self, subject=None):
+        self.stub.responses = {
+            "subject": (200, {"data": subject or self.subject_response}),
+            "procedures": (200, {"data": self.procedures_response}),
+            "funding": (200, self.funding_response),
+        }
 
-    @patch("requests.get")
-    def test_gather_success(self, mock_get):
-        def mock_requests_side_effect(url):
-            mock_response = Mock()
-            mock_response.status_code = 200
-            if "/subject/" in url:
-                mock_response.json.return_value = {"data": self.subject_response}
-            elif "/procedures/" in url:
-                mock_response.json.return_value = {"data": self.procedures_response}
-            elif "/funding/" in url:
-                mock_response.json.return_value = self.funding_response
-            else:
-                mock_response.status_code = 404
-            return mock_response
-
-        mock_get.side_effect = mock_requests_side_effect
+    def test_gather_success(self):
+        self._serve_all()
 
         test_data = {
             "subject_id": "804670",
             "project_name": "test-project",
+            "metadata_service_url": self.stub.url,
             "modalities": ["ECEPHYS"],
             "tags": ["test", "validation"],
             "data_summary": "Test data gathering",
@@ -91,15 +109,11 @@ class TestGatherHandler(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn("Invalid JSON format", response.json()["error"])
 
-    @patch("requests.get")
-    def test_gather_subject_not_found(self, mock_get):
-        mock_response = Mock()
-        mock_response.status_code = 404
-        mock_get.return_value = mock_response
-
+    def test_gather_subject_not_found(self):
         test_data = {
             "subject_id": "nonexistent",
             "project_name": "test-project",
+            "metadata_service_url": self.stub.url,
             "modalities": ["ECEPHYS"],
         }
 
@@ -107,94 +121,96 @@ class TestGatherHandler(unittest.TestCase):
         self.assertEqual(response.status_code, 500)
         self.assertIn("Subject metadata not found", response.json()["details"])
 
-    @patch("requests.get")
-    def test_gather_service_error(self, mock_get):
-        mock_response = Mock()
-        mock_response.status_code = 500
-        mock_get.return_value = mock_response
+    def test_gather_service_error(self):
+        self.stub.responses = {
+            "subject": (500, {}),
+            "procedures": (500, {}),
+            "funding": (500, {}),
+        }
 
         test_data = {
             "subject_id": "804670",
             "project_name": "test-project",
+            "metadata_service_url": self.stub.url,
             "modalities": ["ECEPHYS"],
         }
 
         response = client.post("/gather", json=test_data)
         self.assertEqual(response.status_code, 500)
         self.assertIn("Failed to gather metadata", response.json()["error"])
+        self.assertIn("Subject service returned status 500", response.json()["details"])
 
-    @patch("requests.get")
-    def test_gather_with_custom_service_url(self, mock_get):
-        def mock_requests_side_effect(url):
-            mock_response = Mock()
-            mock_response.status_code = 200
-            self.assertIn("custom-service.com", url)
-            if "/subject/" in url:
-                mock_response.json.return_value = {"data": self.subject_response}
-            elif "/procedures/" in url:
-                mock_response.json.return_value = {"data": self.procedures_response}
-            elif "/funding/" in url:
-                mock_response.json.return_value = self.funding_response
-            return mock_response
-
-        mock_get.side_effect = mock_requests_side_effect
+    def test_gather_service_unreachable(self):
+        test_data = {
+            "subject_id": "804670",
+            "project_name": "test-project",
+            "metadata_service_url": "http://127.0.0.1:1",
+            "modalities": ["ECEPHYS"],
+        }
+
+        response = client.post("/gather", json=test_data)
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("Failed to retrieve subject metadata", response.json()["details"])
+
+    def test_gather_with_custom_service_url(self):
+        self._serve_all()
 
         test_data = {
             "subject_id": "804670",
             "project_name": "test-project",
-            "metadata_service_url": "https://custom-service.com",
+            "metadata_service_url": self.stub.url,
             "modalities": ["ECEPHYS"],
         }
 
         response = client.post("/gather", json=test_data)
         self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(self.stub.requests),
+            [
+                "/api/v2/funding/test-project",
+                "/api/v2/procedures/804670",
+                "/api/v2/subject/804670",
+            ],
+        )
 
-    @patch("requests.get")
-    def test_gather_validation_error(self, mock_get):
+    def test_gather_validation_error(self):
         invalid_subject = {"object_type": "Subject", "subject_id": "804670"}
+        self._serve_all(subject=invalid_subject)
 
-        def mock_requests_side_effect(url):
-            mock_response = Mock()
-            mock_response.status_code = 200
-            if "/subject/" in url:
-                mock_response.json.return_value = {"data": invalid_subject}
-            elif "/procedures/" in url:
-                mock_response.json.return_value = {"data": self.procedures_response}
-            elif "/funding/" in url:
-                mock_response.json.return_value = self.funding_response
-            return mock_response
+        test_data = {
+            "subject_id": "804670",
+            "project_name": "test-project",
+            "metadata_service_url": self.stub.url,
+            "modalities": ["ECEPHYS"],
+        }
+
+        response = client.post("/gather", json=test_data)
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("Subject validation failed", response.json()["details"])
 
-        mock_get.side_effect = mock_requests_side_effect
+    def test_gather_funding_failure_fails_validation(self):
+        self._serve_all()
+        self.stub.responses["funding"] = (500, {})
 
         test_data = {
             "subject_id": "804670",
             "project_name": "test-project",
+            "metadata_service_url": self.stub.url,
             "modalities": ["ECEPHYS"],
         }
 
+        # DataDescription requires at least one funding source.
         response = client.post("/gather", json=test_data)
         self.assertEqual(response.status_code, 500)
-        self.assertIn("Subject validation failed", response.json()["details"])
+        self.assertIn("funding_source", response.json()["details"])
 
-    @patch("requests.get")
-    def test_gather_with_all_optional_params(self, mock_get):
-        def mock_requests_side_effect(url):
-            mock_response = Mock()
-            mock_response.status_code = 200
-            if "/subject/" in url:
-                mock_response.json.return_value = {"data": self.subject_response}
-            elif "/procedures/" in url:
-                mock_response.json.return_value = {"data": self.procedures_response}
-            elif "/funding/" in url:
-                mock_response.json.return_value = self.funding_response
-            return mock_response
-
-        mock_get.side_effect = mock_requests_side_effect
+    def test_gather_with_all_optional_params(self):
+        self._serve_all()
 
         test_data = {
             "subject_id": "804670",
             "project_name": "test-project",
-            "metadata_service_url": "http://custom-service",
+            "metadata_service_url": self.stub.url,
             "modalities": ["ECEPHYS", "BEHAVIOR"],
             "tags": ["test", "comprehensive"],
             "group": "behavior",
@@ -215,9 +231,316 @@ class TestGatherHandler(unittest.TestCase):
         self.assertIn("ecephys", modality_abbrevs)
         self.assertIn("behavior", modality_abbrevs)
 
+    def test_repeat_gather_is_served_from_cache(self):
+        self._serve_all()
+        test_data = {
+            "subject_id": "804670",
+            "project_name": "test-project",
+            "metadata_service_url": self.stub.url,
+        }
+        self.assertEqual(client.post("/gather", json=test_data).status_code, 200)
+        self.assertEqual(client.post("/gather", json=test_data).status_code, 200)
+        self.assertEqual(len(self.stub.requests), 3)
+
+        stats = client.get("/gather/cache-stats").json()
+        for source in ("subject", "procedures", "funding"):
+            self.assertEqual(stats[source]["misses"], 1)
+            self.assertEqual(stats[source]["hits"], 1)
+
+    def test_not_found_is_not_cached(self):
+        test_data = {
+            "subject_id": "804670",
+            "project_name": "test-project",
+            "metadata_service_url": self.stub.url,
+        }
+        self.assertEqual(client.post("/gather", json=test_data).status_code, 500)
+        self._serve_all()
+        self.assertEqual(client.post("/gather", json=test_data).status_code, 200)
+
+    def test_gather_with_lifespan_client(self):
+        self._serve_all()
+        test_data = {
+            "subject_id": "804670",
+            "project_name": "test-project",
+            "metadata_service_url": self.stub.url,
+        }
+        with TestClient(app) as lifespan_client:
+            first = lifespan_client.post("/gather", json=test_data)
+            second = lifespan_client.post("/gather", json=test_data)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+
+
+class TestGatherConcurrency(unittest.TestCase):
+    """Wall-clock comparison of the concurrent fan-out vs. sequential calls."""
+
+    DELAY_S = 0.3
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = MetadataServiceStub(delay_s=cls.DELAY_S).start()
+        cls.stub.responses = {
+            "subject": (200, {"data": load_test_response("subject_response.json")}),
+            "procedures": (200, {"data": load_test_response("procedures_response.json")}),
+            "funding": (200, load_test_response("funding_response.json")),
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+
+    def setUp(self):
+        endpoints.clear_metadata_caches()
+
+    def _sequential(self):
+        async def run():
+            async with httpx.AsyncClient() as http:
+                await endpoints._get_subject(http, "804670", self.stub.url)
+                await endpoints._get_procedures(http, "804670", self.stub.url)
+                await endpoints._get_funding(http, "test-project", self.stub.url)
+
+        started = time.perf_counter()
+        asyncio.run(run())
+        return time.perf_counter() - started
+
+    def _concurrent(self):
+        started = time.perf_counter()
+        asyncio.run(endpoints._fetch_upstream("804670", "test-project", self.stub.url))
+        return time.perf_counter() - started
+
+    def test_fan_out_is_faster_than_sequential(self):
+        sequential = self._sequential()
+        concurrent = self._concurrent()
+        self.assertGreaterEqual(sequential, 3 * self.DELAY_S)
+        self.assertLess(concurrent, 2 * self.DELAY_S)
+        self.assertLess(concurrent, sequential)
+
+    def test_gather_latency_is_slowest_call_not_sum(self):
+        started = time.perf_counter()
+        response = client.post(
+            "/gather",
+            json={
+                "subject_id": "804670",
+                "project_name": "test-project",
+                "metadata_service_url": self.stub.url,
+            },
+        )
+        elapsed = time.perf_counter() - started
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(elapsed, 3 * self.DELAY_S)
+
+
+class TestGatherValidationPool(unittest.TestCase):
+
+    def setUp(self):
+        self.subject = load_test_response("subject_response.json")
+        self.procedures = load_test_response("procedures_response.json")
+        self.dd_params = {
+            "project_name": "test-project",
+            "subject_id": "804670",
+            "funding_source": [{"funder": {"name": "Allen Institute", "abbreviation": "AI"}}],
+            "investigators": [{"name": "Jane Doe"}],
+            "modalities": ["ecephys"],
+            "tags": None,
+            "group": None,
+            "restrictions": None,
+            "data_summary": None,
+            "acquisition_start_time": None,
+        }
+
+    def test_validation_runs_off_the_event_loop(self):
+        seen = {}
+        real = endpoints._validate_gathered
+
+        def spy(*args):
+            seen["thread"] = threading.current_thread().name
+            return real(*args)
+
+        stub = MetadataServiceStub().start()
+        self.addCleanup(stub.stop)
+        stub.responses = {
+            "subject": (200, {"data": self.subject}),
+            "procedures": (200, {"data": self.procedures}),
+            "funding": (200, load_test_response("funding_response.json")),
+        }
+        endpoints.clear_metadata_caches()
+        with patch("aind_metadata_viz.endpoints._validate_gathered", spy):
+            response = client.post(
+                "/gather",
+                json={"subject_id": "804670", "project_name": "test-project", "metadata_service_url": stub.url},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(seen["thread"].startswith("validation"))
+
+    def test_validation_on_process_pool(self):
+        with executors.ObservableProcessExecutor("validation", 1) as pool:
+            ok = pool.submit(
+                endpoints._validate_gathered, "804670", self.subject, self.procedures, self.dd_params
+            ).result()
+            failed = pool.submit(
+                endpoints._validate_gathered, "804670", {"subject_id": "804670"}, self.procedures, self.dd_params
+            )
+            with self.assertRaisesRegex(Exception, "Subject validation failed"):
+                failed.result()
+            stats = pool.stats()
+        self.assertEqual(set(ok), {"subject", "procedures", "data_description"})
+        self.assertEqual((stats["workers"], stats["queued"], stats["active"], stats["completed"]), (1, 0, 0, 2))
+        self.assertGreater(stats["max_wait_s"], 0)
+
+
+class TestBuildDataDescription(unittest.TestCase):
+
+    def setUp(self):
+        funding = load_test_response("funding_response.json")
+        self.params = {
+            "project_name": "test-project",
+            "subject_id": "804670",
+            "funding_source": [{k: v for k, v in f.items() if k != "investigators"} for f in funding],
+            "investigators": [i for f in funding for i in f.get("investigators", [])],
+            "modalities": ["ECEPHYS"],
+            "tags": None,
+            "group": None,
+            "restrictions": None,
+            "data_summary": None,
+            "acquisition_start_time": "2024-01-01T12:00:00Z",
+        }
+
+    def test_returns_json_ready_dict_matching_model(self):
+        data_description = endpoints._build_data_description(**self.params)
+        self.assertEqual(json.loads(json.dumps(data_description)), data_description)
+        self.assertEqual(data_description["name"], "804670_2024-01-01_12-00-00")
+        DataDescription.model_validate(data_description)
+
+    def test_modalities_match_case_insensitively(self):
+        self.params["modalities"] = ["ECEPHYS", "barseq", "Behavior-Videos"]
+        data_description = endpoints._build_data_description(**self.params)
+        self.assertEqual(
+            [m["abbreviation"] for m in data_description["modalities"]],
+            ["ecephys", "BARseq", "behavior-videos"],
+        )
+
+    def test_group_matches_name_or_value(self):
+        for group in ("EPHYS", "ephys", "msma", "MSMA"):
+            self.params["group"] = group
+            self.assertIsNotNone(endpoints._build_data_description(**self.params)["group"])
+        self.params["group"] = "not-a-group"
+        self.assertIsNone(endpoints._build_data_description(**self.params)["group"])
+
+    def test_validation_runs_once(self):
+        with patch.object(
+            DataDescription, "model_validate", side_effect=AssertionError("revalidated")
+        ):
+            result = endpoints._validate_gathered(
+                "804670",
+                load_test_response("subject_response.json"),
+                load_test_response("procedures_response.json"),
+                self.params,
+            )
+        self.assertIn("data_description", result)
+
+    def test_invalid_data_description_is_reported(self):
+        self.params["investigators"] = []
+        with self.assertRaisesRegex(Exception, "DataDescription validation failed"):
+            endpoints._validate_gathered(
+                "804670",
+                load_test_response("subject_response.json"),
+                load_test_response("procedures_response.json"),
+                self.params,
+            )
+
+
+class TestGatherBatch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = MetadataServiceStub().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+
+    def setUp(self):
+        self.stub.reset()
+        endpoints.clear_metadata_caches()
+        self.stub.responses = {
+            "subject": (200, {"data": load_test_response("subject_response.json")}),
+            "procedures": (200, {"data": load_test_response("procedures_response.json")}),
+            "funding": (200, load_test_response("funding_response.json")),
+        }
+
+    def _item(self, subject_id, project_name="test-project"):
+        return {
+            "subject_id": subject_id,
+            "project_name": project_name,
+            "metadata_service_url": self.stub.url,
+        }
+
+    def _post(self, body):
+        response = client.post("/gather/batch", json=body)
+        lines = [json.loads(line) for line in response.text.splitlines() if line]
+        return response, lines
+
+    def test_streams_one_line_per_item(self):
+        response, lines = self._post({"items": [self._item("804670"), self._item("804671")]})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("application/x-ndjson"))
+        self.assertEqual(sorted(line["index"] for line in lines), [0, 1])
+        for line in lines:
+            self.assertEqual(line["status"], 200)
+            self.assertIn("data_description", line["result"])
+
+    def test_funding_fetched_once_per_project(self):
+        items = [self._item(str(i)) for i in range(5)] + [self._item("9", "other-project")]
+        _, lines = self._post({"items": items, "concurrency": 2})
+        self.assertEqual(len(lines), 6)
+        funding_calls = [p for p in self.stub.requests if "/funding/" in p]
+        self.assertEqual(
+            sorted(funding_calls),
+            ["/api/v2/funding/other-project", "/api/v2/funding/test-project"],
+        )
+
+    def test_slow_subject_does_not_block_others(self):
+        self.stub.path_delays = {"/api/v2/subject/slow": 0.5}
+        _, lines = self._post({"items": [self._item("slow"), self._item("fast")]})
+        self.assertEqual([line["subject_id"] for line in lines], ["fast", "slow"])
+
+    def test_item_errors_are_reported_per_line(self):
+        _, lines = self._post([self._item("804670"), {"project_name": "test-project"}])
+        by_index = {line["index"]: line for line in lines}
+        self.assertEqual(by_index[0]["status"], 200)
+        self.assertEqual(by_index[1]["status"], 400)
+        self.assertIn("subject_id is required", by_index[1]["error"])
+
+    def test_malformed_item_is_reported_per_line(self):
+        bad = {**self._item("804671"), "modalities": 5}
+        _, lines = self._post([self._item("804670"), bad, "not an object"])
+        by_index = {line["index"]: line for line in lines}
+        self.assertEqual(by_index[0]["status"], 200)
+        self.assertEqual(by_index[1]["status"], 400)
+        self.assertIn("modalities", by_index[1]["error"])
+        self.assertEqual(by_index[2]["status"], 400)
+
+    def test_upstream_failure_is_reported_per_line(self):
+        self.stub.responses["subject"] = (500, {})
+        _, lines = self._post([self._item("804670")])
+        self.assertEqual(lines[0]["status"], 500)
+        self.assertIn("Subject service returned status 500", lines[0]["details"])
+
+    def test_rejects_empty_items(self):
+        response = client.post("/gather/batch", json={"items": []})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_bad_concurrency(self):
+        response = client.post("/gather/batch", json={"items": [self._item("1")], "concurrency": 0})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("concurrency", response.json()["error"])
+
 
 class TestUpgradeEndpoint(unittest.TestCase):
 
+    def setUp(self):
+        endpoints._upgrade_cache.clear()
+
     def _minimal_subject(self):
         return {
             "object_type": "Subject",
@@ -254,39 +577,664 @@ class TestUpgradeEndpoint(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn("No recognized metadata fields", response.json()["error"])
 
-    @patch("aind_metadata_viz.endpoints.retrieve_records")
-    def test_upgrade_by_asset_name(self, mock_retrieve):
-        mock_result = Mock()
-        mock_result.records = [{"name": "test-asset", "subject": self._minimal_subject()}]
-        mock_retrieve.return_value = mock_result
+    @patch("aind_metadata_viz.endpoints.docdb_client")
+    def test_upgrade_by_asset_name(self, mock_client_cls):
+        docdb = mock_client_cls.return_value
+        docdb.retrieve_docdb_records.return_value = [{"name": "test-asset", "subject": self._minimal_subject()}]
 
         response = client.post("/upgrade?asset_name=test-asset")
         self.assertEqual(response.status_code, 200)
         body = response.json()
         self.assertIn("files_tested", body)
-        mock_retrieve.assert_called_once_with({"name": "test-asset"}, limit=1)
+        mock_client_cls.assert_called_once_with("v1")
+        docdb.retrieve_docdb_records.assert_called_once_with(filter_query={"name": "test-asset"})
 
-    @patch("aind_metadata_viz.endpoints.retrieve_records")
-    def test_upgrade_by_asset_name_not_found(self, mock_retrieve):
-        mock_result = Mock()
-        mock_result.records = []
-        mock_retrieve.return_value = mock_result
+    @patch("aind_metadata_viz.endpoints.docdb_client")
+    def test_upgrade_by_asset_name_not_found(self, mock_client_cls):
+        docdb = mock_client_cls.return_value
+        docdb.retrieve_docdb_records.return_value = []
 
         response = client.post("/upgrade?asset_name=nonexistent")
         self.assertEqual(response.status_code, 404)
         self.assertIn("not found", response.json()["error"])
+        docdb.retrieve_docdb_records.assert_called_once_with(filter_query={"name": "nonexistent"})
 
-    @patch("aind_metadata_viz.endpoints.retrieve_records")
-    def test_upgrade_by_asset_name_fetch_error(self, mock_retrieve):
-        mock_retrieve.side_effect = Exception("connection error")
+    @patch("aind_metadata_viz.endpoints.docdb_client")
+    def test_upgrade_by_asset_name_fetch_error(self, mock_client_cls):
+        mock_client_cls.return_value.retrieve_docdb_records.side_effect = Exception("connection error")
 
         response = client.post("/upgrade?asset_name=test-asset")
         self.assertEqual(response.status_code, 500)
         self.assertIn("Failed to fetch record", response.json()["error"])
+        self.assertIn("connection error", response.json()["error"])
+
+
+class _KeepInputUpgrade:
+    """Stand-in for Upgrade that "upgrades" by returning its (private) input.
+
+    Isolates the copies made by _upgrade_record from the upgrader's own
+    allocations. The whole-record attempt fails when ``fail_whole`` is set,
+    to exercise the per-field fallback.
+    """
+
+    fail_whole = False
+
+    def __init__(self, record, skip_metadata_validation=False):
+        if self.fail_whole and not skip_metadata_validation:
+            raise ValueError("whole-record upgrade failed")
+        self.metadata = Mock(model_dump=lambda mode: record)
+
+
+def _upgrade_on_threads(record, as_patch=False):
+    """Run ``_upgrade_record`` (what /upgrade runs) on a thread-backed upgrade pool.
+
+    Threads share this process, so patches reach the workers and tracemalloc
+    sees their allocations.
+    """
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pool = executors.BoundedPool("upgrade", executor, max_workers=4, max_queue=0)
+        with patch("aind_metadata_viz.endpoints.upgrade_pool", return_value=pool):
+            result, _ = asyncio.run(endpoints._upgrade_record(record, as_patch=as_patch))
+    return result
+
+
+class TestUpgradeMemory(unittest.TestCase):
+    """_upgrade_record copies the record at most once and never mutates it."""
+
+    @classmethod
+    def setUpClass(cls):
+        procedures = load_test_response("procedures_response.json")
+        procedures["subject_procedures"] = procedures["subject_procedures"] * 200
+        cls.record = {
+            "name": "large-record",
+            "subject": load_test_response("subject_response.json"),
+            "procedures": json.loads(json.dumps(procedures)),
+        }
+
+    @staticmethod
+    def _peak(fn):
+        tracemalloc.start()
+        try:
+            fn()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def _assert_peak_below_one_and_a_half_copies(self, fail_whole):
+        def json_copy(value):
+            if isinstance(value, dict):
+                return {k: json_copy(v) for k, v in value.items()}
+            return [json_copy(v) for v in value] if isinstance(value, list) else value
+
+        copy_size = self._peak(lambda: json_copy(self.record))
+        with patch.object(_KeepInputUpgrade, "fail_whole", fail_whole), \
+                patch("aind_metadata_upgrader.upgrade.Upgrade", _KeepInputUpgrade):
+            peak = self._peak(lambda: _upgrade_on_threads(self.record))
+        # The old path deep-copied the record once for "original" and again
+        # for the upgrader, i.e. more than twice the record size.
+        self.assertLess(peak, copy_size * 1.5)
+
+    def test_peak_allocation_whole_record_upgrade(self):
+        self._assert_peak_below_one_and_a_half_copies(fail_whole=False)
+
+    def test_peak_allocation_fallback_upgrade(self):
+        self._assert_peak_below_one_and_a_half_copies(fail_whole=True)
+
+    def test_input_not_mutated_and_shared_as_original(self):
+        for record in (self.record, dict(self.record, data_description={"foo": "bar"})):
+            snapshot = json.dumps(record, sort_keys=True)
+            result = _upgrade_on_threads(record)
+            self.assertEqual(json.dumps(record, sort_keys=True), snapshot)
+            self.assertIs(result["files_tested"]["procedures"]["original"], record["procedures"])
+            self.assertNotIn("_id", record)
+
+
+_LEGACY_SUBJECT = {
+    "object_type": "Subject",
+    "subject_id": "12345",
+    "sex": "Male",
+    "date_of_birth": "2023-01-01",
+    "species": {"name": "Mus musculus", "registry_identifier": "NCBI:txid10090"},
+    "genotype": "wt",
+}
+
+
+class TestUpgradeFastPath(unittest.TestCase):
+    """Records already on the installed schema are validated, not upgraded."""
+
+    @classmethod
+    def setUpClass(cls):
+        legacy = {"subject": _LEGACY_SUBJECT}
+        cls.current_subject = _upgrade_on_threads(legacy)["files_tested"]["subject"]["upgraded"]
+
+    def test_current_record_skips_upgrader(self):
+        record = {"name": "a", "subject": self.current_subject}
+        with patch("aind_metadata_upgrader.upgrade.Upgrade", side_effect=AssertionError("upgrader called")):
+            result = _upgrade_on_threads(record)
+        self.assertTrue(result["overall_success"])
+        self.assertEqual(result["skipped_fields"], ["subject"])
+        self.assertEqual(result["files_tested"]["subject"]["upgraded"], self.current_subject)
+        self.assertIs(result["files_tested"]["subject"]["original"], self.current_subject)
+
+    def test_outdated_or_invalid_record_is_upgraded(self):
+        invalid = dict(self.current_subject, subject_id=None)
+        for record in ({"subject": _LEGACY_SUBJECT}, {"subject": invalid}):
+            with patch("aind_metadata_upgrader.upgrade.Upgrade", side_effect=ValueError("upgraded")) as upgrade:
+                result = _upgrade_on_threads(record)
+            self.assertTrue(upgrade.called, record)
+            self.assertEqual(result["skipped_fields"], [])
+
+    def test_mixed_record_upgrades_only_the_outdated_fields(self):
+        session = {"schema_version": "1.0.0"}
+        record = {"name": "a", "subject": self.current_subject, "session": session}
+        upgraded = {"acquisition": {"schema_version": "2.0.0"}}
+        with patch("aind_metadata_upgrader.upgrade.Upgrade") as upgrade:
+            upgrade.return_value.metadata.model_dump.return_value = upgraded
+            result = _upgrade_on_threads(record)
+        # One per-field upgrade of the session; the current subject never reaches the upgrader.
+        self.assertEqual(upgrade.call_count, 1)
+        (field_input,), kwargs = upgrade.call_args
+        self.assertEqual(field_input["session"], session)
+        self.assertTrue(kwargs["skip_metadata_validation"])
+        self.assertTrue(result["overall_success"])
+        self.assertFalse(result["partial_success"])
+        self.assertEqual(result["skipped_fields"], ["subject"])
+        self.assertEqual(result["files_tested"]["subject"]["upgraded"], self.current_subject)
+        self.assertIs(result["files_tested"]["subject"]["original"], self.current_subject)
+        self.assertEqual(result["files_tested"]["session"]["upgraded"], upgraded["acquisition"])
+        self.assertIs(result["files_tested"]["session"]["original"], session)
+
+    def test_mixed_record_reports_a_failed_outdated_field(self):
+        record = {"subject": self.current_subject, "session": {"schema_version": "1.0.0"}}
+        with patch("aind_metadata_upgrader.upgrade.Upgrade", side_effect=ValueError("bad session")):
+            result = _upgrade_on_threads(record)
+        self.assertFalse(result["overall_success"])
+        self.assertTrue(result["partial_success"])
+        self.assertEqual(result["skipped_fields"], ["subject"])
+        self.assertTrue(result["files_tested"]["subject"]["success"])
+        self.assertEqual(result["files_tested"]["session"]["error"], "bad session")
+
+
+class TestUpgradePatchFormat(unittest.TestCase):
+    """format=patch returns a JSON Patch per field instead of both documents."""
+
+    def setUp(self):
+        endpoints._upgrade_cache.clear()
+
+    def test_patch_applies_to_original(self):
+        payload = {"subject": _LEGACY_SUBJECT}
+        full = client.post("/upgrade", json=payload).json()
+        response = client.post("/upgrade?format=patch", json=payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        subject = response.json()["files_tested"]["subject"]
+        self.assertNotIn("original", subject)
+        self.assertNotIn("upgraded", subject)
+        self.assertEqual(apply_patch(_LEGACY_SUBJECT, subject["patch"]), full["files_tested"]["subject"]["upgraded"])
+
+    def test_fallback_fields_are_patched(self):
+        record = {"subject": _LEGACY_SUBJECT, "data_description": {"foo": "bar"}}
+        full = client.post("/upgrade", json=record).json()
+        result = client.post("/upgrade?format=patch", json=record).json()
+        self.assertFalse(result["overall_success"])
+        self.assertEqual(
+            apply_patch(_LEGACY_SUBJECT, result["files_tested"]["subject"]["patch"]),
+            full["files_tested"]["subject"]["upgraded"],
+        )
+        self.assertIsNone(result["files_tested"]["data_description"]["patch"])
+
+    def test_invalid_format(self):
+        response = client.post("/upgrade?format=diff", json={"subject": _LEGACY_SUBJECT})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("format", response.json()["error"])
+
+
+def _slow_upgrade(record, include_original=True, as_patch=False):
+    time.sleep(record.get("delay", 0))
+    return {"overall_success": True, "files_tested": {}}
+
+
+class TestUpgradePool(unittest.TestCase):
+    """/upgrade runs on a bounded pool: 503 when saturated, 504 on timeout."""
+
+    def setUp(self):
+        endpoints._upgrade_cache.clear()
+
+    def _pool(self, workers=1, max_queue=0):
+        executor = ThreadPoolExecutor(max_workers=workers)
+        self.addCleanup(executor.shutdown, wait=True)
+        return executors.BoundedPool("upgrade", executor, max_workers=workers, max_queue=max_queue)
+
+    def _post_concurrently(self, *payloads, extra_get=None):
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                requests = [http.post("/upgrade", json=p) for p in payloads]
+                if extra_get:
+                    requests.append(http.get(extra_get))
+                return await asyncio.gather(*requests)
+
+        return asyncio.run(run())
+
+    @patch("aind_metadata_viz.endpoints._upgrade_whole_record", _slow_upgrade)
+    def test_saturated_pool_returns_503(self):
+        pool = self._pool(workers=1, max_queue=1)
+        with patch("aind_metadata_viz.endpoints.upgrade_pool", return_value=pool):
+            responses = self._post_concurrently(*({"subject": {"x": i}, "delay": 0.2} for i in range(3)))
+        self.assertEqual(sorted(r.status_code for r in responses), [200, 200, 503])
+        rejected = next(r for r in responses if r.status_code == 503)
+        self.assertEqual(rejected.headers["Retry-After"], "5")
+        self.assertEqual(pool.stats()["rejected"], 1)
+
+    @patch("aind_metadata_viz.endpoints._upgrade_whole_record", _slow_upgrade)
+    @patch("aind_metadata_viz.executors.UPGRADE_JOB_TIMEOUT_S", 0.05)
+    def test_slow_upgrade_times_out_with_504(self):
+        pool = self._pool()
+        with patch("aind_metadata_viz.endpoints.upgrade_pool", return_value=pool):
+            response = client.post("/upgrade", json={"subject": {"x": 1}, "delay": 0.3})
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    @patch("aind_metadata_viz.endpoints._upgrade_whole_record", _slow_upgrade)
+    def test_event_loop_free_while_upgrading(self):
+        pool = self._pool()
+        with patch("aind_metadata_viz.endpoints.upgrade_pool", return_value=pool):
+            started = time.perf_counter()
+
+            async def run():
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                    upgrade = asyncio.ensure_future(http.post("/upgrade", json={"subject": {"x": 1}, "delay": 0.3}))
+                    await asyncio.sleep(0.05)
+                    health = await http.get("/health")
+                    health_done = time.perf_counter() - started
+                    return health, health_done, await upgrade
+
+            health, health_done, upgrade = asyncio.run(run())
+        self.assertEqual(health.status_code, 200)
+        self.assertLess(health_done, 0.25)
+        self.assertEqual(upgrade.status_code, 200)
+
+    def test_process_pool_upgrade_and_stats(self):
+        payload = {
+            "subject": {
+                "object_type": "Subject",
+                "subject_id": "12345",
+                "sex": "Male",
+                "date_of_birth": "2023-01-01",
+                "species": {
+                    "name": "Mus musculus",
+                    "registry": "National Center for Biotechnology Information (NCBI)",
+                    "registry_identifier": "NCBI:txid10090",
+                },
+                "genotype": "wt",
+            }
+        }
+        with patch("aind_metadata_viz.executors.UPGRADE_POOL", "process"):
+            executors.reset_upgrade_pool()
+            self.addCleanup(executors.reset_upgrade_pool)
+            response = client.post("/upgrade", json=payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("subject", response.json()["files_tested"])
+        self.assertIsInstance(executors.upgrade_pool().executor, ProcessPoolExecutor)
+        self.assertEqual(executors.upgrade_pool().executor._mp_context.get_start_method(), "forkserver")
+        stats = client.get("/upgrade/pool-stats").json()
+        self.assertEqual(stats["completed"], 1)
+        self.assertEqual(stats["queued"], 0)
+
+
+class TestUpgradeParallelFallback(unittest.TestCase):
+    """When the whole-record upgrade fails, core files are retried concurrently."""
+
+    def setUp(self):
+        endpoints._upgrade_cache.clear()
+        executor = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(executor.shutdown, wait=True)
+        pool = executors.BoundedPool("upgrade", executor, max_workers=4, max_queue=0)
+        patcher = patch("aind_metadata_viz.endpoints.upgrade_pool", return_value=pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.record = {"name": "r", "subject": {"s": 1}, "procedures": {"p": 1}, "processing": {"q": 1}}
+
+    @staticmethod
+    def _fail_whole(original_record, include_original=True, as_patch=False):
+        return {"overall_success": False, "overall_error": "boom", "files_tested": {}}
+
+    @patch("aind_metadata_viz.endpoints._upgrade_whole_record", _fail_whole)
+    def test_fields_upgrade_concurrently(self):
+        def slow_field(core_file, field_input, as_patch=False):
+            time.sleep(0.2)
+            return {"upgraded": core_file}, None
+
+        with patch("aind_metadata_viz.endpoints._upgrade_single_field", slow_field):
+            started = time.perf_counter()
+            result, deterministic = asyncio.run(endpoints._upgrade_record(self.record))
+            elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 0.45)
+        self.assertTrue(deterministic)
+        self.assertEqual(list(result["files_tested"]), ["procedures", "subject", "processing"])
+        self.assertTrue(result["partial_success"])
+        self.assertEqual(result["files_tested"]["subject"]["upgraded"], {"upgraded": "subject"})
+        self.assertIs(result["files_tested"]["subject"]["original"], self.record["subject"])
+
+    @patch("aind_metadata_viz.endpoints._upgrade_whole_record", _fail_whole)
+    @patch("aind_metadata_viz.executors.UPGRADE_FALLBACK_TIMEOUT_S", 0.1)
+    def test_fallback_time_is_capped(self):
+        def field(core_file, field_input, as_patch=False):
+            time.sleep(0.4 if core_file == "processing" else 0)
+            return {}, None
+
+        with patch("aind_metadata_viz.endpoints._upgrade_single_field", field):
+            result, deterministic = asyncio.run(endpoints._upgrade_record(self.record))
+
+        self.assertFalse(deterministic)
+        self.assertTrue(result["files_tested"]["subject"]["success"])
+        self.assertFalse(result["files_tested"]["processing"]["success"])
+        self.assertIn("did not finish", result["files_tested"]["processing"]["error"])
+
+    def test_matches_single_field_upgrades(self):
+        record = {
+            "name": "r",
+            "subject": {"object_type": "Subject", "subject_id": "1"},
+            "data_description": {"foo": "bar"},
+        }
+        original = endpoints._with_upgrade_defaults(record)
+        expected = {}
+        for core_file in ("subject", "data_description"):
+            field_input = endpoints._field_upgrade_input(original, core_file)
+            upgraded, error = endpoints._upgrade_single_field(core_file, field_input)
+            expected[core_file] = endpoints._file_result(original, core_file, upgraded, error)
+        parallel, _ = asyncio.run(endpoints._upgrade_record(record))
+        self.assertFalse(parallel["overall_success"])
+        self.assertEqual(parallel["files_tested"], expected)
+        self.assertEqual(parallel["partial_success"], any(r["success"] for r in expected.values()))
+
+
+class TestUpgradeCache(unittest.TestCase):
+    """/upgrade results are cached by record content and library versions."""
+
+    def setUp(self):
+        endpoints._upgrade_cache.clear()
+        self.calls = []
+
+        def upgrade(record, include_original=True, as_patch=False):
+            self.calls.append(record["name"])
+            return {"overall_success": True, "files_tested": {"subject": {"success": True}}}
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown, wait=True)
+        pool = executors.BoundedPool("upgrade", executor, max_workers=2, max_queue=0)
+        for target, value in (
+            ("aind_metadata_viz.endpoints._upgrade_whole_record", upgrade),
+            ("aind_metadata_viz.endpoints.upgrade_pool", lambda: pool),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_identical_record_is_served_from_cache(self):
+        first = client.post("/upgrade", json={"name": "a", "subject": {"x": 1}})
+        second = client.post("/upgrade", json={"subject": {"x": 1}, "name": "a"})
+        other = client.post("/upgrade", json={"name": "a", "subject": {"x": 2}})
+        self.assertEqual([r.headers["X-Cache"] for r in (first, second, other)], ["MISS", "HIT", "MISS"])
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(client.get("/upgrade/pool-stats").json()["cache"]["hits"], 1)
+
+    def test_library_version_change_invalidates(self):
+        client.post("/upgrade", json={"name": "a", "subject": {"x": 1}})
+        with patch(
+            "aind_metadata_viz.endpoints._UPGRADE_LIBRARY_VERSIONS",
+            "aind-metadata-upgrader==99.0.0;aind-data-schema==99.0.0",
+        ):
+            response = client.post("/upgrade", json={"name": "a", "subject": {"x": 1}})
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        self.assertEqual(len(self.calls), 2)
+
+    def test_disk_tier_survives_memory_eviction(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        payload = {"name": "a", "subject": {"x": 1}}
+        with patch("aind_metadata_viz.endpoints.UPGRADE_CACHE_DIR", cache_dir):
+            first = client.post("/upgrade", json=payload)
+            deadline = time.monotonic() + 5
+            while not any(files for _, _, files in os.walk(cache_dir)) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            endpoints._upgrade_cache.clear()
+            second = client.post("/upgrade", json=payload)
+            third = client.post("/upgrade", json=payload)
+        self.assertEqual([r.headers["X-Cache"] for r in (first, second, third)], ["MISS", "DISK", "HIT"])
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(len(self.calls), 1)
+
+    def _disk_cache_dir(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        for target, value in (("UPGRADE_CACHE_DIR", cache_dir), ("_upgrade_disk_bytes", None)):
+            patcher = patch(f"aind_metadata_viz.endpoints.{target}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return cache_dir
+
+    def test_disk_tier_evicts_least_recently_used(self):
+        self._disk_cache_dir()
+        output = endpoints._UpgradeOutput(b"x" * 1000, {"overall_success": True}, True)
+        with patch("aind_metadata_viz.endpoints.UPGRADE_CACHE_DISK_MAX_BYTES", 3500):
+            for i, key in enumerate(("aa01", "bb02", "cc03")):
+                endpoints._write_upgrade_disk_cache(key, output)
+                os.utime(endpoints._upgrade_disk_path(key), (1000 + i, 1000 + i))
+            self.assertIsNotNone(endpoints._read_upgrade_disk_cache("aa01"))
+            endpoints._write_upgrade_disk_cache("dd04", output)
+        self.assertIsNone(endpoints._read_upgrade_disk_cache("bb02"))
+        for key in ("aa01", "cc03", "dd04"):
+            self.assertIsNotNone(endpoints._read_upgrade_disk_cache(key), key)
+
+    def test_prune_removes_other_library_versions(self):
+        cache_dir = self._disk_cache_dir()
+        output = endpoints._UpgradeOutput(b"{}", {"overall_success": True}, True)
+        with patch(
+            "aind_metadata_viz.endpoints._UPGRADE_LIBRARY_VERSIONS",
+            "aind-metadata-upgrader==0.0.1;aind-data-schema==0.0.1",
+        ):
+            endpoints._write_upgrade_disk_cache("aa01", output)
+        endpoints._write_upgrade_disk_cache("bb02", output)
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+        endpoints.prune_upgrade_disk_cache()
+        self.assertEqual(os.listdir(cache_dir), [os.path.basename(endpoints._upgrade_disk_version_dir())])
+        self.assertIsNotNone(endpoints._read_upgrade_disk_cache("bb02"))
+
+    @patch("aind_metadata_viz.executors.UPGRADE_FALLBACK_TIMEOUT_S", 0.05)
+    def test_timed_out_fallback_is_not_cached(self):
+        def fail_whole(original_record, include_original=True, as_patch=False):
+            return {"overall_success": False, "overall_error": "boom", "files_tested": {}}
+
+        def slow_field(core_file, field_input, as_patch=False):
+            time.sleep(0.2)
+            return {}, None
+
+        with patch("aind_metadata_viz.endpoints._upgrade_whole_record", fail_whole), \
+                patch("aind_metadata_viz.endpoints._upgrade_single_field", slow_field):
+            responses = [client.post("/upgrade", json={"name": "a", "subject": {"x": 1}}) for _ in range(2)]
+        self.assertEqual([r.headers["X-Cache"] for r in responses], ["MISS", "MISS"])
+
+
+class TestUpgradeBatch(unittest.TestCase):
+    """POST /upgrade/batch fetches v1 records in pages and streams per-asset results."""
+
+    def setUp(self):
+        endpoints._upgrade_cache.clear()
+        self.records = [
+            {"_id": f"id-{i}", "name": f"asset-{i}", "subject": {"i": i}, "procedures": {"i": i}} for i in range(5)
+        ]
+        self.fetches = []
+
+        def fetch_page(filter_query, after_id, page_size):
+            self.fetches.append((filter_query, after_id, page_size))
+            names = filter_query.get("name", {}).get("$in")
+            matched = [r for r in self.records if names is None or r["name"] in names]
+            return [r for r in matched if after_id is None or r["_id"] > after_id][:page_size]
+
+        def upgrade(record, include_original=True, as_patch=False):
+            if record["subject"]["i"] == 3:
+                raise RuntimeError("worker blew up")
+            ok = record["subject"]["i"] % 2 == 0
+            return {
+                "overall_success": ok,
+                "partial_success": False,
+                # Like the real one, a failed whole-record upgrade leaves files_tested empty.
+                "files_tested": {"subject": {"success": ok}, "procedures": {"success": True}} if ok else {},
+            }
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown, wait=True)
+        pool = executors.BoundedPool("upgrade", executor, max_workers=2, max_queue=0)
+        for target, value in (
+            ("aind_metadata_viz.endpoints._fetch_v1_page", fetch_page),
+            ("aind_metadata_viz.endpoints._upgrade_whole_record", upgrade),
+            ("aind_metadata_viz.endpoints._upgrade_single_field", lambda core_file, field_input, *_: (None, "bad")),
+            ("aind_metadata_viz.endpoints.upgrade_pool", lambda: pool),
+            ("aind_metadata_viz.endpoints.UPGRADE_BATCH_PAGE_SIZE", 2),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _lines(response):
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    def test_asset_names_streams_results_and_summary(self):
+        names = ["asset-0", "asset-1", "asset-3", "missing", "asset-0"]
+        response = client.post("/upgrade/batch", json={"asset_names": names})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        lines = self._lines(response)
+        by_name = {line["asset_name"]: line for line in lines[:-1]}
+        self.assertEqual(set(by_name), {"asset-0", "asset-1", "asset-3", "missing"})
+        self.assertTrue(by_name["asset-0"]["result"]["overall_success"])
+        self.assertEqual(by_name["asset-3"]["status"], 500)
+        self.assertEqual(by_name["missing"]["status"], 404)
+
+        summary = lines[-1]["summary"]
+        self.assertEqual(
+            {k: summary[k] for k in ("assets", "upgraded", "failed", "errors", "not_found")},
+            {"assets": 3, "upgraded": 1, "failed": 1, "errors": 1, "not_found": 1},
+        )
+        self.assertEqual(summary["files"]["subject"], {"success": 1, "failure": 1})
+        self.assertEqual(summary["files"]["procedures"], {"success": 1, "failure": 1})
+
+        in_filter = {"name": {"$in": ["asset-0", "asset-1", "asset-3", "missing"]}}
+        self.assertEqual(self.fetches, [(in_filter, None, 2), (in_filter, "id-1", 2), (in_filter, "id-3", 2)])
+
+    def test_filter_query_is_capped(self):
+        with patch("aind_metadata_viz.endpoints.UPGRADE_BATCH_MAX_ITEMS", 3):
+            lines = self._lines(client.post("/upgrade/batch", json={"filter": {}}))
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[-1]["summary"]["truncated"])
+        self.assertEqual([f[1:] for f in self.fetches], [(None, 2), ("id-1", 1)])
+
+    def test_fetch_error_reported_in_summary(self):
+        with patch("aind_metadata_viz.endpoints._fetch_v1_page", side_effect=Exception("docdb down")):
+            lines = self._lines(client.post("/upgrade/batch", json={"asset_names": ["asset-0"]}))
+        self.assertEqual(len(lines), 1)
+        self.assertIn("docdb down", lines[0]["summary"]["fetch_error"])
+        self.assertEqual(lines[0]["summary"]["not_found"], 0)
+
+    def test_bad_input(self):
+        for body in (
+            [],
+            {},
+            {"asset_names": ["a"], "filter": {}},
+            {"asset_names": []},
+            {"asset_names": [1]},
+            {"filter": "name"},
+        ):
+            self.assertEqual(client.post("/upgrade/batch", json=body).status_code, 400, body)
+        with patch("aind_metadata_viz.endpoints.UPGRADE_BATCH_MAX_ITEMS", 2):
+            response = client.post("/upgrade/batch", json={"asset_names": ["a", "b", "c"]})
+        self.assertEqual(response.status_code, 400)
+
+
+class TestFetchV1Page(unittest.TestCase):
+    """/upgrade/batch pages v1 records on _id, never by skipping."""
+
+    @patch("aind_metadata_viz.endpoints.docdb_client")
+    def test_pages_follow_the_last_id(self, mock_client_cls):
+        find_records = mock_client_cls.return_value.retrieve_docdb_records
+        find_records.return_value = []
+        self.assertEqual(endpoints._fetch_v1_page({"name": "a"}, None, 2), [])
+        self.assertEqual(endpoints._fetch_v1_page({"name": "a"}, "id-1", 2), [])
+        mock_client_cls.assert_called_with("v1")
+        self.assertEqual(
+            [c.kwargs for c in find_records.call_args_list],
+            [
+                {"filter_query": {"name": "a"}, "sort": {"_id": 1}, "limit": 2},
+                {"filter_query": {"$and": [{"name": "a"}, {"_id": {"$gt": "id-1"}}]}, "sort": {"_id": 1}, "limit": 2},
+            ],
+        )
+
+
+class TestUpgradeQueryCache(unittest.TestCase):
+    """/upgrade-query answers are cached and concurrent identical questions share one LLM call."""
+
+    def setUp(self):
+        endpoints._upgrade_query_cache.clear()
+        endpoints._upgrade_query_flight.clear()
+        self.events = []
+
+        def handle_get_query(event):
+            self.events.append(event)
+            time.sleep(0.1)
+            status = 500 if "fail" in event["queryStringParameters"] else 200
+            return {"statusCode": status, "body": json.dumps({"query": len(self.events)})}
+
+        patcher = patch("aind_metadata_viz.endpoints.handle_get_query", handle_get_query)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_normalized_repeat_is_cached(self):
+        first = client.get("/upgrade-query", params={"q": "mice  with\tsmartspim", "model": "m"})
+        second = client.get("/upgrade-query", params={"model": "m", "q": " mice with smartspim "})
+        self.assertEqual([r.headers["X-Cache"] for r in (first, second)], ["MISS", "HIT"])
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(self.events, [{"queryStringParameters": {"q": "mice  with\tsmartspim", "model": "m"}}])
+
+    def test_errors_are_not_cached(self):
+        for _ in range(2):
+            response = client.get("/upgrade-query", params={"q": "x", "fail": "1"})
+            self.assertEqual(response.status_code, 500)
+            self.assertEqual(response.headers["X-Cache"], "MISS")
+        self.assertEqual(len(self.events), 2)
+
+    def test_no_cache_bypasses(self):
+        client.get("/upgrade-query", params={"q": "x"})
+        response = client.get("/upgrade-query", params={"q": "x"}, headers={"Cache-Control": "no-cache"})
+        self.assertEqual(response.headers["X-Cache"], "BYPASS")
+        self.assertEqual(len(self.events), 2)
+
+    def test_concurrent_identical_questions_share_one_call(self):
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await asyncio.gather(*(http.get("/upgrade-query", params={"q": "x"}) for _ in range(5)))
+
+        responses = asyncio.run(run())
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(sorted(r.headers["X-Cache"] for r in responses), ["HIT"] * 4 + ["MISS"])
+        self.assertEqual(client.get("/upgrade-query/cache-stats").json()["coalesced"], 4)
 
 
 class TestRetrieveRecordsEndpoint(unittest.TestCase):
 
+    def setUp(self):
+        endpoints._query_result_cache.clear()
+        # These paths go through biodata-query; fail loudly rather than reach DocDB if one stops doing so.
+        patcher = patch("aind_metadata_viz.endpoints.docdb_client", side_effect=AssertionError("unexpected DocDB call"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     @patch("aind_metadata_viz.endpoints.retrieve_records")
     def test_filter_query(self, mock_retrieve):
         mock_result = Mock()
@@ -350,6 +1298,321 @@ class TestRetrieveRecordsEndpoint(unittest.TestCase):
         response = client.post("/retrieve-records", json="a string")
         self.assertEqual(response.status_code, 400)
 
+    @patch("aind_metadata_viz.endpoints.retrieve_records")
+    def test_repeated_query_served_from_cache(self, mock_retrieve):
+        mock_result = Mock()
+        mock_result.backend = "cache"
+        mock_result.elapsed_seconds = 0.1
+        mock_result.asset_names = ["asset-1"]
+        mock_result.records = [{"name": "asset-1"}]
+        mock_retrieve.return_value = mock_result
+
+        first = client.post("/retrieve-records?limit=5", json={"a": 1, "b": {"c": 2, "d": 3}})
+        # Same query with different key order and an equivalent limit string.
+        second = client.post("/retrieve-records?limit=05", json={"b": {"d": 3, "c": 2}, "a": 1})
+        self.assertEqual(first.headers["X-Cache"], "MISS")
+        self.assertEqual(second.headers["X-Cache"], "HIT")
+        self.assertEqual(second.json(), first.json())
+        mock_retrieve.assert_called_once()
+
+        client.post("/retrieve-records?limit=5&names_only=true", json={"a": 1, "b": {"c": 2, "d": 3}})
+        self.assertEqual(mock_retrieve.call_count, 2)
+        stats = client.get("/retrieve-records/cache-stats").json()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["size"], 2)
+
+    @patch("aind_metadata_viz.endpoints.retrieve_aggregation")
+    def test_cache_opt_out_header(self, mock_aggregate):
+        mock_result = Mock()
+        mock_result.backend = "docdb"
+        mock_result.elapsed_seconds = 0.2
+        mock_result.asset_names = []
+        mock_result.records = []
+        mock_aggregate.return_value = mock_result
+
+        pipeline = [{"$match": {}}]
+        client.post("/retrieve-records", json=pipeline)
+        response = client.post("/retrieve-records", json=pipeline, headers={"Cache-Control": "no-cache"})
+        self.assertEqual(response.headers["X-Cache"], "BYPASS")
+        self.assertEqual(mock_aggregate.call_count, 2)
+
+    @patch("aind_metadata_viz.endpoints.retrieve_aggregation")
+    def test_concurrent_identical_queries_coalesce(self, mock_aggregate):
+        def slow_aggregate(pipeline):
+            time.sleep(0.1)
+            return Mock(backend="docdb", elapsed_seconds=0.1, asset_names=["a"], records=None)
+
+        mock_aggregate.side_effect = slow_aggregate
+        endpoints._retrieve_aggregation_flight.clear()
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await asyncio.gather(*(
+                    http.post("/retrieve-records", json=[{"$match": {}}], headers={"Cache-Control": "no-cache"})
+                    for _ in range(4)
+                ))
+
+        responses = asyncio.run(run())
+        self.assertEqual([r.json()["asset_names"] for r in responses], [["a"]] * 4)
+        mock_aggregate.assert_called_once()
+        stats = client.get("/coalescing-stats").json()["retrieve_aggregation"]
+        self.assertEqual(stats["coalesced"], 3)
+        self.assertEqual(stats["coalescing_ratio"], 0.75)
+
+    @patch("aind_metadata_viz.endpoints.retrieve_records")
+    def test_errors_are_not_cached(self, mock_retrieve):
+        mock_retrieve.side_effect = [
+            Exception("connection error"),
+            Mock(backend="cache", elapsed_seconds=0.1, asset_names=[], records=None),
+        ]
+        self.assertEqual(client.post("/retrieve-records", json={"name": "x"}).status_code, 500)
+        response = client.post("/retrieve-records", json={"name": "x"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+
+
+def _matches(record, query):
+    """Evaluate the small subset of MongoDB filters the pagination code emits."""
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(_matches(record, q) for q in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(record, q) for q in condition):
+                return False
+        elif isinstance(condition, dict) and "$gt" in condition:
+            if not record.get(key) > condition["$gt"]:
+                return False
+        elif record.get(key) != condition:
+            return False
+    return True
+
+
+class TestRetrieveRecordsPagination(unittest.TestCase):
+    """page_size/cursor walk DocDB with keyset pagination."""
+
+    def setUp(self):
+        names = ["b", "a", "c", "a", "d", "b", "e"]
+        self.records = [
+            {"_id": f"id-{i}", "name": name, "project": "p" if i != 2 else "q"} for i, name in enumerate(names)
+        ]
+        self.calls = []
+
+        def find_records(filter_query=None, projection=None, sort=None, limit=0):
+            self.calls.append({"filter": filter_query, "projection": projection, "sort": sort})
+            matched = [r for r in self.records if _matches(r, filter_query or {})]
+            matched.sort(key=lambda r: tuple(r[k] for k in sort))
+            page = matched[:limit]
+            if projection:
+                page = [{k: v for k, v in r.items() if projection.get(k, 0) or k == "_id"} for r in page]
+            return page
+
+        patcher = patch("aind_metadata_viz.endpoints.docdb_client")
+        self.addCleanup(patcher.stop)
+        patcher.start().return_value = Mock(retrieve_docdb_records=Mock(side_effect=find_records))
+
+    def _walk(self, params, body=None):
+        names, cursor, pages = [], None, 0
+        while True:
+            query = dict(params, **({"cursor": cursor} if cursor else {}))
+            response = client.post("/retrieve-records", params=query, json=body or {})
+            self.assertEqual(response.status_code, 200, response.text)
+            page = response.json()
+            names.extend(page["asset_names"])
+            pages += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return names, pages
+
+    def test_pages_by_id(self):
+        names, pages = self._walk({"page_size": 3})
+        self.assertEqual(names, [r["name"] for r in self.records])
+        self.assertEqual(pages, 3)
+
+    def test_pages_by_name_with_duplicate_names(self):
+        names, _ = self._walk({"page_size": 2, "order_by": "name"})
+        self.assertEqual(names, sorted(r["name"] for r in self.records))
+        self.assertEqual(self.calls[-1]["sort"], {"name": 1, "_id": 1})
+
+    def test_filter_and_projection_keep_sort_keys(self):
+        response = client.post(
+            "/retrieve-records",
+            params={"page_size": 2, "order_by": "name", "projection": json.dumps({"project": 1})},
+            json={"project": "p"},
+        )
+        body = response.json()
+        self.assertEqual(self.calls[-1]["projection"], {"project": 1, "name": 1, "_id": 1})
+        self.assertEqual(body["asset_names"], ["a", "a"])
+        names, _ = self._walk({"page_size": 2}, body={"project": "p"})
+        self.assertNotIn("c", names)
+
+    def test_pages_by_name_with_names_only(self):
+        names, _ = self._walk({"page_size": 3, "order_by": "name", "names_only": "true"})
+        self.assertEqual(names, sorted(r["name"] for r in self.records))
+        self.assertEqual(self.calls[-1]["projection"], {"name": 1, "_id": 1})
+
+    def test_pages_by_name_with_inclusion_projection_of_sort_keys(self):
+        for projection in ({"name": 1}, {"name": 1, "_id": 1}):
+            self.calls.clear()
+            names, _ = self._walk({"page_size": 3, "order_by": "name", "projection": json.dumps(projection)})
+            self.assertEqual(names, sorted(r["name"] for r in self.records))
+            self.assertEqual(self.calls[-1]["projection"], {"name": 1, "_id": 1})
+
+    def test_exclusion_projection_drops_sort_keys_from_exclusion(self):
+        client.post(
+            "/retrieve-records",
+            params={"page_size": 2, "order_by": "name", "projection": json.dumps({"name": 0, "project": 0})},
+            json={},
+        )
+        self.assertEqual(self.calls[-1]["projection"], {"project": 0})
+
+    def test_names_only_page_has_no_records(self):
+        body = client.post("/retrieve-records", params={"page_size": 10, "names_only": "true"}, json={}).json()
+        self.assertNotIn("records", body)
+        self.assertIsNone(body["next_cursor"])
+        self.assertEqual(len(body["asset_names"]), 7)
+
+    def test_cursor_bound_to_query(self):
+        cursor = client.post("/retrieve-records", params={"page_size": 2}, json={}).json()["next_cursor"]
+        other_query = client.post("/retrieve-records", params={"page_size": 2, "cursor": cursor}, json={"name": "a"})
+        self.assertEqual(other_query.status_code, 400)
+        self.assertIn("Invalid cursor", other_query.json()["error"])
+        garbage = client.post("/retrieve-records", params={"page_size": 2, "cursor": "!!!"}, json={})
+        self.assertEqual(garbage.status_code, 400)
+
+    def test_bad_pagination_params(self):
+        for params, body in (
+            ({"page_size": 0}, {}),
+            ({"page_size": endpoints.RETRIEVE_MAX_PAGE_SIZE + 1}, {}),
+            ({"page_size": 2, "order_by": "subject"}, {}),
+            ({"page_size": 2, "limit": 5}, {}),
+            ({"cursor": "abc"}, {}),
+            ({"page_size": 2}, [{"$match": {}}]),
+        ):
+            response = client.post("/retrieve-records", params=params, json=body)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class TestRetrieveRecordsStreaming(unittest.TestCase):
+    """stream=true pages DocDB directly and ends with a trailer line."""
+
+    @staticmethod
+    def _lines(response):
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    def _fake_docdb(self, total, fail_after=None):
+        records = [{"_id": str(i), "name": f"asset-{i}"} for i in range(total)]
+        calls = []
+
+        def find_records(filter_query=None, projection=None, sort=None, limit=0):
+            calls.append({"filter": filter_query, "projection": projection, "sort": sort, "limit": limit})
+            if fail_after is not None and len(calls) > fail_after:
+                raise Exception("gateway timeout")
+            # Only the keyset bound is applied; the caller's own filter is passed through untouched.
+            after = filter_query["$and"][-1]["_id"]["$gt"] if "$and" in (filter_query or {}) else None
+            page = [r for r in records if after is None or r["_id"] > after]
+            page = page[:limit] if limit else page
+            if projection == {"name": 1, "_id": 1}:
+                page = [{"_id": r["_id"], "name": r["name"]} for r in page]
+            return page
+
+        docdb = Mock()
+        docdb.retrieve_docdb_records.side_effect = find_records
+        self.records = records
+        return docdb, calls
+
+    @patch("aind_metadata_viz.endpoints.RETRIEVE_STREAM_PAGE_SIZE", 2)
+    @patch("aind_metadata_viz.endpoints.retrieve_records")
+    @patch("aind_metadata_viz.endpoints.docdb_client")
+    def test_stream_pages_records(self, mock_client_cls, mock_retrieve):
+        docdb, calls = self._fake_docdb(5)
+        mock_client_cls.return_value = docdb
+
+        response = client.post("/retrieve-records?stream=true", json={"subject.subject_id": "123456"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        lines = self._lines(response)
+        self.assertEqual([line["name"] for line in lines[:-1]], [f"asset-{i}" for i in range(5)])
+        trailer = lines[-1]["trailer"]
+        self.assertEqual(trailer["backend"], "docdb")
+        self.assertEqual(trailer["count"], 5)
+        self.assertIn("elapsed_seconds", trailer)
+        self.assertNotIn("error", trailer)
+        # Keyset paging: every page starts after the previous page's last _id, never by skipping.
+        query = {"subject.subject_id": "123456"}
+        self.assertEqual(
+            [c["filter"] for c in calls],
+            [query] + [{"$and": [query, {"_id": {"$gt": last}}]} for last in ("1", "3", "4")],
+        )
+        self.assertTrue(all(c["limit"] == 2 and c["sort"] == {"_id": 1} for c in calls))
+        mock_client_cls.assert_called_once_with(endpoints.DOCDB_API_VERSION)
+        mock_retrieve.assert_not_called()
+
+    @patch("aind_metadata_viz.endpoints.RETRIEVE_STREAM_PAGE_SIZE", 2)
+    @patch("aind_metadata_viz.endpoints.docdb_client")
+    def test_stream_respects_limit_and_names_only(self, mock_client_cls):
+        docdb, calls = self._fake_docdb(10)
+        mock_client_cls.return_value = docdb
+
+        response = client.post("/retrieve-records?stream=true&limit=3&names_only=true", json={})
+        lines = self._lines(response)
+        self.assertEqual(lines[:-1], [{"name": "asset-0"}, {"name": "asset-1"}, {"name": "asset-2"}])
+        self.assertEqual(lines[-1]["trailer"]["count"], 3)
+        self.assertEqual([c["limit"] for c in calls], [2, 1])
+        self.assertEqual(calls[0]["projection"], {"name": 1, "_id": 1})
+
+    @patch("aind_metadata_viz.endpoints.RETRIEVE_STREAM_PAGE_SIZE", 2)
+    @patch("aind_metadata_viz.endpoints.docdb_client")
+    def test_stream_is_not_shifted_by_concurrent_deletes(self, mock_client_cls):
+        docdb, _ = self._fake_docdb(6)
+        find_records = docdb.retrieve_docdb_records.side_effect
+
+        def delete_first_page(**kwargs):
+            page = find_records(**kwargs)
+            if len(self.records) == 6:
+                # Another writer removes the records we just read.
+                del self.records[:len(page)]
+            return page
+
+        docdb.retrieve_docdb_records.side_effect = delete_first_page
+        mock_client_cls.return_value = docdb
+        lines = self._lines(client.post("/retrieve-records?stream=true", json={}))
+        self.assertEqual([line["name"] for line in lines[:-1]], [f"asset-{i}" for i in range(6)])
+
+    @patch("aind_metadata_viz.endpoints.RETRIEVE_STREAM_PAGE_SIZE", 2)
+    @patch("aind_metadata_viz.endpoints.docdb_client")
+    def test_stream_error_reported_in_trailer(self, mock_client_cls):
+        docdb, _ = self._fake_docdb(5, fail_after=1)
+        mock_client_cls.return_value = docdb
+
+        response = client.post("/retrieve-records?stream=true", json={})
+        self.assertEqual(response.status_code, 200)
+        lines = self._lines(response)
+        self.assertEqual(len(lines), 3)
+        trailer = lines[-1]["trailer"]
+        self.assertEqual(trailer["count"], 2)
+        self.assertEqual(trailer["error"], "Query execution failed")
+        self.assertIn("gateway timeout", trailer["details"])
+
+    @patch("aind_metadata_viz.endpoints.retrieve_aggregation")
+    def test_stream_aggregation(self, mock_aggregate):
+        mock_result = Mock()
+        mock_result.backend = "docdb"
+        mock_result.elapsed_seconds = 0.2
+        mock_result.asset_names = ["asset-2"]
+        mock_result.records = [{"name": "asset-2", "count": 5}]
+        mock_aggregate.return_value = mock_result
+
+        response = client.post("/retrieve-records?stream=true", json=[{"$match": {}}])
+        lines = self._lines(response)
+        self.assertEqual(lines[0], {"name": "asset-2", "count": 5})
+        self.assertEqual(lines[1], {"trailer": {"backend": "docdb", "count": 1, "elapsed_seconds": 0.2}})
+
+    def test_stream_validates_params_before_streaming(self):
+        response = client.post("/retrieve-records?stream=true&limit=abc", json={})
+        self.assertEqual(response.status_code, 400)
+
 
 if __name__ == "__main__":
     unittest.main()